@@ -0,0 +1,168 @@
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+# The benchmark is CPU-only, hide GPUs before torch is imported.
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+import torch
+from safetensors.torch import save_file
+
+import convert_fp8_scaled_learned_svd_fast as converter_module
+
+# Benchmarks convert_to_fp8_scaled on synthetic checkpoints and writes per-phase time/memory to JSON.
+
+def _linear(tensors, name, out_features, in_features, dtype, bias=True):
+    tensors[f"{name}.weight"] = (torch.randn(out_features, in_features) / in_features ** 0.5).to(dtype)
+    if bias:
+        tensors[f"{name}.bias"] = (torch.randn(out_features) * 0.01).to(dtype)
+
+def make_flux_like(blocks: int, hidden: int, mlp_ratio: int, dtype: torch.dtype) -> dict:
+    """Flux-style double/single blocks plus the img_in/txt_in/final/distillation layers matched by DISTILL_LAYER_KEYNAMES."""
+    tensors = {}
+    head_dim = 64 if hidden >= 64 else hidden
+    _linear(tensors, "img_in", hidden, 64, dtype)
+    _linear(tensors, "txt_in", hidden, hidden * 2, dtype)
+    _linear(tensors, "time_in.in_layer", hidden, 256, dtype)
+    _linear(tensors, "time_in.out_layer", hidden, hidden, dtype)
+    for i in range(blocks):
+        prefix = f"double_blocks.{i}"
+        for stream in ("img", "txt"):
+            _linear(tensors, f"{prefix}.{stream}_mod.lin", hidden * 6, hidden, dtype)
+            _linear(tensors, f"{prefix}.{stream}_attn.qkv", hidden * 3, hidden, dtype)
+            _linear(tensors, f"{prefix}.{stream}_attn.proj", hidden, hidden, dtype)
+            _linear(tensors, f"{prefix}.{stream}_mlp.0", hidden * mlp_ratio, hidden, dtype)
+            _linear(tensors, f"{prefix}.{stream}_mlp.2", hidden, hidden * mlp_ratio, dtype)
+            tensors[f"{prefix}.{stream}_attn.norm.query_norm.scale"] = torch.ones(head_dim, dtype=dtype)
+            tensors[f"{prefix}.{stream}_attn.norm.key_norm.scale"] = torch.ones(head_dim, dtype=dtype)
+        prefix = f"single_blocks.{i}"
+        _linear(tensors, f"{prefix}.linear1", hidden * (3 + mlp_ratio), hidden, dtype)
+        _linear(tensors, f"{prefix}.linear2", hidden, hidden * (1 + mlp_ratio), dtype)
+        _linear(tensors, f"{prefix}.modulation.lin", hidden * 3, hidden, dtype)
+    _linear(tensors, "distilled_guidance_layer.in_proj", hidden, 64, dtype)
+    _linear(tensors, "distilled_guidance_layer.layers.0.in_layer", hidden, hidden, dtype)
+    tensors["distilled_guidance_layer.norms.0.scale"] = torch.ones(hidden, dtype=dtype)
+    _linear(tensors, "final_layer.adaLN_modulation.1", hidden * 2, hidden, dtype)
+    _linear(tensors, "final_layer.linear", 64, hidden, dtype)
+    return tensors
+
+def make_t5xxl_like(blocks: int, hidden: int, mlp_ratio: int, dtype: torch.dtype, vocab: int = 4096) -> dict:
+    """T5 encoder/decoder layout: shared embedding, layer norms, decoder and lm_head tensors (AVOID/T5XXL_REMOVE_KEY_NAMES)."""
+    tensors = {"shared.weight": torch.randn(vocab, hidden).to(dtype)}
+    for stack in ("encoder", "decoder"):
+        for i in range(blocks if stack == "encoder" else 1):
+            prefix = f"{stack}.block.{i}.layer"
+            for proj in ("q", "k", "v", "o"):
+                _linear(tensors, f"{prefix}.0.SelfAttention.{proj}", hidden, hidden, dtype, bias=False)
+            tensors[f"{prefix}.0.layer_norm.weight"] = torch.ones(hidden, dtype=dtype)
+            _linear(tensors, f"{prefix}.1.DenseReluDense.wi_0", hidden * mlp_ratio, hidden, dtype, bias=False)
+            _linear(tensors, f"{prefix}.1.DenseReluDense.wi_1", hidden * mlp_ratio, hidden, dtype, bias=False)
+            _linear(tensors, f"{prefix}.1.DenseReluDense.wo", hidden, hidden * mlp_ratio, dtype, bias=False)
+            tensors[f"{prefix}.1.layer_norm.weight"] = torch.ones(hidden, dtype=dtype)
+        tensors[f"{stack}.final_layer_norm.weight"] = torch.ones(hidden, dtype=dtype)
+    tensors["encoder.block.0.layer.0.SelfAttention.relative_attention_bias.weight"] = torch.randn(32, 64).to(dtype)
+    tensors["lm_head.weight"] = torch.randn(vocab, hidden).to(dtype)
+    return tensors
+
+def make_generic(blocks: int, hidden: int, mlp_ratio: int, dtype: torch.dtype) -> dict:
+    """Plain MLP stack with biases and norms."""
+    tensors = {}
+    for i in range(blocks):
+        _linear(tensors, f"blocks.{i}.fc1", hidden * mlp_ratio, hidden, dtype)
+        _linear(tensors, f"blocks.{i}.fc2", hidden, hidden * mlp_ratio, dtype)
+        tensors[f"blocks.{i}.norm.weight"] = torch.ones(hidden, dtype=dtype)
+    return tensors
+
+LAYOUTS = {"flux": make_flux_like, "t5xxl": make_t5xxl_like, "generic": make_generic}
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark FP8 conversion on synthetic checkpoints (CPU-only). Reports wall time and peak RSS per phase as JSON.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("--layout", type=str, default="flux", choices=sorted(LAYOUTS), help="Synthetic key layout.")
+    parser.add_argument("--blocks", type=int, default=2, help="Number of transformer blocks.")
+    parser.add_argument("--hidden", type=int, default=256, help="Hidden size.")
+    parser.add_argument("--mlp_ratio", type=int, default=4, help="MLP expansion ratio.")
+    parser.add_argument("--dtype", type=str, default="bfloat16", choices=["bfloat16", "float16", "float32"], help="Dtype of the synthetic weights.")
+    parser.add_argument("--keep_distillation", action='store_true', help="Pass --keep_distillation to the converter.")
+    parser.add_argument("--num_iter", type=int, default=100, help="Optimization iterations per tensor.")
+    parser.add_argument("--calib_samples", type=int, default=3072, help="Calibration samples.")
+    parser.add_argument("--solver", type=str, nargs="+", default=["dense"], help="Solvers to benchmark (one run per combination).")
+    parser.add_argument("--principal", type=str, nargs="+", default=["pca"], help="Principal vector engines to benchmark (one run per combination).")
+    parser.add_argument("--batch_size", type=int, default=1, help="Converter batch size.")
+    parser.add_argument("--workers", type=int, default=1, help="Converter worker processes.")
+    parser.add_argument("--streaming", action='store_true', help="Use the streaming conversion path.")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per combination.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic weights.")
+    parser.add_argument("--workdir", type=str, default=None, help="Directory for the synthetic model and outputs (a temporary directory by default).")
+    parser.add_argument("--output", type=str, default="benchmark_results.json", help="JSON file to write the results to.")
+    parser.add_argument("--verbose", action='store_true', help="Show the converter's own output.")
+    args = parser.parse_args()
+
+    torch.manual_seed(args.seed)
+    dtype = getattr(torch, args.dtype)
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or tmp
+        os.makedirs(workdir, exist_ok=True)
+        model_path = os.path.join(workdir, f"synthetic_{args.layout}.safetensors")
+        tensors = LAYOUTS[args.layout](args.blocks, args.hidden, args.mlp_ratio, dtype)
+        save_file(tensors, model_path)
+        model_info = {"layout": args.layout, "tensors": len(tensors), "bytes": os.path.getsize(model_path),
+                      "parameters": sum(t.numel() for t in tensors.values())}
+        del tensors
+        print(f"Synthetic {args.layout} model: {model_info['tensors']} tensors, {model_info['bytes'] / 1024**2:.1f} MiB")
+
+        runs = []
+        for solver, principal in itertools.product(args.solver, args.principal):
+            for repeat in range(args.repeat):
+                output_path = os.path.join(workdir, f"out_{solver}_{principal}_{repeat}.safetensors")
+                start = time.perf_counter()
+                with contextlib.ExitStack() as stack:
+                    if not args.verbose:
+                        devnull = stack.enter_context(open(os.devnull, "w"))
+                        stack.enter_context(contextlib.redirect_stdout(devnull))
+                        converter_module.SHOW_PROGRESS = False
+                    summary = converter_module.convert_to_fp8_scaled(
+                        model_path, output_path, args.layout == "t5xxl", args.keep_distillation, args.calib_samples,
+                        streaming=args.streaming, batch_size=args.batch_size, workers=args.workers,
+                        num_iter=args.num_iter, solver=solver, principal=principal,
+                    )
+                wall = time.perf_counter() - start
+                if summary is None:
+                    print(f"Run solver={solver} principal={principal} failed, rerun with --verbose for details.")
+                    sys.exit(1)
+                # The summary's "principal" is the engine report, kept as principal_vectors
+                runs.append({**summary, "solver": solver, "principal": principal, "principal_vectors": summary["principal"],
+                             "repeat": repeat, "wall_seconds": wall, "output_bytes": os.path.getsize(output_path)})
+                phases = ", ".join(f"{name} {info['seconds']:.2f}s" for name, info in summary["phases"].items())
+                print(f"solver={solver} principal={principal} run {repeat}: {wall:.2f}s ({phases})")
+
+    result = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {"python": platform.python_version(), "torch": torch.__version__, "threads": torch.get_num_threads(),
+                        "platform": platform.platform(), "cpu_count": os.cpu_count()},
+        "config": vars(args),
+        "model": model_info,
+        "runs": runs,
+    }
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump(result, fh, indent=2)
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
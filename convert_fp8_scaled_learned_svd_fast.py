@@ -1,11 +1,27 @@
 import argparse
+import csv
+import ctypes
+import json
 import os
+import struct
+import sys
 import torch
 from safetensors import safe_open
-from safetensors.torch import save_file
-from typing import Dict, Tuple
+from safetensors.torch import load_file, save_file
+from typing import Dict, List, Optional, Tuple
 from tqdm import tqdm
+import contextlib
 import gc
+import time
+import math
+import hashlib
+import shutil
+import io
+import mmap
+import glob
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from collections import OrderedDict, defaultdict, deque
 
 # Written by Clybius
 
@@ -19,6 +35,435 @@ TARGET_FP8_DTYPE = torch.float8_e4m3fn
 COMPUTE_DTYPE = torch.float32 # Don't think more hurts here since we're working tensor by tensor.
 # Dtype for storing scale factors
 SCALE_DTYPE = torch.float32
+# Per-iteration progress bars; turned off inside pool workers where several bars would interleave.
+SHOW_PROGRESS = True
+# Per-tensor timings of earlier runs, used by --plan (see CostModel)
+DEFAULT_COST_MODEL = os.path.join(os.path.expanduser("~"), ".cache", "fp8_learned_rounding", "cost_model.json")
+
+# safetensors dtype names in the order of the reference implementation's Dtype enum.
+# save_file lays tensors out by descending dtype rank and then by name, so the streaming
+# writer needs this order to produce byte-identical files.
+SAFETENSORS_DTYPE_ORDER = ["BOOL", "U8", "I8", "F8_E5M2", "F8_E4M3", "I16", "U16", "F16", "BF16", "I32", "U32", "F32", "F64", "I64", "U64"]
+SAFETENSORS_DTYPE_SIZES = {"BOOL": 1, "U8": 1, "I8": 1, "F8_E5M2": 1, "F8_E4M3": 1, "I16": 2, "U16": 2, "F16": 2, "BF16": 2, "I32": 4, "U32": 4, "F32": 4, "F64": 8, "I64": 8, "U64": 8}
+TORCH_TO_SAFETENSORS_DTYPE = {
+    torch.bool: "BOOL", torch.uint8: "U8", torch.int8: "I8",
+    torch.float8_e5m2: "F8_E5M2", torch.float8_e4m3fn: "F8_E4M3",
+    torch.int16: "I16", torch.float16: "F16", torch.bfloat16: "BF16",
+    torch.int32: "I32", torch.float32: "F32", torch.float64: "F64", torch.int64: "I64",
+}
+for _name, _st_name in (("uint16", "U16"), ("uint32", "U32"), ("uint64", "U64")): # Only present in newer PyTorch builds
+    if hasattr(torch, _name):
+        TORCH_TO_SAFETENSORS_DTYPE[getattr(torch, _name)] = _st_name
+SAFETENSORS_TO_TORCH_DTYPE = {name: dtype for dtype, name in TORCH_TO_SAFETENSORS_DTYPE.items()}
+
+def current_rss() -> Optional[int]:
+    """Resident set size of this process in bytes, where the platform exposes it cheaply."""
+    try:
+        with open("/proc/self/statm", "r") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def max_rss() -> Optional[int]:
+    """High-water mark of this process' resident set size in bytes, None where unavailable."""
+    try:
+        import resource
+    except ImportError: # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def derive_seed(seed: int, name: str) -> int:
+    """Seed for one named random draw (a tensor, a calibration vector) of a run seeded with seed."""
+    return int.from_bytes(hashlib.blake2b(f"{seed}:{name}".encode("utf-8"), digest_size=8).digest(), "little") & 0x7FFFFFFFFFFFFFFF
+
+def enable_determinism(threads: Optional[int] = None):
+    """
+    Makes PyTorch pick deterministic kernels (call before any CUDA work). Random draws are seeded separately, see derive_seed.
+    threads pins the intra-op thread count: CPU reductions are split per thread, so it must match between runs.
+    """
+    if threads:
+        torch.set_num_threads(threads)
+    os.environ.setdefault("CUBLAS_WORKSPACE_CONFIG", ":4096:8")
+    torch.use_deterministic_algorithms(True, warn_only=True)
+    torch.backends.cudnn.deterministic = True
+    torch.backends.cudnn.benchmark = False
+
+class PhaseTimes:
+    """
+    Wall time, calls and peak memory per named phase of a conversion run
+    (load, calibration, pca, refine, bias_correction, save).
+    A phase's peak RSS is the process high-water mark if it rose during the phase, otherwise the RSS when it ended.
+    Several threads may record into the same instance (see PhaseProfiler.attach); phases that run in background
+    threads overlap the main thread's, so the totals can add up to more than the wall time.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._seconds: Dict[str, float] = defaultdict(float)
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.peak_rss: Dict[str, int] = defaultdict(int)
+
+    @property
+    def seconds(self) -> Dict[str, float]:
+        """A snapshot, safe to iterate while other threads record."""
+        with self.lock:
+            return defaultdict(float, self._seconds)
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        high_before = max_rss()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            high_after = max_rss()
+            peak = high_after if high_before is not None and high_after > high_before else current_rss()
+            with self.lock:
+                self._seconds[name] += elapsed
+                self.calls[name] += 1
+                if peak is not None:
+                    self.peak_rss[name] = max(self.peak_rss[name], peak)
+
+    def as_dict(self) -> Dict[str, dict]:
+        with self.lock:
+            return {name: {"seconds": self._seconds[name], "calls": self.calls[name], "peak_rss_bytes": self.peak_rss.get(name)} for name in self._seconds}
+
+class PhaseProfiler(threading.local):
+    """
+    The PhaseTimes each thread records into. Every thread starts with its own, so conversions running side by
+    side in batch mode keep separate timings; helper threads of one conversion attach() to its PhaseTimes.
+    """
+    def __init__(self):
+        self.state = PhaseTimes()
+
+    def reset(self):
+        self.state = PhaseTimes()
+
+    def attach(self, state: PhaseTimes):
+        self.state = state
+
+    @property
+    def seconds(self) -> Dict[str, float]:
+        return self.state.seconds
+
+    def phase(self, name: str):
+        return self.state.phase(name)
+
+    def as_dict(self) -> Dict[str, dict]:
+        return self.state.as_dict()
+
+class ConversionCancelled(Exception):
+    """Raised inside a conversion when its cancel event is set."""
+
+class MemoryBudgetError(Exception):
+    """Raised by MemoryGovernor.plan when the memory budget cannot hold even the smallest tiles."""
+
+# Phase timings of the current conversion run (per thread), reset by convert_to_fp8_scaled.
+PROFILER = PhaseProfiler()
+
+class EventStream:
+    """
+    Machine-readable progress channel: one JSON object per line, flushed as it is written.
+    target is a file path, 'fd:N' / 'N' for an inherited file descriptor, '-' for stdout, or any object with write().
+    Every record has 'event' and 'time' fields; non-finite floats are written as null.
+    """
+    def __init__(self, target: str):
+        self.owns_file = True
+        if hasattr(target, "write"):
+            self.file, self.owns_file = target, False
+        elif target == "-":
+            self.file, self.owns_file = sys.stdout, False
+        elif target.startswith("fd:") or target.isdigit():
+            self.file = os.fdopen(int(target[3:] if target.startswith("fd:") else target), "w", buffering=1, encoding="utf-8", closefd=False)
+        else:
+            self.file = open(target, "a", buffering=1, encoding="utf-8")
+
+    @staticmethod
+    def _clean(value):
+        if isinstance(value, float) and not math.isfinite(value):
+            return None
+        if isinstance(value, dict):
+            return {k: EventStream._clean(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [EventStream._clean(v) for v in value]
+        return value
+
+    def emit(self, event: str, **fields):
+        record = {"event": event, "time": time.time(), **fields}
+        self.file.write(json.dumps(self._clean(record)) + "\n")
+        self.file.flush()
+
+    def close(self):
+        if self.owns_file:
+            self.file.close()
+        else:
+            self.file.flush()
+
+class PrincipalVectorEngine:
+    """
+    Finds the top singular pair (U_k, Vh_k) of a weight, the only part of the SVD the TPEC loop uses.
+    'pca' is the original torch.pca_lowrank(niter=500) call with an SVD fallback.
+    'power' runs power iteration on W^T W until the direction stops changing (tol), warm-started from
+    the last vector found for the same shape. With cache_size, results are cached by a hash of the input
+    bytes, so tied or repeated weights are only solved once; it is off by default since hashing every
+    weight only pays off when the engine outlives one conversion (see ConversionCaches).
+    Time spent is accumulated per method for report().
+    With seed, pca_lowrank draws from a seed derived from the weight's bytes and warm starts are off,
+    so a weight's vectors do not depend on which tensors came before it (or on the cache).
+    """
+    # Power iterations over a tiled weight at most, whatever max_iter: each one reads the whole weight from disk
+    TILED_MAX_ITER = 25
+
+    def __init__(self, method: str = "pca", tol: float = 1e-6, max_iter: int = 500, cache_size: int = 0, profile: bool = False, seed: Optional[int] = None):
+        self.method = method
+        self.seed = seed
+        self.tol = tol
+        self.max_iter = max_iter
+        self.cache_size = cache_size
+        self.profile = profile # Also time the 'pca' reference on every tensor when using 'power'
+        self.cache: "OrderedDict[str, Tuple[torch.Tensor, torch.Tensor]]" = OrderedDict()
+        self.warm_start: Dict[Tuple[int, ...], torch.Tensor] = {}
+        self.timings = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.iterations = 0
+        self.cache_hits = 0
+        self.tiled_capped = 0 # Tiled weights whose power iteration stopped at TILED_MAX_ITER
+        self.lock = threading.Lock() # Guards cache, which concurrent batch jobs may share (see ConversionCaches)
+
+    def top_vectors(self, W: torch.Tensor, source: Optional[torch.Tensor] = None) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Returns U_k (..., m, 1) and Vh_k (..., 1, n) for W of shape (..., m, n).
+        source is the tensor hashed for the cache (the original weight, before upcasting); defaults to W.
+        """
+        cache_key = None
+        if self.cache_size > 0 or self.seed is not None:
+            src, buffer = _tensor_buffer(source if source is not None else W)
+            cache_key = hashlib.blake2b(buffer, digest_size=16).hexdigest() + f"{tuple(W.shape)}{src.dtype}"
+            del src, buffer
+            cached = self._cache_get(cache_key) if self.cache_size > 0 else None
+            if cached is not None:
+                U_k, Vh_k = cached
+                return U_k.to(W.device), Vh_k.to(W.device)
+
+        start = time.perf_counter()
+        if self.method == "power":
+            U_k, Vh_k = self._power(W)
+        elif self.seed is not None:
+            with torch.random.fork_rng(devices=[W.device.index or 0] if W.device.type == "cuda" else []):
+                torch.manual_seed(derive_seed(self.seed, cache_key))
+                U_k, Vh_k = self._pca(W)
+        else:
+            U_k, Vh_k = self._pca(W)
+        self.timings[self.method] += time.perf_counter() - start
+        self.calls[self.method] += 1
+
+        if self.profile and self.method != "pca":
+            start = time.perf_counter()
+            self._pca(W)
+            self.timings["pca"] += time.perf_counter() - start
+            self.calls["pca"] += 1
+
+        if cache_key is not None and self.cache_size > 0:
+            self._cache_put(cache_key, U_k, Vh_k)
+        return U_k, Vh_k
+
+    def top_vectors_tiled(self, blocks, shape: Tuple[int, int], device, digest: Optional[str] = None) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Top singular pair of a weight that is only available in row blocks (see LearnedRoundingConverter.convert_tiled).
+        blocks() starts a new pass over the weight and yields its float32 row blocks in order on device.
+        Always power iteration, whatever the method (pca_lowrank needs the whole matrix); every iteration is one pass,
+        so there are at most min(max_iter, TILED_MAX_ITER) of them, plus one for the start vector without a warm start
+        and one for U_k (see tiled_read_passes).
+        digest, a hash of the weight's bytes, keys the cache like top_vectors.
+        """
+        shape = tuple(shape)
+        cache_key = f"{digest}{shape}" if digest is not None and self.cache_size > 0 else None
+        if cache_key is not None:
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                U_k, Vh_k = cached
+                return U_k.to(device), Vh_k.to(device)
+
+        start = time.perf_counter()
+        v = self.warm_start.get(shape) if self.seed is None else None
+        if v is not None:
+            v = v.to(device).clone()
+        else: # Largest row, as in _power
+            best_norm = -1.0
+            for block in blocks():
+                norms = block.norm(dim=-1)
+                row = int(norms.argmax())
+                if norms[row].item() > best_norm:
+                    best_norm, v = norms[row].item(), block[row].clone().unsqueeze(-1)
+        v = v / v.norm().clamp(min=1e-30)
+        for _ in range(min(self.max_iter, self.TILED_MAX_ITER)):
+            v_next = torch.zeros_like(v)
+            for block in blocks():
+                v_next += block.T @ (block @ v)
+            v_next = v_next / v_next.norm().clamp(min=1e-30)
+            change = 1.0 - (v_next * v).sum().abs().item()
+            v = v_next
+            self.iterations += 1
+            if change < self.tol:
+                break
+        else:
+            self.tiled_capped += 1
+        u = torch.cat([block @ v for block in blocks()])
+        u = u / u.norm().clamp(min=1e-30)
+        self.warm_start[shape] = v.detach().cpu()
+        self.timings["power"] += time.perf_counter() - start
+        self.calls["power"] += 1
+
+        if cache_key is not None:
+            self._cache_put(cache_key, u, v.T)
+        return u, v.T
+
+    def _cache_get(self, cache_key: str) -> Optional[Tuple[torch.Tensor, torch.Tensor]]:
+        with self.lock:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.cache.move_to_end(cache_key)
+                self.cache_hits += 1
+        return cached
+
+    def _cache_put(self, cache_key: str, U_k: torch.Tensor, Vh_k: torch.Tensor):
+        with self.lock:
+            self.cache[cache_key] = (U_k.cpu(), Vh_k.cpu())
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    def _pca(self, W: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        try: # Try PCA for far faster estimation of U and Vh
+            U, _, Vh = torch.pca_lowrank(W, q=1, center=False, niter=500) # To my knowledge, LAPACK (or magma or w/e) uses 1k iters by default. Unsure if the default of 2 is good so set it to 1k here.
+            Vh = Vh.transpose(-2, -1)
+        except: # Fallback to SVD just in case
+            U, _, Vh = torch.linalg.svd(W, full_matrices=False)
+        return U[..., :, :1], Vh[..., :1, :] # Obtain most important low-rank matrices
+
+    def _power(self, W: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        shape = tuple(W.shape[-2:])
+        v = self.warm_start.get(shape) if self.seed is None else None
+        if v is not None:
+            v = v.to(W.device).expand(*W.shape[:-2], shape[1], 1).clone()
+        else: # Start from the largest row, already close to the top right singular vector for most weights
+            rows = W.norm(dim=-1).argmax(dim=-1)
+            v = torch.gather(W, -2, rows.view(*W.shape[:-2], 1, 1).expand(*W.shape[:-2], 1, shape[1])).transpose(-2, -1).clone()
+        v = v / v.norm(dim=-2, keepdim=True).clamp(min=1e-30)
+        Wt = W.transpose(-2, -1)
+        for _ in range(self.max_iter):
+            v_next = Wt @ (W @ v)
+            v_next = v_next / v_next.norm(dim=-2, keepdim=True).clamp(min=1e-30)
+            change = 1.0 - (v_next * v).sum(dim=-2).abs().min().item()
+            v = v_next
+            self.iterations += 1
+            if change < self.tol:
+                break
+        u = W @ v
+        u = u / u.norm(dim=-2, keepdim=True).clamp(min=1e-30)
+        self.warm_start[shape] = v.reshape(-1, shape[1], 1)[-1].detach().cpu()
+        return u, v.transpose(-2, -1)
+
+    def report(self) -> str:
+        parts = [f"{method}: {self.timings[method]:.2f}s over {self.calls[method]} calls" for method in sorted(self.calls)]
+        if self.method == "power":
+            parts.append(f"{self.iterations} power iterations")
+        parts.append(f"{self.cache_hits} cache hits")
+        if self.tiled_capped:
+            parts.append(f"{self.tiled_capped} tiled weights stopped at {self.TILED_MAX_ITER} power iterations")
+        return ", ".join(parts)
+
+class TimeBudgetScheduler:
+    """
+    Spreads a best-effort wall-clock budget for optimization over the refine loops of a run's tensors.
+    Only the refine loops are bounded: loading, principal vectors, bias correction and saving take as long
+    as they take, so a run whose other phases alone exceed the budget finishes late, with no refinement.
+    When a loop starts, it gets a share of the time left in proportion to its size times its RtN loss gap
+    (the initial projected loss) relative to the tensors seen so far; tensors still to come count with the
+    average gap. The time spent outside the loops (load, principal vectors, save) is measured per element
+    and reserved for the remaining tensors. Shares are recomputed from the clock, so time left over by
+    tensors that converge early goes to the rest. A loop that reaches its deadline keeps its best result.
+    """
+    def __init__(self, budget: float, total_numel: int, start: Optional[float] = None):
+        self.budget = budget
+        self.start = start if start is not None else time.perf_counter()
+        self.remaining_numel = total_numel
+        self.done_numel = 0
+        self.refine_seconds = 0.0
+        self.gap_sum = 0.0
+        self.gap_count = 0
+        self.loop_start = None
+        self.last_share = None
+        self.budget_stops = 0
+
+    def allocate(self, numel: int, initial_loss: float) -> float:
+        """Called when a refine loop starts. Returns its deadline on the time.perf_counter() clock."""
+        now = time.perf_counter()
+        self.remaining_numel = max(self.remaining_numel - numel, 0)
+        self.gap_sum += initial_loss
+        self.gap_count += 1
+        mean_gap = self.gap_sum / self.gap_count
+        relative_gap = min(max(initial_loss / mean_gap, 0.25), 4.0) if mean_gap > 0 else 1.0
+        elapsed = now - self.start
+        overhead_per_element = max(elapsed - self.refine_seconds, 0.0) / max(self.done_numel + numel, 1)
+        available = max(self.budget - elapsed - overhead_per_element * self.remaining_numel, 0.0)
+        weight = numel * relative_gap
+        self.last_share = available * weight / (weight + self.remaining_numel)
+        self.loop_start = now
+        return now + self.last_share
+
+    def finish(self, numel: int, stopped: bool):
+        self.refine_seconds += time.perf_counter() - self.loop_start
+        self.done_numel += numel
+        self.budget_stops += stopped
+
+    def report(self) -> str:
+        elapsed = time.perf_counter() - self.start
+        return f"{elapsed:.1f}s of {self.budget:.1f}s used, {self.refine_seconds:.1f}s refining, {self.budget_stops} loops stopped at their deadline"
+
+# Default bytes of work buffers a WorkspacePool keeps for shapes other than the one in use
+WORKSPACE_MEMORY = 1024**3
+
+class WorkspacePool:
+    """
+    Float32 work buffers of LearnedRoundingConverter, reused across tensors of the same shape instead of being
+    allocated (and freed) for every tensor. get() returns the buffer kept under a name for a shape and device,
+    with undefined contents. Buffers of the shape last asked for are always kept; buffers of other shapes are
+    kept while they take at most memory_limit bytes, and the least recently used shapes are dropped first.
+    """
+    def __init__(self, memory_limit: int = WORKSPACE_MEMORY):
+        self.memory_limit = memory_limit
+        self.groups: "OrderedDict[tuple, Dict[str, torch.Tensor]]" = OrderedDict()
+        self.allocations = 0
+        self.allocated_bytes = 0
+        self.reuses = 0
+        self.peak_bytes = 0
+
+    def get(self, name: str, shape, device) -> torch.Tensor:
+        group_key = (tuple(shape), str(device))
+        group = self.groups.setdefault(group_key, {})
+        self.groups.move_to_end(group_key)
+        buffer = group.get(name)
+        if buffer is not None:
+            self.reuses += 1
+            return buffer
+        buffer = group[name] = torch.empty(shape, dtype=COMPUTE_DTYPE, device=device)
+        self.allocations += 1
+        self.allocated_bytes += buffer.numel() * buffer.element_size()
+        while len(self.groups) > 1 and self._bytes(exclude=group_key) > self.memory_limit:
+            self.groups.popitem(last=False)
+        self.peak_bytes = max(self.peak_bytes, self._bytes())
+        return buffer
+
+    def _bytes(self, exclude=None) -> int:
+        return sum(buffer.numel() * buffer.element_size() for key, group in self.groups.items() if key != exclude for buffer in group.values())
+
+    def clear(self):
+        self.groups.clear()
+
+    def report(self) -> str:
+        return (f"{self.allocations} buffers allocated ({self.allocated_bytes / 1024**2:.0f} MiB), {self.reuses} reused, "
+                f"{self.peak_bytes / 1024**2:.0f} MiB held at most")
 
 class LearnedRoundingConverter:
     """
@@ -26,18 +471,55 @@ class LearnedRoundingConverter:
     Inspired by AdaRound paper (https://arxiv.org/abs/2004.10568).
     "TPEC-Quant" (Top-Principal Error Correction Quantization)
     """
-    def __init__(self, num_iter=256):
+    # Selection passes of the grid solver; each one recomputes the projected error exactly
+    GRID_PASSES = 8
+
+    def __init__(self, num_iter=256, solver="dense", principal="pca", principal_tol=1e-6, profile_principal=False, patience=40, seed=None):
         self.num_iter = num_iter
+        # Worse iterations in a row before a loop gives up and keeps its best tensor
+        self.patience = patience
+        # "dense" runs the reference loop on the full tensor, "closed_form" runs the same loop on scalars (see _refine_closed_form),
+        # "grid" picks between each element's two neighbouring FP8 values directly (see _refine_grid).
+        self.solver = solver
+        # With a seed, every random draw is derived from it (see PrincipalVectorEngine), so runs are repeatable.
+        self.principal = PrincipalVectorEngine(principal, tol=principal_tol, profile=profile_principal, seed=seed)
         self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
         # The maximum representable value for e4m3fn, used for scaling.
         self.f8_max_val = torch.finfo(TARGET_FP8_DTYPE).max
-        print(f"LearnedRoundingConverter initialized on device: {self.device}")
+        # Iterations and projected losses of the last convert() call; a list in input order after convert_batch().
+        self.last_stats = None
+        # threading.Event checked every iteration; when set, the conversion stops with ConversionCancelled.
+        self.cancel_event = None
+        # Optional TimeBudgetScheduler; each refine loop then also stops at the deadline it is given.
+        self.scheduler = None
+        # Work buffers shared by consecutive tensors; clear() it once the run is done.
+        self.workspace = WorkspacePool()
+        print(f"LearnedRoundingConverter initialized on device: {self.device} (solver: {self.solver}, principal vectors: {self.principal.method})")
+
+    def check_cancelled(self):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise ConversionCancelled()
 
-    def convert(self, W_orig: torch.Tensor, X_calib: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    def _begin_refine(self, numel: int, initial_loss: float) -> Optional[float]:
+        return self.scheduler.allocate(numel, initial_loss) if self.scheduler is not None else None
+
+    def _end_refine(self, numel: int, stopped: bool, stats):
+        if self.scheduler is None:
+            return
+        self.scheduler.finish(numel, stopped)
+        for entry in stats if isinstance(stats, list) else [stats]:
+            entry["budget_seconds"] = self.scheduler.last_share
+            entry["budget_stop"] = stopped
+
+    def convert(self, W_orig: torch.Tensor, X_calib: Optional["CalibrationStats"] = None) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
         """
         Performs the learned rounding conversion for a single weight tensor.
+        X_calib is not needed by the rounding itself; bias correction happens in correct_bias.
         """
-        W_float32 = W_orig.to(self.device, dtype=COMPUTE_DTYPE)
+        if W_orig.dtype == COMPUTE_DTYPE and W_orig.device.type == torch.device(self.device).type:
+            W_float32 = W_orig # Already upcast, e.g. by the prefetch thread
+        else:
+            W_float32 = self.workspace.get("W", W_orig.shape, self.device).copy_(W_orig)
 
         # Step 1: Calculate the quantization scale (per-tensor asymmetric)
         w_max = W_float32.abs().max()
@@ -45,24 +527,230 @@ class LearnedRoundingConverter:
             print("  - Tensor is all zeros, skipping optimization.")
             scale = torch.tensor(1.0, device=self.device)
             quantized_tensor = torch.zeros_like(W_float32, dtype=TARGET_FP8_DTYPE)
+            self.last_stats = {"iterations": 0, "initial_loss": 0.0, "final_loss": 0.0}
             return quantized_tensor.cpu(), scale.reciprocal().cpu().reshape(1), torch.zeros_like(W_float32).cpu()
 
         scale = self.f8_max_val / w_max # Example: (absmax = 1, fp8 max = +-448 for dtype e4m3_fn)
-        W_scaled = W_float32 * scale # absmax now +-448
+        W_rounded = torch.mul(W_float32, scale, out=self.workspace.get("rounded", W_float32.shape, self.device)) # absmax now +-448
 
         # Step 2: Initialize the rounding mask 'h'
-        W_rounded = W_scaled.to(TARGET_FP8_DTYPE).to(COMPUTE_DTYPE) # Naive RtN quantization on scaled model
-        W_dq_rounded = W_rounded / scale # Scale back down with scalar
+        W_rounded.copy_(W_rounded.to(TARGET_FP8_DTYPE)) # Naive RtN quantization on scaled model
 
-        try: # Try PCA for far faster estimation of U and Vh
-            U, _, Vh = torch.pca_lowrank(W_float32, q=1, center=False, niter=500) # To my knowledge, LAPACK (or magma or w/e) uses 1k iters by default. Unsure if the default of 2 is good so set it to 1k here.
-            Vh = Vh.T
-        except: # Fallback to SVD just in case
-            U, _, Vh = torch.linalg.svd(W_float32, full_matrices=False)
-        U_k = U[:, :1] # Obtain most important low-rank matrices
-        Vh_k = Vh[:1, :]
+        with PROFILER.phase("pca"):
+            U_k, Vh_k = self.principal.top_vectors(W_float32, W_orig)
+
+        with PROFILER.phase("refine"):
+            if self.solver == "closed_form":
+                final_tensor = self._refine_closed_form(W_rounded, W_float32, scale, U_k, Vh_k)
+            elif self.solver == "grid":
+                final_tensor = self._refine_grid(W_rounded, W_float32, scale, U_k, Vh_k)
+            else:
+                final_tensor = self._refine_dense(W_rounded, W_float32, scale, U_k, Vh_k)
 
-        W_q_refined = W_rounded.clone() # Clone, as this tensor will be the one thats iteratively refined
+        # Final Hard Quantization
+        with torch.no_grad():
+            W_f8 = final_tensor.to(TARGET_FP8_DTYPE)
+
+        # Calculate dequantization scale (reciprocal of the quantization scale)
+        dequant_scale = scale.reciprocal().reshape(1)
+        # The work buffers stay in self.workspace for the next tensor
+        del W_float32, W_rounded, final_tensor, U_k, Vh_k
+
+        return W_f8.cpu(), dequant_scale.cpu(), (W_f8.to(COMPUTE_DTYPE) * dequant_scale).cpu()
+
+    def convert_tiled(self, read_rows, shape: Tuple[int, int], rows_per_tile: int, write_rows, digest: Optional[str] = None) -> torch.Tensor:
+        """
+        convert() for a weight too large for its float32 working copies, processed in tiles of rows_per_tile rows.
+        read_rows(start, end) returns rows [start, end) of the original weight; write_rows(start, W_block, W_f8, W_dq)
+        receives every tile of the result with its float32 original. Absmax, principal vectors and the projected
+        error are computed in streaming passes, and the rounding is optimized with the closed-form solver,
+        which needs nothing else, so only one tile is held in float32 at a time. Returns the dequantization scale.
+        """
+        rows, cols = shape
+        def blocks(with_start: bool = False):
+            for start in range(0, rows, rows_per_tile):
+                self.check_cancelled()
+                block = read_rows(start, min(start + rows_per_tile, rows)).to(self.device, dtype=COMPUTE_DTYPE)
+                yield (start, block) if with_start else block
+
+        # Step 1: the scale, from a streaming absmax
+        w_max = torch.stack([block.abs().max() for block in blocks()]).max()
+        if w_max < 1e-12:
+            print("  - Tensor is all zeros, skipping optimization.")
+            for start, block in blocks(with_start=True):
+                write_rows(start, block.cpu(), torch.zeros_like(block, dtype=TARGET_FP8_DTYPE).cpu(), torch.zeros_like(block).cpu())
+            self.last_stats = {"iterations": 0, "initial_loss": 0.0, "final_loss": 0.0}
+            return torch.tensor(1.0).reshape(1)
+        scale = self.f8_max_val / w_max
+
+        with PROFILER.phase("pca"):
+            U_k, Vh_k = self.principal.top_vectors_tiled(blocks, shape, self.device, digest)
+
+        # Step 2: projected RtN error, then the same scalar loop as _refine_closed_form
+        with PROFILER.phase("refine"):
+            p = 0.0
+            for start, block in blocks(with_start=True):
+                W_rounded = (block * scale).to(TARGET_FP8_DTYPE).to(COMPUTE_DTYPE)
+                p += (U_k[start:start + block.shape[0]].T @ (W_rounded / scale - block) @ Vh_k.T).item()
+            gain = (U_k.square().sum() * Vh_k.square().sum()).item() / scale.item()
+            final_a = self._closed_form_steps(p, gain, rows * cols)
+
+        # Final hard quantization, tile by tile
+        dequant_scale = scale.reciprocal().reshape(1)
+        for start, block in blocks(with_start=True):
+            W_rounded = (block * scale).to(TARGET_FP8_DTYPE).to(COMPUTE_DTYPE)
+            W_f8 = torch.addr(W_rounded, U_k[start:start + block.shape[0], 0], Vh_k[0], alpha=-final_a).to(TARGET_FP8_DTYPE)
+            write_rows(start, block.cpu(), W_f8.cpu(), (W_f8.to(COMPUTE_DTYPE) * dequant_scale).cpu())
+        del U_k, Vh_k
+        if self.device == 'cuda':
+            torch.cuda.empty_cache()
+        return dequant_scale.cpu()
+
+    def convert_batch(self, W_origs: List[torch.Tensor]) -> List[Tuple[torch.Tensor, torch.Tensor, torch.Tensor]]:
+        """
+        Converts several weight tensors of identical shape at once.
+        Scaling, principal-vector extraction and the refinement loop run on the stacked (B, m, n) tensor with bmm,
+        and each tensor keeps its own learning rate and early-stop state, so it stops exactly where convert() would.
+        Returns the same (fp8 weight, dequant scale, dequantized weight) tuples as convert(), in input order.
+        Seeded converters convert the tensors one by one instead: batched matmuls round differently from
+        single ones, and seeded output must not depend on how tensors were grouped.
+        """
+        if self.principal.seed is not None:
+            results = []
+            stats = []
+            for W in W_origs:
+                results.append(self.convert(W))
+                stats.append(self.last_stats)
+            self.last_stats = stats
+            return results
+        results: List[Tuple[torch.Tensor, torch.Tensor, torch.Tensor]] = [None] * len(W_origs)
+        stats = [None] * len(W_origs)
+        W_float32 = self.workspace.get("W", (len(W_origs), *W_origs[0].shape), self.device)
+        for b, W in enumerate(W_origs):
+            W_float32[b].copy_(W)
+        w_max = W_float32.abs().amax(dim=(1, 2))
+        nonzero = (w_max >= 1e-12).nonzero().flatten().tolist()
+        for b in range(len(W_origs)):
+            if b not in nonzero: # All-zero tensors take the single-tensor shortcut
+                results[b] = self.convert(W_origs[b], None)
+                stats[b] = self.last_stats
+        if not nonzero:
+            self.last_stats = stats
+            return results
+        if len(nonzero) < len(W_origs):
+            W_float32 = W_float32[nonzero]
+            w_max = w_max[nonzero]
+
+        scale = (self.f8_max_val / w_max).view(-1, 1, 1)
+        W_rounded = torch.mul(W_float32, scale, out=self.workspace.get("rounded", W_float32.shape, self.device))
+        W_rounded.copy_(W_rounded.to(TARGET_FP8_DTYPE))
+
+        with PROFILER.phase("pca"):
+            U_k, Vh_k = self.principal.top_vectors(W_float32) # Both engines accept (B, m, n) batches
+
+        with PROFILER.phase("refine"):
+            if self.solver in ("closed_form", "grid"): # A few passes at most, only the setup above benefits from batching
+                refine = self._refine_closed_form if self.solver == "closed_form" else self._refine_grid
+                refined = []
+                batch_stats = []
+                for b in range(len(nonzero)):
+                    result = refine(W_rounded[b], W_float32[b], scale[b, 0, 0], U_k[b], Vh_k[b])
+                    refined.append(result.clone() if self.solver == "grid" else result) # The grid result lives in a work buffer
+                    batch_stats.append(self.last_stats)
+                final_tensor = torch.stack(refined)
+                del refined
+            else:
+                final_tensor = self._refine_dense_batch(W_rounded, W_float32, scale, U_k, Vh_k)
+                batch_stats = self.last_stats
+
+        with torch.no_grad():
+            W_f8 = final_tensor.to(TARGET_FP8_DTYPE)
+        dequant_scale = scale.reciprocal().view(-1)
+        for j, b in enumerate(nonzero):
+            scale_b = dequant_scale[j].reshape(1)
+            results[b] = (W_f8[j].cpu(), scale_b.cpu(), (W_f8[j].to(COMPUTE_DTYPE) * scale_b).cpu())
+            stats[b] = batch_stats[j]
+        self.last_stats = stats
+
+        del W_float32, W_rounded, final_tensor, W_f8, U_k, Vh_k
+        return results
+
+    def _refine_dense_batch(self, W_rounded: torch.Tensor, W_float32: torch.Tensor, scale: torch.Tensor, U_k: torch.Tensor, Vh_k: torch.Tensor) -> torch.Tensor:
+        """
+        _refine_dense over a (B, m, n) stack. Finished tensors are masked out of further updates.
+        """
+        batch = W_rounded.shape[0]
+        W_q_refined = self.workspace.get("current", W_rounded.shape, self.device).copy_(W_rounded)
+        best_tensor = self.workspace.get("best", W_rounded.shape, self.device).copy_(W_rounded)
+        error = self.workspace.get("error", W_rounded.shape, self.device)
+        grad = self.workspace.get("grad", W_rounded.shape, self.device)
+        has_best = torch.zeros(batch, dtype=torch.bool, device=self.device)
+        best_loss = torch.full((batch,), float('inf'), device=self.device)
+        worse_loss_counter = torch.zeros(batch, dtype=torch.long, device=self.device)
+        active = torch.ones(batch, dtype=torch.bool, device=self.device)
+        lr = 4.0
+        curr_lr = torch.full((batch,), lr, device=self.device)
+        iterations = torch.zeros(batch, dtype=torch.long, device=self.device)
+        initial_loss = None
+        U_t = U_k.transpose(1, 2)
+        Vh_t = Vh_k.transpose(1, 2)
+        deadline = None
+        stopped = False
+        pbar = tqdm(range(self.num_iter), desc=f"    Optimizing rounding (batch of {batch})", leave=False, disable=not SHOW_PROGRESS)
+        for i in pbar:
+            self.check_cancelled()
+            if deadline is not None and time.perf_counter() >= deadline:
+                stopped = True
+                break
+            torch.div(W_q_refined, scale, out=error).sub_(W_float32)
+            projected_error = torch.bmm(torch.bmm(U_t, error), Vh_t) # (B, 1, 1)
+            loss = projected_error.view(batch).square()
+            if initial_loss is None:
+                initial_loss = loss.clone()
+                deadline = self._begin_refine(W_rounded.numel(), loss.sum().item())
+            iterations += active
+
+            negligible = active & (loss < 1e-8)
+            active &= ~negligible
+            worse = active & (loss >= best_loss)
+            better = active & ~worse
+
+            worse_loss_counter = torch.where(worse, worse_loss_counter + 1, torch.where(better, 0, worse_loss_counter))
+            curr_lr = torch.where(worse, (curr_lr / 2).clamp(min=1e-8), torch.where(better, (curr_lr * 2).clamp(max=lr), curr_lr))
+            active &= ~(worse & (worse_loss_counter >= self.patience))
+
+            best_loss = torch.where(better, loss, best_loss)
+            for b in better.nonzero().flatten().tolist():
+                best_tensor[b].copy_(W_q_refined[b])
+            has_best |= better
+
+            if not active.any():
+                break
+
+            torch.bmm(torch.bmm(U_k, projected_error), Vh_k, out=grad)
+            W_q_refined.sub_(grad.mul_((curr_lr * active).view(-1, 1, 1)))
+
+            pbar.set_postfix({"active": int(active.sum()), "loss": f"{loss.max().item():.2e}"})
+
+        final_loss = torch.where(has_best, best_loss, loss) if initial_loss is not None else best_loss
+        self.last_stats = [
+            {"iterations": int(iterations[b]), "initial_loss": float(initial_loss[b]) if initial_loss is not None else None, "final_loss": float(final_loss[b])}
+            for b in range(batch)
+        ]
+        if initial_loss is not None:
+            self._end_refine(W_rounded.numel(), stopped, self.last_stats)
+        return torch.where(has_best.view(-1, 1, 1), best_tensor, W_q_refined)
+
+    def _refine_dense(self, W_rounded: torch.Tensor, W_float32: torch.Tensor, scale: torch.Tensor, U_k: torch.Tensor, Vh_k: torch.Tensor) -> torch.Tensor:
+        """
+        Reference optimization loop, working on the full dense tensor every iteration.
+        All full-size tensors are workspace buffers updated in place. The best iterate is kept by swapping
+        the 'best' and 'current' buffers, the next iterate is then written into the old best buffer.
+        """
+        W_q_refined = self.workspace.get("current", W_rounded.shape, self.device).copy_(W_rounded) # Copy, as this tensor will be the one thats iteratively refined
+        spare = self.workspace.get("best", W_rounded.shape, self.device)
+        error = self.workspace.get("error", W_rounded.shape, self.device)
+        grad = self.workspace.get("grad", W_rounded.shape, self.device)
 
         # Step 4: The optimization loop
         best_loss = float('inf')
@@ -70,15 +758,28 @@ class LearnedRoundingConverter:
         worse_loss_counter = 0
         lr = 4.0
         curr_lr = lr
-        pbar = tqdm(range(self.num_iter), desc="    Optimizing rounding", leave=False)
+        stats = {"iterations": 0, "initial_loss": None, "final_loss": None}
+        deadline = None
+        stopped = False
+        pbar = tqdm(range(self.num_iter), desc="    Optimizing rounding", leave=False, disable=not SHOW_PROGRESS)
         for i in pbar:
+            self.check_cancelled()
+            if deadline is not None and time.perf_counter() >= deadline:
+                print(f"Time budget for this tensor used up after {i} iterations, keeping best tensor.")
+                stopped = True
+                break
+            improved = False
 
-            current_dq = W_q_refined / scale
-            error = current_dq - W_float32
+            torch.div(W_q_refined, scale, out=error) # current_dq
+            error.sub_(W_float32)
 
             projected_error = U_k.T @ error @ Vh_k.T
 
             loss = torch.linalg.norm(projected_error)**2
+            stats["iterations"] = i + 1
+            if i == 0:
+                stats["initial_loss"] = loss.item()
+                deadline = self._begin_refine(W_rounded.numel(), stats["initial_loss"])
 
             if loss.abs() < 1e-8:
                 print(f"Loss {loss.item():.9f} is negligible. Stopping at iteration {i}.")
@@ -88,36 +789,181 @@ class LearnedRoundingConverter:
             if loss.abs() >= best_loss:
                 worse_loss_counter += 1
                 curr_lr = max(curr_lr / 2, 1e-8)
-                if worse_loss_counter >= 40: # Reduce LR after 20 worse iterations
+                if worse_loss_counter >= self.patience:
                     print(f"Loss ({best_loss}) has only gotten worse over {worse_loss_counter} iterations, keeping best tensor and skipping...")
                     break
             else:
                 best_loss = loss.abs().item()
-                best_tensor = W_q_refined.clone()
+                if best_tensor is None:
+                    best_tensor = spare
+                best_tensor, W_q_refined = W_q_refined, best_tensor # Keep this iterate, step from it into the other buffer
+                improved = True
                 worse_loss_counter = 0
                 curr_lr = min(curr_lr * 2, lr)
             
-            grad = U_k @ projected_error @ Vh_k
+            torch.matmul(U_k @ projected_error, Vh_k, out=grad)
+            grad.mul_(curr_lr)
 
-            W_q_refined = W_q_refined - curr_lr * grad
+            if improved:
+                torch.sub(best_tensor, grad, out=W_q_refined)
+            else:
+                W_q_refined.sub_(grad)
 
             pbar.set_postfix({"loss": f"{loss.item():.2e}"})
 
-        final_tensor = best_tensor if best_tensor is not None else W_q_refined
+        stats["final_loss"] = best_loss if best_tensor is not None else (loss.item() if stats["iterations"] else None)
+        self.last_stats = stats
+        if stats["iterations"]:
+            self._end_refine(W_rounded.numel(), stopped, stats)
+        return best_tensor if best_tensor is not None else W_q_refined
 
-        # Final Hard Quantization
-        with torch.no_grad():
-            W_f8 = final_tensor.to(TARGET_FP8_DTYPE)
+    def _refine_closed_form(self, W_rounded: torch.Tensor, W_float32: torch.Tensor, scale: torch.Tensor, U_k: torch.Tensor, Vh_k: torch.Tensor) -> torch.Tensor:
+        """
+        Same schedule as _refine_dense, tracked in the rank-1 subspace.
+        Every update is grad = p * U_k @ Vh_k with p the scalar projected error, so after t steps
+        W_q = W_rounded - a_t * U_k @ Vh_k and p evolves as p <- p * (1 - lr * |U_k|^2 |Vh_k|^2 / scale).
+        Each iteration is O(1); the dense tensor is built once at the end.
+        Deviation: the dense loop accumulates float32 rounding in W_q and in the recomputed error each step,
+        this one runs the recurrence in float64. Final FP8 values can therefore only differ for elements
+        sitting within float32 noise of an FP8 rounding boundary.
+        """
+        p = (U_k.T @ (W_rounded / scale - W_float32) @ Vh_k.T).item() # The only O(m*n) pass
+        gain = (U_k.square().sum() * Vh_k.square().sum()).item() / scale.item()
+        final_a = self._closed_form_steps(p, gain, W_rounded.numel())
+        return torch.addr(W_rounded, U_k[:, 0], Vh_k[0], alpha=-final_a)
 
-        # Calculate dequantization scale (reciprocal of the quantization scale)
-        dequant_scale = scale.reciprocal().reshape(1)
-        # Clean up GPU memory
-        del W_float32, W_scaled, W_rounded, W_q_refined, W_dq_rounded, error, U, Vh, U_k, Vh_k
-        gc.collect()
-        if self.device == 'cuda':
-            torch.cuda.empty_cache()
+    def _refine_grid(self, W_rounded: torch.Tensor, W_float32: torch.Tensor, scale: torch.Tensor, U_k: torch.Tensor, Vh_k: torch.Tensor) -> torch.Tensor:
+        """
+        Optimizes the rounding on the FP8 grid itself instead of in continuous space.
+        Each scaled element has two candidates, its RtN value and the FP8 neighbour on the other side of it
+        (code +-1 on the uint8 view, see fp8_other_neighbour). Flipping element ij changes the projected error
+        p = U_k^T E Vh_k^T by c_ij = (alt_ij - rtn_ij) * u_i * v_j / scale and the squared element error by cost_ij.
+        Every pass sorts the flips (or un-flips) that move p towards 0 without overshooting by cost per unit of
+        |c|, and takes the prefix whose sum lands closest to -p. p is then recomputed exactly from the tensor.
+        At most min(num_iter, GRID_PASSES) passes, usually one or two. Unlike the continuous loops, the reported
+        loss is that of the final FP8 tensor.
+        """
+        W_scaled = torch.mul(W_float32, scale, out=self.workspace.get("error", W_rounded.shape, self.device))
+        alt = fp8_other_neighbour(W_rounded, W_scaled, out=self.workspace.get("best", W_rounded.shape, self.device))
+        delta = alt.sub_(W_rounded) # alt - rtn, 0 where W_scaled is already on the grid
+        # Extra squared error from taking alt: (alt - w)^2 - (rtn - w)^2 = delta * (delta + 2 * (rtn - w))
+        cost = torch.sub(W_rounded, W_scaled, out=W_scaled).mul_(2).add_(delta).mul_(delta)
+        contrib = torch.outer(U_k[:, 0], Vh_k[0], out=self.workspace.get("grad", W_rounded.shape, self.device)).mul_(delta).div_(scale)
+        W_q = self.workspace.get("current", W_rounded.shape, self.device).copy_(W_rounded)
+        flipped = torch.zeros(W_rounded.shape, dtype=torch.bool, device=self.device)
 
-        return W_f8.cpu(), dequant_scale.cpu(), (W_f8.to(COMPUTE_DTYPE) * dequant_scale).cpu()
+        def projected() -> float:
+            return (U_k.T @ (W_q / scale - W_float32) @ Vh_k.T).item()
+
+        def toggle(chosen: torch.Tensor):
+            flipped.view(-1)[chosen] ^= True
+            W_q.view(-1)[chosen] = W_rounded.reshape(-1)[chosen] + delta.view(-1)[chosen] * flipped.view(-1)[chosen]
+
+        p = projected()
+        stats = {"iterations": 0, "initial_loss": p * p, "final_loss": p * p}
+        deadline = self._begin_refine(W_rounded.numel(), p * p)
+        stopped = False
+        for i in range(min(self.num_iter, self.GRID_PASSES)):
+            self.check_cancelled()
+            if deadline is not None and i > 0 and time.perf_counter() >= deadline:
+                stopped = True
+                break
+            if p * p < 1e-8:
+                break
+            stats["iterations"] = i + 1
+            # Toggling a flipped element undoes its contribution and its cost
+            change = torch.where(flipped, -contrib, contrib).view(-1)
+            gain = -change * math.copysign(1.0, p) # How much |p| shrinks
+            candidates = ((gain > 0) & (gain <= 2 * abs(p))).nonzero().squeeze(1) # Flat indices; larger moves would overshoot past -p
+            if candidates.numel() == 0:
+                break
+            gain = gain[candidates]
+            ratio = torch.where(flipped.view(-1)[candidates], -cost.view(-1)[candidates], cost.view(-1)[candidates]) / gain
+            order = torch.argsort(ratio)
+            reached = torch.cumsum(gain[order].double(), 0)
+            k = int(torch.searchsorted(reached, torch.tensor([abs(p)], dtype=reached.dtype, device=reached.device))[0])
+            if k < reached.numel() and (k == 0 or reached[k].item() - abs(p) < abs(p) - reached[k - 1].item()):
+                k += 1 # Overshooting by less than stopping short
+            if k == 0:
+                break
+            chosen = candidates[order[:k]]
+            toggle(chosen)
+            p_next = projected()
+            if p_next * p_next >= p * p: # Float noise only; undo and stop
+                toggle(chosen)
+                break
+            p = p_next
+            del change, gain, candidates, ratio, order, reached, chosen
+
+        stats["final_loss"] = p * p
+        self.last_stats = stats
+        self._end_refine(W_rounded.numel(), stopped, stats)
+        return W_q
+
+    def _closed_form_steps(self, p: float, gain: float, numel: int) -> float:
+        """The scalar loop of _refine_closed_form. Returns the step a to apply along U_k @ Vh_k."""
+        best_loss = float('inf')
+        best_a = None
+        a = 0.0 # Accumulated step along U_k @ Vh_k
+        worse_loss_counter = 0
+        lr = 4.0
+        curr_lr = lr
+        stats = {"iterations": 0, "initial_loss": p * p, "final_loss": p * p}
+        deadline = self._begin_refine(numel, p * p)
+        stopped = False
+        pbar = tqdm(range(self.num_iter), desc="    Optimizing rounding (closed-form)", leave=False, disable=not SHOW_PROGRESS)
+        for i in pbar:
+            self.check_cancelled()
+            if deadline is not None and i > 0 and time.perf_counter() >= deadline:
+                stopped = True
+                break
+            loss = p * p
+            stats["iterations"] = i + 1
+
+            if loss < 1e-8:
+                print(f"Loss {loss:.9f} is negligible. Stopping at iteration {i}.")
+                break
+
+            if loss >= best_loss:
+                worse_loss_counter += 1
+                curr_lr = max(curr_lr / 2, 1e-8)
+                if worse_loss_counter >= self.patience:
+                    print(f"Loss ({best_loss}) has only gotten worse over {worse_loss_counter} iterations, keeping best tensor and skipping...")
+                    break
+            else:
+                best_loss = loss
+                best_a = a
+                worse_loss_counter = 0
+                curr_lr = min(curr_lr * 2, lr)
+
+            step = curr_lr * p
+            a += step
+            p -= step * gain
+
+            pbar.set_postfix({"loss": f"{loss:.2e}"})
+
+        final_a = best_a if best_a is not None else a
+        stats["final_loss"] = best_loss if best_a is not None else loss if stats["iterations"] else p * p
+        self.last_stats = stats
+        self._end_refine(numel, stopped, stats)
+        return final_a
+
+def fp8_other_neighbour(W_rounded: torch.Tensor, W_scaled: torch.Tensor, out: Optional[torch.Tensor] = None) -> torch.Tensor:
+    """
+    For scaled values W_scaled and their RtN values W_rounded (float32, on the TARGET_FP8_DTYPE grid), returns
+    the grid value on the other side of W_scaled, so W_scaled lies between the two. The lookup steps the
+    sign-magnitude code by one on the uint8 view: away from zero (+1) or towards it (-1), and from +-0 to the
+    smallest subnormal of the needed sign. Elements already on the grid get their own value back.
+    """
+    codes = W_rounded.to(TARGET_FP8_DTYPE).view(torch.uint8).to(torch.int16)
+    magnitude = codes & 0x7F
+    direction = torch.sign(W_scaled - W_rounded)
+    sign = torch.where(magnitude == 0, direction, 1.0 - 2.0 * (codes >= 0x80)) # Zero steps towards W_scaled
+    magnitude = torch.where(direction * sign > 0, magnitude + 1, magnitude - 1).clamp_(0, 0x7E) # 0x7F is NaN in e4m3fn
+    neighbour = (magnitude | (sign < 0).to(torch.int16) * 0x80).to(torch.uint8).view(TARGET_FP8_DTYPE)
+    if out is None:
+        out = torch.empty_like(W_rounded)
+    return out.copy_(torch.where(direction == 0, W_rounded, neighbour.to(W_rounded.dtype)))
 
 def get_fp8_constants(fp8_dtype: torch.dtype) -> Tuple[float, float, float]:
     """Gets the min, max, and smallest positive normal value for a given FP8 dtype."""
@@ -127,9 +973,751 @@ def get_fp8_constants(fp8_dtype: torch.dtype) -> Tuple[float, float, float]:
 # Global FP8 constants
 FP8_MIN, FP8_MAX, FP8_MIN_POS = get_fp8_constants(TARGET_FP8_DTYPE)
 
-def convert_to_fp8_scaled(input_file: str, output_file: str, t5xxl: bool, keep_distillation: bool, calib_samples: int, **converter_kwargs):
+def read_safetensors_header(path: str) -> Tuple[Dict[str, dict], int]:
+    """Reads only the JSON header of a safetensors file. Returns (tensor entries, byte offset of the data section)."""
+    with open(path, "rb") as fh:
+        header_len = struct.unpack("<Q", fh.read(8))[0]
+        header = json.loads(fh.read(header_len))
+    header.pop("__metadata__", None)
+    return header, 8 + header_len
+
+def weight_action(key: str, shape: Tuple[int, ...], t5xxl: bool, keep_distillation: bool) -> str:
+    """
+    Decides what happens to a '.weight' tensor:
+    'remove' (dropped), 'keep' (copied as is), 'keep_scaled' (copied with a unit scale_weight),
+    'cast' (empty or non-2D, stored as plain FP8 with a unit scale_weight) or 'quantize'.
+    """
+    if t5xxl and any(avoid_name in key for avoid_name in T5XXL_REMOVE_KEY_NAMES):
+        return "remove"
+    if keep_distillation and any(avoid_name in key for avoid_name in DISTILL_LAYER_KEYNAMES):
+        return "keep_scaled"
+    if t5xxl and any(avoid_name in key for avoid_name in AVOID_KEY_NAMES):
+        return "keep"
+    numel = 1
+    for dim in shape:
+        numel *= dim
+    if numel == 0 or len(shape) != 2:
+        return "cast"
+    return "quantize"
+
+def plan_output_specs(header: Dict[str, dict], t5xxl: bool, keep_distillation: bool, marker: bool = True) -> Dict[str, Tuple[str, Tuple[int, ...]]]:
+    """
+    Works out the (safetensors dtype, shape) of every tensor convert_to_fp8_scaled will write,
+    from the input header alone. marker=False leaves out the 'scaled_fp8' marker tensor (all shards but the first).
+    """
+    fp8_name = TORCH_TO_SAFETENSORS_DTYPE[TARGET_FP8_DTYPE]
+    scale_name = TORCH_TO_SAFETENSORS_DTYPE[SCALE_DTYPE]
+    specs: Dict[str, Tuple[str, Tuple[int, ...]]] = {}
+    for key, info in header.items():
+        if t5xxl and any(avoid_name in key for avoid_name in T5XXL_REMOVE_KEY_NAMES):
+            continue
+        shape = tuple(info["shape"])
+        specs[key] = (info["dtype"], shape)
+        if not key.endswith('.weight'):
+            continue
+        action = weight_action(key, shape, t5xxl, keep_distillation)
+        base_name = key[:-len('.weight')]
+        if action in ("cast", "quantize"):
+            specs[key] = (fp8_name, shape)
+        if action != "keep":
+            specs[f"{base_name}.scale_weight"] = (scale_name, (1,))
+        if action == "quantize" and t5xxl:
+            specs[f"{base_name}.scale_input"] = (scale_name, (1,))
+    if marker:
+        specs["scaled_fp8"] = (fp8_name, (0,) if t5xxl else (2,))
+    return specs
+
+def tensor_nbytes(dtype_name: str, shape) -> int:
+    nbytes = SAFETENSORS_DTYPE_SIZES[dtype_name]
+    for dim in shape:
+        nbytes *= dim
+    return nbytes
+
+def is_tiled(shape, tile_size: Optional[int]) -> bool:
+    """Whether a quantized weight of this shape is converted in row tiles (its float32 copy is larger than tile_size bytes)."""
+    return bool(tile_size) and len(shape) == 2 and math.prod(shape) * 4 > tile_size
+
+def tiled_read_passes() -> int:
+    """
+    Reads of a tiled weight from disk in the worst case (no warm start, power iteration never converges):
+    absmax, start vector, TILED_MAX_ITER power iterations, U_k, projected error and final quantization.
+    """
+    return PrincipalVectorEngine.TILED_MAX_ITER + 5
+
+def mapped_row_reader(mapped, offset: int, dtype_name: str, shape: Tuple[int, int]):
+    """Returns read_rows(start, end): rows [start, end) of the 2-D tensor at byte offset in a private memory map, as float32."""
+    rows, cols = shape
+    row_bytes = tensor_nbytes(dtype_name, (cols,))
+    torch_dtype = SAFETENSORS_TO_TORCH_DTYPE[dtype_name]
+    def read_rows(start: int, end: int) -> torch.Tensor:
+        block = torch.frombuffer(mapped, dtype=torch_dtype, count=(end - start) * cols, offset=offset + start * row_bytes)
+        return block.reshape(end - start, cols).to(COMPUTE_DTYPE, copy=True)
+    return read_rows
+
+def _tensor_buffer(tensor: torch.Tensor) -> Tuple[torch.Tensor, memoryview]:
+    """Returns a contiguous CPU tensor and a zero-copy byte view of its storage (keep the tensor alive while using the view)."""
+    tensor = tensor.detach().cpu().contiguous()
+    nbytes = tensor.numel() * tensor.element_size()
+    if nbytes == 0:
+        return tensor, memoryview(b"")
+    return tensor, memoryview((ctypes.c_ubyte * nbytes).from_address(tensor.data_ptr()))
+
+def tensor_digest(fh, data_start: int, info: dict, digest=None):
+    """Feeds the raw bytes of one tensor (plus its dtype and shape) from an open safetensors file into a hash."""
+    digest = digest if digest is not None else hashlib.sha256()
+    digest.update(f"{info['dtype']}{info['shape']}".encode("utf-8"))
+    start, end = info["data_offsets"]
+    fh.seek(data_start + start)
+    remaining = end - start
+    while remaining > 0:
+        chunk = fh.read(min(remaining, 16 * 1024 * 1024))
+        if not chunk:
+            raise EOFError("Unexpected end of safetensors data.")
+        digest.update(chunk)
+        remaining -= len(chunk)
+    return digest
+
+def weight_input_digest(fh, data_start: int, header: Dict[str, dict], key: str) -> str:
+    """Hash of everything the conversion of a weight depends on in the input: the weight and its bias, if any."""
+    digest = tensor_digest(fh, data_start, header[key])
+    bias_key = f"{key[:-len('.weight')]}.bias"
+    if bias_key in header:
+        bias_info = header[bias_key]
+        if "source" in bias_info: # Bias stored in another shard, see convert_sharded
+            with open(bias_info["source"], "rb") as bias_fh:
+                tensor_digest(bias_fh, bias_info["source_data_start"], bias_info, digest)
+        else:
+            tensor_digest(fh, data_start, bias_info, digest)
+    return digest.hexdigest()
+
+def find_reusable_weights(input_file: str, keys: List[str], base_source: str, base_converted: str, t5xxl: bool) -> List[str]:
+    """
+    Returns the weights in keys whose input bytes (weight and bias) are identical in base_source,
+    and whose converted outputs are all present in base_converted with the expected dtypes and shapes.
+    """
+    header, data_start = read_safetensors_header(input_file)
+    base_header, base_data_start = read_safetensors_header(base_source)
+    converted_header, _ = read_safetensors_header(base_converted)
+    fp8_name = TORCH_TO_SAFETENSORS_DTYPE[TARGET_FP8_DTYPE]
+    scale_name = TORCH_TO_SAFETENSORS_DTYPE[SCALE_DTYPE]
+    reusable = []
+    with open(input_file, "rb") as fh, open(base_source, "rb") as base_fh:
+        for key in tqdm(keys, desc="Comparing against base model", leave=False, disable=not SHOW_PROGRESS):
+            base_name = key[:-len('.weight')]
+            bias_key = f"{base_name}.bias"
+            expected = {key: (fp8_name, header[key]["shape"]), f"{base_name}.scale_weight": (scale_name, [1])}
+            if bias_key in header:
+                expected[bias_key] = (header[bias_key]["dtype"], header[bias_key]["shape"])
+            if t5xxl:
+                expected[f"{base_name}.scale_input"] = (scale_name, [1])
+            if any(k not in converted_header or (converted_header[k]["dtype"], converted_header[k]["shape"]) != v for k, v in expected.items()):
+                continue
+            if key not in base_header or (bias_key in header) != (bias_key in base_header):
+                continue
+            if weight_input_digest(fh, data_start, header, key) == weight_input_digest(base_fh, base_data_start, base_header, key):
+                reusable.append(key)
+    return reusable
+
+class ConversionJournal:
+    """
+    On-disk record of finished tensors, kept next to the output file so an interrupted conversion can resume.
+    Every finished weight gets a small safetensors file with all of its outputs (FP8 weight, scale_weight,
+    corrected bias, scale_input) and a line in entries.jsonl with its key and input hash.
+    The journal is discarded when the settings change, and an entry is only reused when the
+    input weight (and bias) still hash to the recorded value.
+    """
+    def __init__(self, output_file: str, settings: dict):
+        self.path = f"{output_file}.journal"
+        self.settings = json.loads(json.dumps(settings))
+        self.entries: Dict[str, dict] = {}
+        manifest_path = os.path.join(self.path, "journal.json")
+        if os.path.isdir(self.path):
+            try:
+                with open(manifest_path, "r", encoding="utf-8") as fh:
+                    manifest = json.load(fh)
+            except (OSError, ValueError):
+                manifest = None
+            if manifest is None or manifest.get("settings") != self.settings:
+                print(f"Discarding journal {self.path}: it was written with different settings.")
+                shutil.rmtree(self.path)
+            else:
+                self._read_entries()
+        os.makedirs(self.path, exist_ok=True)
+        if not os.path.exists(manifest_path):
+            with open(manifest_path, "w", encoding="utf-8") as fh:
+                json.dump({"settings": self.settings}, fh, indent=2)
+
+    def _read_entries(self):
+        try:
+            with open(os.path.join(self.path, "entries.jsonl"), "r", encoding="utf-8") as fh:
+                for line in fh:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError: # Torn last line from an interrupted write
+                        continue
+                    if os.path.exists(os.path.join(self.path, entry["file"])):
+                        self.entries[entry["key"]] = entry
+        except OSError:
+            pass
+
+    def has(self, key: str, input_hash: str) -> bool:
+        entry = self.entries.get(key)
+        return entry is not None and entry["hash"] == input_hash
+
+    def load(self, key: str) -> Dict[str, torch.Tensor]:
+        return load_file(os.path.join(self.path, self.entries[key]["file"]))
+
+    def record(self, key: str, input_hash: str, tensors: Dict[str, torch.Tensor]):
+        file_name = f"{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}.safetensors"
+        tmp_path = os.path.join(self.path, file_name + ".tmp")
+        save_file({k: v.contiguous() for k, v in tensors.items()}, tmp_path)
+        with open(tmp_path, "rb+") as fh:
+            os.fsync(fh.fileno())
+        os.replace(tmp_path, os.path.join(self.path, file_name))
+        entry = {"key": key, "hash": input_hash, "file": file_name}
+        with open(os.path.join(self.path, "entries.jsonl"), "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(entry) + "\n")
+            fh.flush()
+            os.fsync(fh.fileno())
+        self.entries[key] = entry
+
+    def remove(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+class SafetensorsStreamWriter:
+    """
+    Writes a safetensors file one tensor at a time.
+    The header is computed up front from the (dtype, shape) of every output tensor, laid out the same
+    way as safetensors' save_file, so the finished file is byte-identical to save_file on the same tensors.
+    Tensors can be written in any order; each one goes straight into its slot.
+    Everything goes to '<path>.tmp', which close() moves to path once every tensor is written and abort()
+    deletes, so a cancelled or failed run never leaves a zero-filled model at the output path.
+    backend 'mmap' preallocates the file and maps it, so a tensor's bytes are copied once into the page cache;
+    'file' writes each slot with seek + write.
+    """
+    def __init__(self, path: str, specs: Dict[str, Tuple[str, Tuple[int, ...]]], backend: str = "mmap"):
+        self.path = path
+        self.specs = specs
+        self.backend = backend
+        # Same ordering as save_file: larger dtypes first, then by name.
+        order = sorted(specs, key=lambda k: (-SAFETENSORS_DTYPE_ORDER.index(specs[k][0]), k))
+        header = {}
+        self.offsets: Dict[str, Tuple[int, int]] = {}
+        offset = 0
+        for key in order:
+            dtype_name, shape = specs[key]
+            nbytes = tensor_nbytes(dtype_name, shape)
+            header[key] = {"dtype": dtype_name, "shape": list(shape), "data_offsets": [offset, offset + nbytes]}
+            self.offsets[key] = (offset, offset + nbytes)
+            offset += nbytes
+        header_bytes = json.dumps(header, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        header_bytes += b" " * ((8 - len(header_bytes) % 8) % 8)
+        self.data_start = 8 + len(header_bytes)
+        self.total_size = self.data_start + offset
+        self.pending = set(order)
+        self.partial: Dict[str, int] = {} # Bytes written so far of tensors written in row blocks
+
+        self.temp_path = f"{path}.tmp"
+        self.file = open(self.temp_path, "w+b")
+        self.file.write(struct.pack("<Q", len(header_bytes)))
+        self.file.write(header_bytes)
+        self.file.truncate(self.total_size)
+        self.map = None
+        if backend == "mmap":
+            self.file.flush()
+            self.map = mmap.mmap(self.file.fileno(), self.total_size)
+
+    def write(self, key: str, tensor: torch.Tensor):
+        if key not in self.specs:
+            raise KeyError(f"Tensor '{key}' is not part of the planned output header.")
+        dtype_name, shape = self.specs[key]
+        if TORCH_TO_SAFETENSORS_DTYPE.get(tensor.dtype) != dtype_name or tuple(tensor.shape) != shape:
+            raise ValueError(f"Tensor '{key}' is {tensor.dtype} {tuple(tensor.shape)}, planned {dtype_name} {shape}.")
+        start, end = self.offsets[key]
+        tensor, buffer = _tensor_buffer(tensor)
+        if self.map is not None:
+            self.map[self.data_start + start:self.data_start + end] = buffer
+        else:
+            self.file.seek(self.data_start + start)
+            self.file.write(buffer)
+        self.pending.discard(key)
+
+    def write_rows(self, key: str, start_row: int, tensor: torch.Tensor):
+        """Writes rows [start_row, start_row + len(tensor)) of a 2D tensor; the tensor counts as written once all its bytes are."""
+        dtype_name, shape = self.specs[key]
+        if TORCH_TO_SAFETENSORS_DTYPE.get(tensor.dtype) != dtype_name or tuple(tensor.shape[1:]) != shape[1:] or start_row + tensor.shape[0] > shape[0]:
+            raise ValueError(f"Rows {start_row}+{tuple(tensor.shape)} {tensor.dtype} do not fit tensor '{key}', planned {dtype_name} {shape}.")
+        start, end = self.offsets[key]
+        row_bytes = (end - start) // shape[0] if shape[0] else 0
+        tensor, buffer = _tensor_buffer(tensor)
+        dst = self.data_start + start + start_row * row_bytes
+        if self.map is not None:
+            self.map[dst:dst + len(buffer)] = buffer
+        else:
+            self.file.seek(dst)
+            self.file.write(buffer)
+        self.partial[key] = self.partial.get(key, 0) + len(buffer)
+        if self.partial[key] >= end - start:
+            self.pending.discard(key)
+
+    def read(self, key: str) -> torch.Tensor:
+        """Reads a written tensor back from the output (e.g. one that was written in row blocks)."""
+        dtype_name, shape = self.specs[key]
+        start, end = self.offsets[key]
+        if self.map is not None:
+            data = bytearray(self.map[self.data_start + start:self.data_start + end])
+        else:
+            self.file.flush()
+            self.file.seek(self.data_start + start)
+            data = bytearray(self.file.read(end - start))
+        torch_dtype = SAFETENSORS_TO_TORCH_DTYPE[dtype_name]
+        if not data:
+            return torch.empty(shape, dtype=torch_dtype)
+        return torch.frombuffer(data, dtype=torch_dtype).reshape(shape)
+
+    def copy_raw(self, key: str, src, src_offset: int, src_spec: Tuple[str, Tuple[int, ...]]):
+        """
+        Copies a tensor's bytes straight from src (a binary file opened for reading, at absolute offset src_offset)
+        into its slot, without building a torch tensor. src_spec is its (dtype, shape) in the source file.
+        Uses copy_file_range where the OS has it, otherwise reads directly into the map or a bounded buffer.
+        """
+        if self.specs.get(key) != (src_spec[0], tuple(src_spec[1])):
+            raise ValueError(f"Tensor '{key}' is {src_spec[0]} {tuple(src_spec[1])} in the input, planned {self.specs.get(key)}.")
+        start, end = self.offsets[key]
+        dst, remaining = self.data_start + start, end - start
+        if self.map is not None:
+            src.seek(src_offset)
+            view = memoryview(self.map)[dst:dst + remaining]
+            while remaining > 0:
+                count = src.readinto(view[len(view) - remaining:])
+                if not count:
+                    raise EOFError(f"Input ended while copying tensor '{key}'.")
+                remaining -= count
+            view.release()
+        else:
+            self.file.flush()
+            if hasattr(os, "copy_file_range"):
+                try:
+                    while remaining > 0:
+                        count = os.copy_file_range(src.fileno(), self.file.fileno(), remaining, src_offset, dst)
+                        if count == 0:
+                            raise EOFError(f"Input ended while copying tensor '{key}'.")
+                        src_offset, dst, remaining = src_offset + count, dst + count, remaining - count
+                except OSError: # e.g. unsupported between these file systems, fall back to plain copies
+                    pass
+            src.seek(src_offset)
+            self.file.seek(dst)
+            while remaining > 0:
+                chunk = src.read(min(remaining, 16 * 1024 * 1024))
+                if not chunk:
+                    raise EOFError(f"Input ended while copying tensor '{key}'.")
+                self.file.write(chunk)
+                remaining -= len(chunk)
+        self.pending.discard(key)
+
+    def _close_file(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        self.file.close()
+
+    def abort(self):
+        """Closes and deletes the partial output (cancelled or failed runs). Safe to call more than once."""
+        self._close_file()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+    def close(self):
+        """Finishes the file and moves it to its final path; fails, deleting it, if a planned tensor was never written."""
+        if self.pending:
+            self.abort()
+            raise RuntimeError(f"{len(self.pending)} planned tensors were never written, e.g. '{sorted(self.pending)[0]}'.")
+        try:
+            if self.map is not None:
+                self.map.flush()
+            self._close_file()
+            os.replace(self.temp_path, self.path)
+        except BaseException:
+            self.abort()
+            raise
+
+class CalibrationStats:
+    """
+    Per-dimension statistics of the inputs to a linear layer, used for bias correction.
+    The correction is mean_n(X_n @ E.T) = E @ mean(X) for weight error E, so only the mean input vector
+    matters: O(out*in) per layer and no (samples x in_features) calibration matrix.
+    """
+    def __init__(self, mean: torch.Tensor, num_samples: int):
+        self.mean = mean
+        self.num_samples = num_samples
+
+    @classmethod
+    def from_samples(cls, X: torch.Tensor) -> "CalibrationStats":
+        """Statistics of real calibration inputs, (samples, in_features)."""
+        return cls(X.to(COMPUTE_DTYPE).mean(dim=0), X.shape[0])
+
+    @classmethod
+    def random(cls, in_features: int, num_samples: int, seed: Optional[int] = None) -> "CalibrationStats":
+        """
+        Statistics of num_samples standard normal inputs, the previous random calibration data.
+        Their mean is itself normal with variance 1/num_samples per dimension, so it is drawn directly.
+        With seed, the draw only depends on the seed and in_features.
+        """
+        generator = torch.Generator().manual_seed(derive_seed(seed, f"calibration:{in_features}")) if seed is not None else None
+        return cls(torch.randn(in_features, dtype=COMPUTE_DTYPE, generator=generator) / math.sqrt(num_samples), num_samples)
+
+    def bias_correction(self, weight_error: torch.Tensor) -> torch.Tensor:
+        return weight_error @ self.mean.to(weight_error.device, dtype=weight_error.dtype)
+
+class ConversionCaches:
+    """
+    Calibration statistics and principal vector results shared by several conversions in one process
+    (batch mode, the GUI worker). Jobs only share entries made with the same settings: calibration
+    statistics are keyed by calib_samples and seed and then in_features, principal vectors by all the
+    engine's settings. Each job keeps its own engine (warm starts, timings), only the result cache is shared.
+    """
+    ENGINE_CACHE_SIZE = 1024 # Principal vectors kept for each engine setting
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calibration: Dict[Tuple[int, Optional[int]], Dict[int, CalibrationStats]] = {}
+        self.principal: Dict[tuple, Tuple["OrderedDict[str, Tuple[torch.Tensor, torch.Tensor]]", threading.Lock]] = {}
+
+    def calibration_for(self, calib_samples: int, seed: Optional[int] = None) -> Dict[int, CalibrationStats]:
+        with self.lock:
+            return self.calibration.setdefault((calib_samples, seed), {})
+
+    def engine_for(self, engine: PrincipalVectorEngine) -> PrincipalVectorEngine:
+        """
+        Returns engine with its result cache (and the lock guarding it) replaced by the one shared by all
+        engines with its settings, so the jobs after the first reuse their vectors.
+        """
+        settings = (engine.method, engine.tol, engine.max_iter, engine.profile, engine.seed)
+        with self.lock:
+            engine.cache, engine.lock = self.principal.setdefault(settings, (OrderedDict(), threading.Lock()))
+        engine.cache_size = max(engine.cache_size, self.ENGINE_CACHE_SIZE)
+        return engine
+
+    def cached_vectors(self) -> int:
+        with self.lock:
+            return sum(len(cache) for cache, _ in self.principal.values())
+
+def correct_bias(bias_key: str, original_bias: torch.Tensor, original_tensor: torch.Tensor, dequantized_weight_tensor: torch.Tensor, calibration: CalibrationStats) -> torch.Tensor:
+    """
+    Shifts a bias by the mean output error the quantized weight causes on the calibration inputs.
+    """
+    print(f"  - Found and adjusting corresponding bias: {bias_key}")
+    with torch.no_grad(), PROFILER.phase("bias_correction"):
+        device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        # Move tensors to the compute device
+        W_orig_dev = original_tensor.to(device, dtype=COMPUTE_DTYPE)
+        W_dequant_dev = dequantized_weight_tensor.to(device, dtype=COMPUTE_DTYPE)
+
+        # Calculate weight error
+        weight_error = W_orig_dev - W_dequant_dev
+        
+        # Mean output error over the calibration inputs: (C_out, C_in) @ mean(X) (C_in)
+        bias_correction = calibration.bias_correction(weight_error)
+        
+        # Apply the correction to the original bias
+        new_bias = shift_bias(original_bias, bias_correction)
+        
+        # Clean up GPU memory
+        del W_orig_dev, W_dequant_dev, weight_error, bias_correction
+        if device == 'cuda':
+            torch.cuda.empty_cache()
+    return new_bias
+
+def shift_bias(original_bias: torch.Tensor, bias_correction: torch.Tensor) -> torch.Tensor:
+    """Subtracts a computed correction (see correct_bias) from a bias and returns it in the bias' dtype, on the CPU."""
+    b_new = original_bias.to(bias_correction.device, dtype=COMPUTE_DTYPE) - bias_correction
+    
+    # Converting back to original dtype and CPU
+    new_bias = b_new.cpu().to(original_bias.dtype)
+    
+    print(f"  - Original bias mean: {original_bias.mean().item():.6f}")
+    print(f"  - New bias mean     : {new_bias.mean().item():.6f}")
+    return new_bias
+
+# State of a pool worker process, filled in by _pool_worker_init.
+_WORKER_STATE = {}
+
+def _pool_worker_init(input_file: str, calibration_data_cache: Dict[int, CalibrationStats], threads: int, converter_kwargs: dict, extra_inputs: Optional[Dict[str, str]] = None, deterministic: bool = False):
+    global SHOW_PROGRESS
+    SHOW_PROGRESS = False
+    if deterministic:
+        enable_determinism(threads)
+    torch.set_num_threads(threads)
+    with contextlib.redirect_stdout(io.StringIO()):
+        _WORKER_STATE["converter"] = LearnedRoundingConverter(**converter_kwargs)
+    # Weights are read straight from the memory-mapped input instead of being pickled over from the parent.
+    _WORKER_STATE["handle"] = safe_open(input_file, framework="pt", device="cpu")
+    _WORKER_STATE["calibration"] = calibration_data_cache
+    _WORKER_STATE["extra_inputs"] = extra_inputs or {}
+
+def _pool_tensor(key: str) -> torch.Tensor:
+    path = _WORKER_STATE["extra_inputs"].get(key)
+    if path is None:
+        return _WORKER_STATE["handle"].get_tensor(key)
+    with safe_open(path, framework="pt", device="cpu") as f:
+        return f.get_tensor(key)
+
+def _pool_convert(key: str, bias_key: Optional[str]) -> Tuple[torch.Tensor, torch.Tensor, Optional[torch.Tensor], str, dict]:
+    handle = _WORKER_STATE["handle"]
+    log = io.StringIO()
+    PROFILER.reset()
+    with contextlib.redirect_stdout(log):
+        original_tensor = handle.get_tensor(key)
+        calibration_data = _WORKER_STATE["calibration"][original_tensor.shape[1]]
+        quantized_fp8_tensor, dequant_scale, dequantized_weight_tensor = _WORKER_STATE["converter"].convert(original_tensor, calibration_data)
+        new_bias = None
+        if bias_key is not None:
+            new_bias = correct_bias(bias_key, _pool_tensor(bias_key), original_tensor, dequantized_weight_tensor, calibration_data)
+    info = {"stats": _WORKER_STATE["converter"].last_stats, "phases": dict(PROFILER.seconds), "peak_rss_bytes": max_rss()}
+    return quantized_fp8_tensor, dequant_scale, new_bias, log.getvalue(), info
+
+class OrderedConversionPool:
+    """
+    Runs LearnedRoundingConverter.convert (plus bias correction) for a fixed sequence of weights in worker processes.
+    Workers memory-map the input themselves; results come back through torch's shared-memory tensor transport.
+    Only the small calibration statistics are sent to the workers.
+    At most 2 * workers jobs are in flight, and results are handed out strictly in submission order.
+    """
+    def __init__(self, workers: int, input_file: str, jobs: List[Tuple[str, Optional[str]]], calibration_data_cache: Dict[int, CalibrationStats], converter_kwargs: dict, extra_inputs: Optional[Dict[str, str]] = None):
+        deterministic = torch.are_deterministic_algorithms_enabled()
+        if deterministic: # Same thread count as this process, so reductions split the same way (oversubscribes the CPU)
+            threads = torch.get_num_threads()
+        else: # Cap intra-op threads so workers * threads doesn't oversubscribe the machine
+            threads = max(1, (os.cpu_count() or 1) // workers)
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=torch.multiprocessing.get_context("spawn"),
+            initializer=_pool_worker_init,
+            initargs=(input_file, calibration_data_cache, threads, converter_kwargs, extra_inputs, deterministic),
+        )
+        self.window = 2 * workers
+        self.jobs = deque(jobs)
+        self.in_flight = deque()
+        print(f"Started {workers} conversion workers with {threads} thread(s) each.")
+
+    def _fill(self):
+        while self.jobs and len(self.in_flight) < self.window:
+            key, bias_key = self.jobs.popleft()
+            self.in_flight.append((key, self.executor.submit(_pool_convert, key, bias_key)))
+
+    def result(self, key: str) -> Tuple[torch.Tensor, torch.Tensor, Optional[torch.Tensor], str, dict]:
+        self._fill()
+        next_key, future = self.in_flight.popleft()
+        if next_key != key:
+            raise RuntimeError(f"Worker results out of order: expected '{next_key}', asked for '{key}'.")
+        result = future.result()
+        self._fill()
+        return result
+
+    def shutdown(self, wait: bool = True):
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+
+# Default memory for the queues of a ConversionPipeline, in bytes
+PIPELINE_MEMORY = 512 * 1024**2
+
+class ConversionPipeline:
+    """
+    Overlaps I/O with compute in convert_to_fp8_scaled. A prefetch thread reads the tensors the main loop will
+    ask for, in the order given by keys (upcasting the ones in upcast_keys to COMPUTE_DTYPE), and a write-behind
+    thread runs the writes the main loop queues with submit(). Each queue holds at most half of memory_budget
+    bytes, plus one tensor. Keys the loop skips are dropped, keys it asks for out of plan are read directly.
+    stats counts how often, and for how long, the main loop waited for a read or for room in the write queue,
+    and how often the prefetch thread paused at its limit. Both threads record their load and save phases in
+    the PhaseTimes of the thread that created the pipeline, so they show up in the run's profile.
+    """
+    def __init__(self, load, keys: List[str], upcast_keys, memory_budget: int):
+        self.load = load
+        self.keys = keys
+        self.positions = {key: i for i, key in enumerate(keys)}
+        self.upcast_keys = set(upcast_keys)
+        self.budget = max(memory_budget // 2, 1)
+        self.condition = threading.Condition()
+        self.next = 0 # Position of the next key to prefetch
+        self.consumed = 0 # Keys before this position were handed out or skipped
+        self.ready: Dict[str, Tuple[torch.Tensor, int]] = {}
+        self.ready_bytes = 0
+        self.writes = deque()
+        self.write_bytes = 0
+        self.error = None
+        self.closed = False
+        self.stats = {"prefetched": 0, "read_stalls": 0, "read_stall_seconds": 0.0, "prefetch_pauses": 0,
+                      "writes": 0, "write_stalls": 0, "write_stall_seconds": 0.0, "drain_seconds": 0.0}
+        self.phases = PROFILER.state # Both threads record their load/save time into the creating thread's run
+        self.threads = [threading.Thread(target=self._prefetch, daemon=True), threading.Thread(target=self._write_behind, daemon=True)]
+        for thread in self.threads:
+            thread.start()
+
+    def _prefetch(self):
+        PROFILER.attach(self.phases)
+        while True:
+            with self.condition:
+                if not self.closed and self.ready and self.ready_bytes >= self.budget:
+                    self.stats["prefetch_pauses"] += 1
+                while not self.closed and self.ready and self.ready_bytes >= self.budget:
+                    self.condition.wait()
+                self.next = max(self.next, self.consumed)
+                if self.closed or self.next >= len(self.keys):
+                    return
+                position, key = self.next, self.keys[self.next]
+                self.next += 1
+            try:
+                tensor = self.load(key)
+                if key in self.upcast_keys:
+                    tensor = tensor.to(COMPUTE_DTYPE)
+            except BaseException as e:
+                with self.condition:
+                    self.error = e
+                    self.condition.notify_all()
+                return
+            with self.condition:
+                if position >= self.consumed:
+                    nbytes = tensor.numel() * tensor.element_size()
+                    self.ready[key] = (tensor, nbytes)
+                    self.ready_bytes += nbytes
+                    self.stats["prefetched"] += 1
+                    self.condition.notify_all()
+
+    def get(self, key: str) -> torch.Tensor:
+        """Returns the tensor for key, waiting for the prefetch thread if it is part of the plan."""
+        with self.condition:
+            position = self.positions.get(key)
+            if position is None or position < self.consumed:
+                position = None
+            else:
+                for skipped in [k for k in self.ready if self.positions[k] < position]:
+                    self.ready_bytes -= self.ready.pop(skipped)[1]
+                self.consumed = position
+                self.condition.notify_all()
+                if key not in self.ready:
+                    self.stats["read_stalls"] += 1
+                    start = time.perf_counter()
+                    while key not in self.ready and self.error is None:
+                        self.condition.wait()
+                    self.stats["read_stall_seconds"] += time.perf_counter() - start
+                if self.error is not None:
+                    raise self.error
+                tensor, nbytes = self.ready.pop(key)
+                self.ready_bytes -= nbytes
+                self.consumed = position + 1
+                self.condition.notify_all()
+                return tensor
+        tensor = self.load(key)
+        return tensor.to(COMPUTE_DTYPE) if key in self.upcast_keys else tensor
+
+    def submit(self, write, nbytes: int):
+        """Queues write() (a writer call whose tensors must not change afterwards); waits while the queue is full."""
+        with self.condition:
+            if self.writes and self.write_bytes + nbytes > self.budget and self.error is None:
+                self.stats["write_stalls"] += 1
+                start = time.perf_counter()
+                while self.writes and self.write_bytes + nbytes > self.budget and self.error is None:
+                    self.condition.wait()
+                self.stats["write_stall_seconds"] += time.perf_counter() - start
+            if self.error is not None:
+                raise self.error
+            self.writes.append((write, nbytes))
+            self.write_bytes += nbytes
+            self.stats["writes"] += 1
+            self.condition.notify_all()
+
+    def _write_behind(self):
+        PROFILER.attach(self.phases)
+        while True:
+            with self.condition:
+                while not self.writes and not self.closed:
+                    self.condition.wait()
+                if not self.writes:
+                    return
+                write, nbytes = self.writes[0]
+            try:
+                with PROFILER.phase("save"):
+                    write()
+            except BaseException as e:
+                with self.condition:
+                    self.error = e
+                    self.writes.clear()
+                    self.condition.notify_all()
+                return
+            with self.condition:
+                if self.writes and self.writes[0][0] is write: # Not dropped by abort() in the meantime
+                    self.writes.popleft()
+                    self.write_bytes -= nbytes
+                self.condition.notify_all()
+
+    def drain(self):
+        """Waits until every queued write is done."""
+        start = time.perf_counter()
+        with self.condition:
+            while self.writes and self.error is None:
+                self.condition.wait()
+            if self.error is not None:
+                raise self.error
+        self.stats["drain_seconds"] += time.perf_counter() - start
+
+    def close(self):
+        """Finishes the queued writes and stops both threads."""
+        try:
+            self.drain()
+        finally:
+            self.abort()
+
+    def abort(self):
+        """Stops both threads, dropping queued writes (cancelled or failed runs)."""
+        with self.condition:
+            self.closed = True
+            self.writes.clear()
+            self.write_bytes = 0
+            self.ready.clear()
+            self.ready_bytes = 0
+            self.condition.notify_all()
+        for thread in self.threads:
+            thread.join()
+
+    def report(self) -> str:
+        stats = self.stats
+        return (f"{stats['prefetched']} reads prefetched, compute waited {stats['read_stalls']}x for reads ({stats['read_stall_seconds']:.1f}s) "
+                f"and {stats['write_stalls']}x for writes ({stats['write_stall_seconds']:.1f}s), prefetch paused {stats['prefetch_pauses']}x at its memory limit")
+
+def convert_to_fp8_scaled(input_file: str, output_file: str, t5xxl: bool, keep_distillation: bool, calib_samples: int, streaming: bool = False, batch_size: int = 1, workers: int = 1, journal: bool = False, reuse_from: Optional[str] = None, base_source: Optional[str] = None, events: Optional[str] = None, cancel_event=None, caches: Optional[ConversionCaches] = None, writer_backend: str = "mmap", extra_inputs: Optional[Dict[str, str]] = None, drop_keys=(), marker: bool = True, time_budget: Optional[float] = None, cost_model: Optional[str] = None, tile_size: Optional[int] = None, pipeline_memory: int = PIPELINE_MEMORY, memory_budget: Optional[int] = None, workspace_memory: int = WORKSPACE_MEMORY, **converter_kwargs):
     """
     Converts a safetensors file to a version with FP8 scaled weights using learned rounding (modified from AdaRound).
+    Returns a summary dict (counts, total and per-phase time and memory), or None if the conversion failed.
+    Output tensors are written straight into their slots of the preallocated output file as they are produced
+    (see SafetensorsStreamWriter; writer_backend 'mmap' or 'file'), so the output is never held in memory.
+    With streaming=True tensors are also read lazily, so peak host memory is roughly one tensor plus its
+    working set instead of a copy of the model.
+    With batch_size > 1, weights of identical shape are optimized together through LearnedRoundingConverter.convert_batch.
+    With workers > 1, weights are optimized in a process pool (see OrderedConversionPool) and written in key order.
+    With journal=True every finished weight is recorded in a ConversionJournal, and a rerun with the same
+    input and settings restores those weights instead of optimizing them again.
+    With reuse_from (an FP8 file converted from base_source), weights that are byte-identical to base_source
+    are copied from reuse_from instead of being optimized again.
+    With events (a path, 'fd:N' or '-'), one JSON record per tensor and a run summary are written to an EventStream.
+    cancel_event is a threading.Event; once set, the run stops at the next iteration and raises ConversionCancelled
+    (finished tensors stay in the journal, if enabled).
+    With caches (a ConversionCaches), calibration statistics and principal vectors are shared with the other
+    conversions using the same object.
+    With time_budget (seconds), a TimeBudgetScheduler spreads a best-effort wall-clock budget over the refine loops
+    (the other phases are not bounded, so the run can take longer).
+    Per-tensor timings of single-process runs are added to the CostModel at cost_model, which plan_conversion
+    uses for its estimates. Off by default; the CLI and the GUI worker pass DEFAULT_COST_MODEL.
+    With tile_size (bytes), weights whose float32 copy is larger are never loaded whole: they are read in row
+    tiles of about tile_size from the memory-mapped input and converted with LearnedRoundingConverter.convert_tiled,
+    and their results are written tile by tile.
+    With pipeline_memory (bytes, 0 to disable), writes go through the write-behind thread of a ConversionPipeline,
+    and in streaming mode without workers or batches its prefetch thread reads the next tensors during compute.
+    With memory_budget (bytes), a MemoryGovernor adjusts streaming, batch_size, workers, tile_size and
+    pipeline_memory to fit the budget, and weights that do not fit at the measured memory are tiled.
+    workspace_memory (bytes) is how much of the converter's WorkspacePool may stay allocated for shapes other
+    than the current one; the pool is released once at the end of the run.
+    extra_inputs (key -> file), drop_keys and marker are used by convert_sharded to convert one shard:
+    tensors from other files are treated as part of the input, drop_keys are left out of the output, and
+    marker=False omits the 'scaled_fp8' marker tensor.
     """
     print(f"Processing: {input_file}")
     print(f"Output will be saved to: {output_file}")
@@ -137,172 +1725,1240 @@ def convert_to_fp8_scaled(input_file: str, output_file: str, t5xxl: bool, keep_d
     print(f"FP8 Range: [{FP8_MIN}, {FP8_MAX}]")
     print(f"FP8 Min Precision: [{FP8_MIN_POS}]")
 
+    PROFILER.reset()
+    run_start = time.perf_counter()
     tensors: Dict[str, torch.Tensor] = {}
+    handle = None
+    writer = None
+    raw_input = None
     try:
-        with safe_open(input_file, framework="pt", device="cpu") as f:
-            for key in f.keys():
-                tensors[key] = f.get_tensor(key).cpu()
+        with PROFILER.phase("load"):
+            header, data_start = read_safetensors_header(input_file)
+            for key in drop_keys:
+                header.pop(key, None)
+            extra_headers = {}
+            for key, path in (extra_inputs or {}).items():
+                if path not in extra_headers:
+                    extra_headers[path] = read_safetensors_header(path)
+                extra_header, extra_data_start = extra_headers[path]
+                header[key] = dict(extra_header[key], source=path, source_data_start=extra_data_start)
+            shapes = {key: tuple(info["shape"]) for key, info in header.items()}
+            dtype_names = {key: info["dtype"] for key, info in header.items()}
+            governor = None
+            if memory_budget:
+                governor = MemoryGovernor(memory_budget)
+                settings = governor.plan(header, t5xxl, keep_distillation, streaming, batch_size, workers, tile_size, pipeline_memory, workspace_memory)
+                streaming, batch_size, workers = settings["streaming"], settings["batch_size"], settings["workers"]
+                tile_size, pipeline_memory, workspace_memory = settings["tile_size"], settings["pipeline_memory"], settings["workspace_memory"]
+                print(f"Memory governor: {governor.report()}")
+            # Only weights that are converted (and their biases) become torch tensors. Everything else is
+            # copied byte for byte from the input (see store_raw), and removed T5XXL tensors are never read.
+            # Tiled weights are read in row blocks from a memory map (see tile_reader). With workers, the pool's
+            # processes read the weights they optimize and their biases themselves, so this process never loads them.
+            tensor_keys = set()
+            tiled_keys = set()
+            for key, shape in shapes.items():
+                if key.endswith('.weight') and weight_action(key, shape, t5xxl, keep_distillation) in ("quantize", "cast"):
+                    if weight_action(key, shape, t5xxl, keep_distillation) == "quantize" and is_tiled(shape, tile_size):
+                        tiled_keys.add(key)
+                    elif weight_action(key, shape, t5xxl, keep_distillation) == "quantize" and workers > 1:
+                        continue
+                    else:
+                        tensor_keys.add(key)
+                    if f"{key[:-len('.weight')]}.bias" in shapes:
+                        tensor_keys.add(f"{key[:-len('.weight')]}.bias")
+            raw_input = open(input_file, "rb")
+            def read_extra(key: str) -> torch.Tensor:
+                with safe_open(header[key]["source"], framework="pt", device="cpu") as f:
+                    return f.get_tensor(key)
+            if streaming:
+                handle = safe_open(input_file, framework="pt", device="cpu")
+            else:
+                with safe_open(input_file, framework="pt", device="cpu") as f:
+                    for key in sorted(tensor_keys):
+                        tensors[key] = read_extra(key) if "source" in header[key] else f.get_tensor(key).cpu()
+        if streaming:
+            def get_tensor(key: str) -> torch.Tensor:
+                with PROFILER.phase("load"):
+                    return read_extra(key) if "source" in header[key] else handle.get_tensor(key)
+        else:
+            get_tensor = tensors.__getitem__
+    except MemoryBudgetError as e:
+        print(f"Error: {e}")
+        return
     except Exception as e:
         print(f"Error loading '{input_file}': {e}")
+        if raw_input is not None:
+            raw_input.close()
         return
 
-    # Instantiate the converter with hyperparameters from command line
-    converter = LearnedRoundingConverter(**converter_kwargs)
-
-    # Pre-generate calibration data for each unique input dimension to be more efficient
-    print("\nScanning model for linear layer dimensions...")
-    calibration_data_cache = {}
-    for key, tensor in tensors.items():
-        if key.endswith('.weight') and tensor.ndim == 2:
-            in_features = tensor.shape[1]
-            if in_features not in calibration_data_cache:
-                print(f"  - Found new in_features dimension: {in_features}. Generating calibration data.")
-                calibration_data_cache[in_features] = torch.randn(
-                    calib_samples, in_features, dtype=COMPUTE_DTYPE # Use bf16 for realistic inputs, but COMPUTE_DTYPE should work? Unsure if this even matters.
-                )
-    print("Calibration data generated.\n")
-
-    new_tensors: Dict[str, torch.Tensor] = {}
-    weight_keys = sorted([key for key in tensors.keys() if key.endswith('.weight')])
-    total_weights = len(weight_keys)
-    skipped_count = 0
+    try:
+        if os.path.dirname(output_file):
+            os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        writer = SafetensorsStreamWriter(output_file, plan_output_specs(header, t5xxl, keep_distillation, marker), backend=writer_backend)
+    except Exception as e:
+        print(f"Error creating output file '{output_file}': {e}")
+        raw_input.close()
+        return
+    print(f"Writing {len(writer.specs)} tensors into {output_file} ({writer.total_size / 1024**3:.2f} GiB, {writer_backend} writer)")
+
+    event_stream = EventStream(events) if events else None
+    pool = None
+    pipeline = None
+    base_handle = None
     processed_count = 0
+    def abandon(event: str, **fields):
+        """Releases what a cancelled or failed run holds open, deletes the partial output and ends the event stream."""
+        if pool is not None:
+            pool.shutdown(wait=False)
+        if pipeline is not None:
+            pipeline.abort()
+        writer.abort()
+        raw_input.close()
+        if event_stream is not None:
+            event_stream.emit(event, **fields)
+            event_stream.close()
+
+    try:
+        written = set()
+        bytes_out = [0]
+        def write(call, nbytes: int):
+            if pipeline is not None:
+                pipeline.submit(call, nbytes)
+            else:
+                with PROFILER.phase("save"):
+                    call()
 
-    print(f"Found {total_weights} weight tensors to potentially process.")
+        def store(key: str, tensor: torch.Tensor):
+            written.add(key)
+            nbytes = tensor.numel() * tensor.element_size()
+            bytes_out[0] += nbytes
+            write(lambda: writer.write(key, tensor), nbytes)
 
-    for i, key in enumerate(weight_keys):
-        process_this_key = True
+        def store_raw(key: str):
+            if "source" in header[key]: # Tensor from another shard
+                store(key, get_tensor(key))
+                return
+            written.add(key)
+            nbytes = tensor_nbytes(dtype_names[key], shapes[key])
+            bytes_out[0] += nbytes
+            write(lambda: writer.copy_raw(key, raw_input, data_start + header[key]["data_offsets"][0], (dtype_names[key], shapes[key])), nbytes)
 
-        if t5xxl and any(avoid_name in key for avoid_name in T5XXL_REMOVE_KEY_NAMES):
-            print(f"({i+1}/{total_weights}) Removing decoder T5XXL tensor: {key}")
-            process_this_key = False
-            skipped_count += 1
-            continue
+        def tile_reader(key: str):
+            """Maps the input file holding key. Returns read_rows(start, end) (float32 rows), the map to close afterwards and a digest of the weight (None without a principal vector cache)."""
+            info = header[key]
+            with open(info.get("source", input_file), "rb") as fh:
+                mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_COPY) # Private mapping, so torch.frombuffer gets a writable buffer
+            offset = info.get("source_data_start", data_start) + info["data_offsets"][0]
+            read_rows = mapped_row_reader(mapped, offset, dtype_names[key], shapes[key])
+            digest = None
+            if converter.principal.cache_size > 0: # Only the principal vector cache needs it
+                view = memoryview(mapped)[offset:offset + tensor_nbytes(dtype_names[key], shapes[key])]
+                digest = hashlib.blake2b(view, digest_size=16).hexdigest() + dtype_names[key]
+                view.release()
+            return read_rows, mapped, digest
 
-        if t5xxl and any(avoid_name in key for avoid_name in AVOID_KEY_NAMES):
-            print(f"({i+1}/{total_weights}) Skipping excluded T5XXL tensor: {key}")
-            new_tensors[key] = tensors[key]
-            process_this_key = False
-            skipped_count += 1
+        # Instantiate the converter with hyperparameters from command line
+        converter = LearnedRoundingConverter(**converter_kwargs)
+        converter.cancel_event = cancel_event
+        converter.workspace = WorkspacePool(workspace_memory)
+        if caches is not None:
+            converter.principal = caches.engine_for(converter.principal)
 
-        if keep_distillation and any(avoid_name in key for avoid_name in DISTILL_LAYER_KEYNAMES):
-            print(f"({i+1}/{total_weights}) Skipping excluded distillation tensor: {key}")
-            new_tensors[key] = tensors[key]
-            base_name = key[:-len('.weight')]
-            scale_weight_key = f"{base_name}.scale_weight"
-            new_tensors[scale_weight_key] = torch.tensor([1.0], dtype=SCALE_DTYPE)
-            process_this_key = False
-            skipped_count += 1
+        # Calibration statistics (a mean input vector) for each unique input dimension
+        print("\nScanning model for linear layer dimensions...")
+        seed = converter_kwargs.get("seed")
+        calibration_data_cache: Dict[int, CalibrationStats] = caches.calibration_for(calib_samples, seed) if caches is not None else {}
+        with PROFILER.phase("calibration"):
+            for key, shape in shapes.items():
+                if key.endswith('.weight') and len(shape) == 2:
+                    in_features = shape[1]
+                    if in_features not in calibration_data_cache:
+                        print(f"  - Found new in_features dimension: {in_features}. Generating calibration statistics.")
+                        calibration_data_cache.setdefault(in_features, CalibrationStats.random(in_features, calib_samples, seed))
+        print("Calibration statistics generated.\n")
 
-        if not process_this_key:
-            continue
+        weight_keys = sorted([key for key in shapes.keys() if key.endswith('.weight')])
+        total_weights = len(weight_keys)
+        skipped_count = 0
+
+        print(f"Found {total_weights} weight tensors to potentially process.")
 
-        print(f"({i+1}/{total_weights}) Processing tensor: {key}")
-        processed_count += 1
+        quantize_keys = [key for key in weight_keys if weight_action(key, shapes[key], t5xxl, keep_distillation) == "quantize"]
+        conversion_journal = None
+        input_hashes: Dict[str, str] = {}
+        if journal:
+            settings = {"fp8_dtype": str(TARGET_FP8_DTYPE), "t5xxl": t5xxl, "keep_distillation": keep_distillation, "calib_samples": calib_samples, "converter": converter_kwargs, "tile_size": tile_size}
+            conversion_journal = ConversionJournal(output_file, settings)
+            with open(input_file, "rb") as fh:
+                for key in tqdm(quantize_keys, desc="Hashing input weights", leave=False, disable=not SHOW_PROGRESS):
+                    input_hashes[key] = weight_input_digest(fh, data_start, header, key)
+            resumable = sum(conversion_journal.has(key, input_hashes[key]) for key in quantize_keys)
+            print(f"Journal: {conversion_journal.path} ({resumable}/{len(quantize_keys)} weights already finished)")
+            quantize_keys = [key for key in quantize_keys if not conversion_journal.has(key, input_hashes[key])]
 
-        original_tensor = tensors[key]
+        reused_keys = set()
+        if reuse_from and base_source:
+            try:
+                reused_keys = set(find_reusable_weights(input_file, quantize_keys, base_source, reuse_from, t5xxl))
+                base_handle = safe_open(reuse_from, framework="pt", device="cpu")
+            except Exception as e:
+                print(f"Error reading base model '{base_source}' / '{reuse_from}': {e}")
+                abandon("error", message=f"Error reading base model '{base_source}' / '{reuse_from}': {e}")
+                return
+            print(f"Reusing {len(reused_keys)}/{len(quantize_keys)} unchanged weights from {reuse_from}")
+            quantize_keys = [key for key in quantize_keys if key not in reused_keys]
 
-        if original_tensor.numel() == 0 or original_tensor.ndim != 2:
-            print(f"  - Skipping empty or non-2D tensor: {key}")
-            new_tensors[key] = tensors[key].to(TARGET_FP8_DTYPE) # Store as empty FP8
+        if event_stream is not None:
+            event_stream.emit("start", input=input_file, output=output_file, tensors=len(shapes), weights=total_weights,
+                              to_optimize=len(quantize_keys), input_bytes=sum(tensor_nbytes(dtype_names[k], shapes[k]) for k in shapes))
+
+        scheduler = None
+        if time_budget:
+            if workers > 1:
+                print("  - Note: --time_budget is ignored when --workers is used.")
+            else:
+                scheduler = TimeBudgetScheduler(time_budget, sum(math.prod(shapes[key]) for key in quantize_keys), start=run_start)
+                converter.scheduler = scheduler
+                print(f"Time budget: {time_budget:.0f}s for {len(quantize_keys)} weights")
+
+        if tiled_keys:
+            print(f"Tiling {len(tiled_keys)} weights larger than {tile_size / 1024**2:.0f} MiB in float32" + (" (closed-form solver)" if converter.solver != "closed_form" else ""))
+
+        if workers > 1:
+            if batch_size > 1:
+                print("  - Note: --batch_size is ignored when --workers is used.")
+                batch_size = 1
+            jobs = []
+            for key in quantize_keys:
+                if key in tiled_keys: # Converted in this process, one tile at a time
+                    continue
+                bias_key = f"{key[:-len('.weight')]}.bias"
+                jobs.append((key, bias_key if bias_key in shapes else None))
+            pool = OrderedConversionPool(workers, input_file, jobs, calibration_data_cache, converter_kwargs, extra_inputs)
+
+        # Same-shape weights waiting to be optimized together, in processing order
+        shape_queues: Dict[Tuple[int, ...], deque] = defaultdict(deque)
+        batch_results = {}
+        if batch_size > 1:
+            for key in quantize_keys:
+                if key not in tiled_keys:
+                    shape_queues[shapes[key]].append(key)
+
+        fetch = get_tensor
+        if pipeline_memory:
+            # Reads in loop order: cast weights, then optimized weights (not restored or reused) and their biases
+            prefetch_keys, upcast_keys = [], []
+            if streaming and pool is None and batch_size <= 1:
+                optimized = set(quantize_keys)
+                for key in weight_keys:
+                    bias_key = f"{key[:-len('.weight')]}.bias"
+                    if weight_action(key, shapes[key], t5xxl, keep_distillation) == "cast":
+                        prefetch_keys.append(key)
+                    elif key in optimized and key not in tiled_keys:
+                        prefetch_keys.append(key)
+                        if converter.device == 'cpu' and seed is None: # Upcast off the critical path; on CUDA the copy is cheaper in the source dtype. Seeded draws hash the source bytes.
+                            upcast_keys.append(key)
+                    if key in optimized and bias_key in shapes:
+                        prefetch_keys.append(bias_key)
+            pipeline = ConversionPipeline(get_tensor, prefetch_keys, upcast_keys, pipeline_memory)
+            fetch = pipeline.get
+
+        # (action, elements, bytes, seconds) per tensor for the cost model; worker and batch timings don't map to one tensor
+        cost_samples = []
+        def tensor_done(record: dict):
+            seconds = time.perf_counter() - tensor_start
+            if workers <= 1 and batch_size <= 1:
+                cost_samples.append((record["action"], math.prod(record["shape"]), record["bytes_in"], seconds))
+            if event_stream is None:
+                return
+            phases = record.pop("phases", None)
+            if phases is None:
+                phases = {name: PROFILER.seconds[name] - phase_mark.get(name, 0.0) for name in PROFILER.seconds if PROFILER.seconds[name] > phase_mark.get(name, 0.0)}
+            record.setdefault("peak_rss_bytes", max_rss())
+            event_stream.emit("tensor", **record, seconds=seconds, phases=phases, bytes_out=bytes_out[0] - out_mark)
+
+        for i, key in enumerate(weight_keys):
+            if cancel_event is not None and cancel_event.is_set():
+                raise ConversionCancelled()
+            action = weight_action(key, shapes[key], t5xxl, keep_distillation)
             base_name = key[:-len('.weight')]
             scale_weight_key = f"{base_name}.scale_weight"
-            new_tensors[scale_weight_key] = torch.tensor([1.0], dtype=SCALE_DTYPE)
-            continue
+            bias_key = f"{base_name}.bias"
+            record = {"key": key, "index": i + 1, "total": total_weights, "action": action, "shape": list(shapes[key]),
+                      "bytes_in": tensor_nbytes(dtype_names[key], shapes[key])}
+            tensor_start, phase_mark, out_mark = time.perf_counter(), dict(PROFILER.seconds), bytes_out[0]
 
-        in_features = original_tensor.shape[1]
-        if in_features not in calibration_data_cache:
-             print(f"  - WARNING: No calibration data found for in_features={in_features}. Skipping {key}")
-             new_tensors[key] = original_tensor
-             skipped_count += 1
-             processed_count -= 1
-             continue
+            if action == "remove":
+                print(f"({i+1}/{total_weights}) Removing decoder T5XXL tensor: {key}")
+                skipped_count += 1
+                tensor_done(record)
+                continue
 
-        calibration_data = calibration_data_cache[in_features]
+            if action == "keep":
+                print(f"({i+1}/{total_weights}) Skipping excluded T5XXL tensor: {key}")
+                store_raw(key)
+                skipped_count += 1
+                tensor_done(record)
+                continue
 
-        # Use the learned rounding converter
-        quantized_fp8_tensor, dequant_scale, dequantized_weight_tensor = converter.convert(original_tensor, calibration_data)
+            if action == "keep_scaled":
+                print(f"({i+1}/{total_weights}) Skipping excluded distillation tensor: {key}")
+                store_raw(key)
+                store(scale_weight_key, torch.tensor([1.0], dtype=SCALE_DTYPE))
+                skipped_count += 1
+                tensor_done(record)
+                continue
 
-        # Store the results
-        new_tensors[key] = quantized_fp8_tensor
-        base_name = key[:-len('.weight')]
-        bias_key = f"{base_name}.bias"
-        scale_weight_key = f"{base_name}.scale_weight"
-        new_tensors[scale_weight_key] = dequant_scale.to(SCALE_DTYPE)
-
-        # --- BIAS CORRECTION ---
-        if bias_key in tensors:
-            print(f"  - Found and adjusting corresponding bias: {bias_key}")
-            with torch.no_grad():
-                original_bias = tensors[bias_key]
-                
-                device = 'cuda' if torch.cuda.is_available() else 'cpu'
-                # Move tensors to the compute device
-                W_orig_dev = original_tensor.to(device, dtype=COMPUTE_DTYPE)
-                W_dequant_dev = dequantized_weight_tensor.to(device, dtype=COMPUTE_DTYPE)
-                X_calib_dev = calibration_data.to(device, dtype=COMPUTE_DTYPE)
-                b_orig_dev = original_bias.to(device, dtype=COMPUTE_DTYPE)
-
-                # Calculate weight error
-                weight_error = W_orig_dev - W_dequant_dev
-                
-                # Propagate error through the linear layer's matrix multiplication
-                # Output error: (N, C_out) = (N, C_in) @ (C_in, C_out).T
-                output_error = X_calib_dev @ weight_error.T
-                
-                # The bias correction is the mean of this output error across the batch dimension
-                bias_correction = output_error.mean(dim=0)
-                
-                # Apply the correction to the original bias
-                b_new = b_orig_dev - bias_correction
-                
-                # Store the new bias, converting back to original dtype and CPU
-                new_tensors[bias_key] = b_new.cpu().to(original_bias.dtype)
-                
-                print(f"  - Original bias mean: {original_bias.mean().item():.6f}")
-                print(f"  - New bias mean     : {new_tensors[bias_key].mean().item():.6f}")
-                
-                # Clean up GPU memory
-                del W_orig_dev, W_dequant_dev, X_calib_dev, b_orig_dev, weight_error, output_error, bias_correction, b_new
-                if device == 'cuda':
-                    torch.cuda.empty_cache()
-
-        if t5xxl:
-            scale_input_key = f"{base_name}.scale_input"
-            new_tensors[scale_input_key] = dequant_scale.detach().clone().to(SCALE_DTYPE)
-
-        print(f"  - Dequant Scale  : {dequant_scale.item():.9}")
-        print(f"  - Weight  : {quantized_fp8_tensor}")
-
-    # Combine original non-weight tensors with new/modified ones
-    for key, tensor in tensors.items():
-        if (any(avoid_name in key for avoid_name in T5XXL_REMOVE_KEY_NAMES) and t5xxl):
-            print(f"(+) Skipping decoder tensor: {key}")
-            continue
-        if key not in new_tensors:
-            new_tensors[key] = tensor
-            print(f"(+) Adding original non-quantized tensor: {key}")
+            print(f"({i+1}/{total_weights}) Processing tensor: {key}")
+            processed_count += 1
 
-    new_tensors["scaled_fp8"] = torch.empty((2), dtype=TARGET_FP8_DTYPE) if not t5xxl else torch.empty((0), dtype=TARGET_FP8_DTYPE)
+            if action == "cast":
+                print(f"  - Skipping empty or non-2D tensor: {key}")
+                store(key, fetch(key).to(TARGET_FP8_DTYPE)) # Store as empty FP8
+                store(scale_weight_key, torch.tensor([1.0], dtype=SCALE_DTYPE))
+                tensor_done(record)
+                continue
 
-    print("-" * 40)
-    print(f"Saving {len(new_tensors)} tensors to {output_file}")
-    try:
-        os.makedirs(os.path.dirname(output_file), exist_ok=True)
-        save_file(new_tensors, output_file)
-        print("Conversion complete!")
+            if conversion_journal is not None and conversion_journal.has(key, input_hashes[key]):
+                print("  - Restored from journal")
+                for out_key, tensor in conversion_journal.load(key).items():
+                    store(out_key, tensor)
+                record["action"] = "journal"
+                tensor_done(record)
+                continue
+
+            if key in reused_keys:
+                print(f"  - Unchanged from base model, copying converted tensors from {reuse_from}")
+                reused = [key, scale_weight_key]
+                if f"{base_name}.bias" in shapes:
+                    reused.append(f"{base_name}.bias")
+                if t5xxl:
+                    reused.append(f"{base_name}.scale_input")
+                for out_key in reused:
+                    store(out_key, base_handle.get_tensor(out_key))
+                record["action"] = "reused"
+                tensor_done(record)
+                continue
+
+            in_features = shapes[key][1]
+            calibration_data = calibration_data_cache[in_features]
+
+            if bias_key in shapes:
+                record["bytes_in"] += tensor_nbytes(dtype_names[bias_key], shapes[bias_key])
+
+            tile_bytes = tile_size if key in tiled_keys else None
+            if tile_bytes is None and governor is not None and pool is None and batch_size <= 1 and not governor.fits(math.prod(shapes[key])):
+                print(f"  - Working set does not fit the memory budget at {current_rss() / 1024**3:.2f} GiB in use, converting in tiles")
+                tile_bytes = governor.runtime_tile_size()
+                tensors.pop(key, None)
+
+            if tile_bytes:
+                rows_per_tile = max(1, tile_bytes // (shapes[key][1] * 4))
+                print(f"  - Tiled: {math.ceil(shapes[key][0] / rows_per_tile)} tiles of {rows_per_tile} rows")
+                correction = torch.zeros(shapes[key][0], dtype=COMPUTE_DTYPE) if bias_key in shapes else None
+                def write_rows(start: int, block: torch.Tensor, W_f8: torch.Tensor, W_dq: torch.Tensor):
+                    tile_key = key # Bound now, the write may run after the loop has moved on
+                    written.add(tile_key)
+                    bytes_out[0] += W_f8.numel() * W_f8.element_size()
+                    write(lambda: writer.write_rows(tile_key, start, W_f8), W_f8.numel() * W_f8.element_size())
+                    if correction is not None:
+                        with PROFILER.phase("bias_correction"):
+                            correction[start:start + block.shape[0]] = calibration_data.bias_correction(block - W_dq).cpu()
+                read_rows, mapped, digest = tile_reader(key)
+                try:
+                    dequant_scale = converter.convert_tiled(read_rows, shapes[key], rows_per_tile, write_rows, digest)
+                finally:
+                    mapped.close()
+                record.update(converter.last_stats)
+                record["action"] = "tiled"
+                store(scale_weight_key, dequant_scale.to(SCALE_DTYPE))
+                new_bias = None
+                if correction is not None:
+                    print(f"  - Found and adjusting corresponding bias: {bias_key}")
+                    new_bias = shift_bias(fetch(bias_key), correction)
+                    store(bias_key, new_bias)
+                if t5xxl:
+                    store(f"{base_name}.scale_input", dequant_scale.detach().clone().to(SCALE_DTYPE))
+                if conversion_journal is not None:
+                    if pipeline is not None:
+                        pipeline.drain()
+                    finished = {key: writer.read(key), scale_weight_key: dequant_scale.to(SCALE_DTYPE)}
+                    if new_bias is not None:
+                        finished[bias_key] = new_bias
+                    if t5xxl:
+                        finished[f"{base_name}.scale_input"] = dequant_scale.detach().clone().to(SCALE_DTYPE)
+                    conversion_journal.record(key, input_hashes[key], finished)
+                    del finished
+                print(f"  - Dequant Scale  : {dequant_scale.item():.9}")
+                print(f"  - Weight  : {TARGET_FP8_DTYPE} {tuple(shapes[key])}")
+                tensor_done(record)
+                del correction, new_bias
+                continue
+
+            # Use the learned rounding converter
+            new_bias = None
+            if pool is not None:
+                quantized_fp8_tensor, dequant_scale, new_bias, worker_log, worker_info = pool.result(key)
+                print(worker_log, end="")
+                original_tensor = dequantized_weight_tensor = None
+                record.update(worker_info["stats"] or {})
+                record["phases"] = worker_info["phases"]
+                record["peak_rss_bytes"] = worker_info["peak_rss_bytes"]
+            elif batch_size > 1:
+                if key not in batch_results:
+                    queue = shape_queues[shapes[key]]
+                    group = [queue.popleft() for _ in range(min(batch_size, len(queue)))]
+                    originals = [fetch(k) for k in group]
+                    print(f"  - Optimizing {len(group)} tensors of shape {tuple(shapes[key])} as one batch")
+                    results = converter.convert_batch(originals)
+                    for k, original, result, stats in zip(group, originals, results, converter.last_stats):
+                        batch_results[k] = (original, result, stats)
+                    del originals, results
+                    record["batch"] = len(group)
+                original_tensor, (quantized_fp8_tensor, dequant_scale, dequantized_weight_tensor), stats = batch_results.pop(key)
+                record.update(stats)
+            else:
+                original_tensor = fetch(key)
+                quantized_fp8_tensor, dequant_scale, dequantized_weight_tensor = converter.convert(original_tensor, calibration_data)
+                record.update(converter.last_stats)
+
+            # Store the results
+            store(key, quantized_fp8_tensor)
+            store(scale_weight_key, dequant_scale.to(SCALE_DTYPE))
+
+            # --- BIAS CORRECTION ---
+            if pool is None and bias_key in shapes:
+                new_bias = correct_bias(bias_key, fetch(bias_key), original_tensor, dequantized_weight_tensor, calibration_data)
+            if new_bias is not None:
+                store(bias_key, new_bias)
+
+            if t5xxl:
+                scale_input_key = f"{base_name}.scale_input"
+                store(scale_input_key, dequant_scale.detach().clone().to(SCALE_DTYPE))
+
+            if conversion_journal is not None:
+                finished = {key: quantized_fp8_tensor, scale_weight_key: dequant_scale.to(SCALE_DTYPE)}
+                if new_bias is not None:
+                    finished[bias_key] = new_bias
+                if t5xxl:
+                    finished[scale_input_key] = dequant_scale.detach().clone().to(SCALE_DTYPE)
+                conversion_journal.record(key, input_hashes[key], finished)
+
+            print(f"  - Dequant Scale  : {dequant_scale.item():.9}")
+            print(f"  - Weight  : {quantized_fp8_tensor.dtype} {tuple(quantized_fp8_tensor.shape)}")
+            tensor_done(record)
+            del original_tensor, quantized_fp8_tensor, dequantized_weight_tensor, new_bias
+
+        if pool is not None:
+            pool.shutdown()
+
+        # Combine original non-weight tensors with new/modified ones
+        for key in shapes.keys():
+            if (any(avoid_name in key for avoid_name in T5XXL_REMOVE_KEY_NAMES) and t5xxl):
+                print(f"(+) Skipping decoder tensor: {key}")
+                continue
+            if key not in written:
+                store_raw(key)
+                print(f"(+) Adding original non-quantized tensor: {key}")
+
+        if marker:
+            # Only its presence matters to loaders; zeros rather than uninitialized memory keep the output reproducible
+            store("scaled_fp8", torch.zeros((2), dtype=TARGET_FP8_DTYPE) if not t5xxl else torch.empty((0), dtype=TARGET_FP8_DTYPE))
+
+        # One cleanup for the whole run instead of one per tensor
+        converter.workspace.clear()
+        gc.collect()
+        if converter.device == 'cuda':
+            torch.cuda.empty_cache()
+
+        print("-" * 40)
+        print(f"Finishing {len(written)} tensors in {output_file}")
+        try:
+            if pipeline is not None:
+                pipeline.close()
+            with PROFILER.phase("save"):
+                writer.close()
+            raw_input.close()
+            print("Conversion complete!")
+            if conversion_journal is not None:
+                conversion_journal.remove()
+        except Exception as e:
+            print(f"Error saving file '{output_file}': {e}")
+            abandon("error", message=f"Error saving file '{output_file}': {e}")
+            return
+    except ConversionCancelled:
+        print("Conversion cancelled.")
+        abandon("cancelled", finished=processed_count)
+        raise
     except Exception as e:
-        print(f"Error saving file '{output_file}': {e}")
-        return
+        abandon("error", message=f"{e}")
+        raise
 
     print("-" * 40)
     print("Summary:")
-    print(f"  - Original tensor count : {len(tensors)}")
+    print(f"  - Principal vectors     : {converter.principal.report()}")
+    if scheduler is not None:
+        print(f"  - Time budget           : {scheduler.report()}")
+    print(f"  - Original tensor count : {len(shapes)}")
     print(f"  - Weights processed     : {processed_count}")
     print(f"  - Weights skipped       : {skipped_count}")
-    print(f"  - Final tensor count    : {len(new_tensors)}")
+    if tiled_keys:
+        print(f"  - Weights tiled         : {len(tiled_keys)}")
+    if pipeline is not None:
+        print(f"  - I/O pipeline          : {pipeline.report()}")
+    if governor is not None:
+        print(f"  - Memory governor       : {governor.report()}")
+    print(f"  - Work buffers          : {converter.workspace.report()}")
+    print(f"  - Final tensor count    : {len(written)}")
     print("-" * 40)
 
+    summary = {
+        "original_tensors": len(shapes),
+        "processed": processed_count,
+        "skipped": skipped_count,
+        "tiled": len(tiled_keys),
+        "seed": seed,
+        "final_tensors": len(written),
+        "seconds": time.perf_counter() - run_start,
+        "bytes_out": bytes_out[0],
+        "peak_rss_bytes": max_rss(),
+        "phases": PROFILER.as_dict(),
+        "principal": {"report": converter.principal.report(), "seconds": dict(converter.principal.timings), "cache_hits": converter.principal.cache_hits},
+    }
+    summary["workspace"] = {"allocations": converter.workspace.allocations, "allocated_bytes": converter.workspace.allocated_bytes,
+                            "reuses": converter.workspace.reuses, "peak_bytes": converter.workspace.peak_bytes}
+    if pipeline is not None:
+        summary["pipeline"] = dict(pipeline.stats)
+    if governor is not None:
+        summary["memory_governor"] = {"budget_bytes": governor.budget, "predicted_peak_bytes": governor.predicted, "notes": governor.notes, "runtime_tiled": governor.runtime_tiled,
+                                      "settings": {"streaming": streaming, "batch_size": batch_size, "workers": workers, "tile_size": tile_size, "pipeline_memory": pipeline_memory, "workspace_memory": workspace_memory}}
+    if cost_model and cost_samples and scheduler is None: # Budget-capped loops would skew the fit
+        model = CostModel(cost_model)
+        kind = CostModel.optimize_kind(converter.solver, converter.principal.method, converter.device)
+        for action, numel, nbytes, seconds in cost_samples:
+            if action == "quantize":
+                model.add(kind, CostModel.optimize_x(converter.solver, numel, converter.num_iter), seconds)
+            elif action in ("keep", "keep_scaled"):
+                model.add("copy", nbytes, seconds)
+        try:
+            model.save()
+        except OSError as e:
+            print(f"Could not update the cost model '{cost_model}': {e}")
+    if scheduler is not None:
+        summary["time_budget"] = {"seconds": time_budget, "refine_seconds": scheduler.refine_seconds, "budget_stops": scheduler.budget_stops}
+    if event_stream is not None:
+        event_stream.emit("summary", **summary)
+        event_stream.close()
+    return summary
+
+def is_shard_index(path: str) -> bool:
+    """Sharded checkpoints are given by their index file (e.g. model.safetensors.index.json)."""
+    return path.lower().endswith(".json")
+
+def plan_shards(index_file: str, t5xxl: bool, keep_distillation: bool) -> Tuple[dict, List[dict]]:
+    """
+    Reads a shard index and works out one conversion per shard: its input file, the biases to take from
+    other shards (a quantized weight's corrected bias is written next to it), the keys moved away,
+    whether it carries the 'scaled_fp8' marker (first shard only) and its planned output specs.
+    Returns (index, shards).
+    """
+    base_dir = os.path.dirname(os.path.abspath(index_file))
+    with open(index_file, "r", encoding="utf-8") as fh:
+        index = json.load(fh)
+    weight_map = index["weight_map"]
+    names = sorted(set(weight_map.values()))
+    headers = {name: read_safetensors_header(os.path.join(base_dir, name))[0] for name in names}
+    extra_inputs: Dict[str, Dict[str, str]] = {name: {} for name in names}
+    drop_keys: Dict[str, set] = {name: set() for name in names}
+    for name in names:
+        for key, info in headers[name].items():
+            if not key.endswith('.weight') or weight_action(key, tuple(info["shape"]), t5xxl, keep_distillation) != "quantize":
+                continue
+            bias_key = f"{key[:-len('.weight')]}.bias"
+            bias_shard = weight_map.get(bias_key)
+            if bias_shard is not None and bias_shard != name and bias_key in headers[bias_shard]:
+                extra_inputs[name][bias_key] = os.path.join(base_dir, bias_shard)
+                drop_keys[bias_shard].add(bias_key)
+    shards = []
+    for i, name in enumerate(names):
+        shard_header = {key: info for key, info in headers[name].items() if key not in drop_keys[name]}
+        for key, path in extra_inputs[name].items():
+            shard_header[key] = headers[os.path.basename(path)][key]
+        shards.append({
+            "shard": name,
+            "input": os.path.join(base_dir, name),
+            "extra_inputs": extra_inputs[name],
+            "drop_keys": sorted(drop_keys[name]),
+            "marker": i == 0,
+            "specs": plan_output_specs(shard_header, t5xxl, keep_distillation, marker=i == 0),
+        })
+    return index, shards
+
+def convert_sharded(index_file: str, output_dir: str, t5xxl: bool, keep_distillation: bool, calib_samples: int, shard_jobs: int = 1, max_memory: Optional[int] = None, **convert_kwargs):
+    """
+    Converts a sharded checkpoint shard by shard into output_dir, never merging it into one file.
+    Output shards keep their names; the index is rewritten with the new .scale_weight/.scale_input keys
+    (and moved biases) mapped to their shards. Shards run through run_batch, up to shard_jobs at a time
+    within max_memory. Returns a summary dict like convert_to_fp8_scaled, or None if a shard failed.
+    """
+    print(f"Processing sharded checkpoint: {index_file}")
+    try:
+        index, shards = plan_shards(index_file, t5xxl, keep_distillation)
+    except Exception as e:
+        print(f"Error reading shard index '{index_file}': {e}")
+        return
+    if any(os.path.abspath(os.path.join(output_dir, shard["shard"])) == os.path.abspath(shard["input"]) for shard in shards):
+        print("Error: The output directory cannot be the directory of the input shards.")
+        return
+    os.makedirs(output_dir, exist_ok=True)
+
+    jobs = []
+    weight_map = {}
+    total_size = 0
+    for shard in shards:
+        if not shard["specs"]:
+            print(f"  - Skipping shard {shard['shard']}: no tensors left after conversion")
+            continue
+        for key, (dtype_name, shape) in shard["specs"].items():
+            weight_map[key] = shard["shard"]
+            total_size += tensor_nbytes(dtype_name, shape)
+        moved = len(shard["extra_inputs"])
+        print(f"  - {shard['shard']}: {len(shard['specs'])} output tensors" + (f", {moved} biases moved in from other shards" if moved else ""))
+        jobs.append({"input": shard["input"], "output": os.path.join(output_dir, shard["shard"]), "t5xxl": t5xxl, "keep_distillation": keep_distillation,
+                     "options": {"extra_inputs": shard["extra_inputs"], "drop_keys": shard["drop_keys"], "marker": shard["marker"]}})
+
+    time_budget = convert_kwargs.pop("time_budget", None)
+    if time_budget:
+        # Each shard gets the part of the budget its quantized weights make up (times the shards running at once)
+        sizes = [sum(math.prod(shape) for key, (_, shape) in shard["specs"].items() if key.endswith('.weight')) for shard in shards if shard["specs"]]
+        parallel = min(shard_jobs, len(jobs))
+        for job, size in zip(jobs, sizes):
+            job["options"]["time_budget"] = min(time_budget, time_budget * parallel * size / max(sum(sizes), 1))
+
+    start = time.perf_counter()
+    run_batch(jobs, max_jobs=shard_jobs, max_memory=max_memory, label="shard", calib_samples=calib_samples, **convert_kwargs)
+    if any(job["status"] == "cancelled" for job in jobs):
+        raise ConversionCancelled()
+    failed = [job for job in jobs if job["status"] != "done"]
+    if failed:
+        print(f"Error: {len(failed)} of {len(jobs)} shards failed, the index was not written.")
+        return
+
+    index_path = os.path.join(output_dir, os.path.basename(index_file))
+    with open(index_path, "w", encoding="utf-8") as fh:
+        json.dump({"metadata": {**index.get("metadata", {}), "total_size": total_size}, "weight_map": dict(sorted(weight_map.items()))}, fh, indent=2)
+    print(f"Index written to {index_path}")
+
+    summaries = [job["summary"] for job in jobs]
+    return {
+        "shards": len(jobs),
+        "original_tensors": sum(summary["original_tensors"] for summary in summaries),
+        "processed": sum(summary["processed"] for summary in summaries),
+        "skipped": sum(summary["skipped"] for summary in summaries),
+        "final_tensors": sum(summary["final_tensors"] for summary in summaries),
+        "seconds": time.perf_counter() - start,
+        "bytes_out": sum(summary["bytes_out"] for summary in summaries),
+        "peak_rss_bytes": max_rss(),
+        "principal": {"cache_hits": sum(summary["principal"]["cache_hits"] for summary in summaries)},
+        "jobs": jobs,
+    }
+
+# float32 copies of a weight alive at once in the dense refine loop, for memory estimates
+WORKING_SET_COPIES = 8
+# Smallest float32 tile the memory governor plans with; smaller tiles make the per-tile passes crawl
+MIN_TILE_SIZE = 16 * 1024**2
+
+def default_output_path(input_file: str, keep_distillation: bool, output_dir: Optional[str] = None) -> str:
+    """Output file for an input file; for a shard index, the output directory (named after the input directory)."""
+    fp8_type_str = TARGET_FP8_DTYPE.__str__().split('.')[-1]
+    distill_str = "_nodistill" if keep_distillation else ""
+    sharded = is_shard_index(input_file)
+    base_name = os.path.dirname(os.path.abspath(input_file)) if sharded else os.path.splitext(input_file)[0]
+    if output_dir:
+        base_name = os.path.join(output_dir, os.path.basename(base_name))
+    return f"{base_name}_{fp8_type_str}_scaled_learned{distill_str}_svd" + ("" if sharded else ".safetensors")
+
+def read_manifest(path: str) -> List[dict]:
+    """
+    Reads a batch manifest: either a JSON list of input paths or objects with 'input' and optional 'output',
+    't5xxl' and 'keep_distillation', or a text file with one input per line (optionally 'input<TAB>output';
+    blank lines and lines starting with # are ignored). Relative paths are relative to the manifest.
+    """
+    base_dir = os.path.dirname(os.path.abspath(path))
+    with open(path, "r", encoding="utf-8") as fh:
+        content = fh.read()
+    if path.lower().endswith(".json"):
+        entries = [entry if isinstance(entry, dict) else {"input": entry} for entry in json.loads(content)]
+    else:
+        entries = []
+        for line in content.splitlines():
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+            fields = [field.strip() for field in line.split("\t")]
+            entries.append({"input": fields[0], "output": fields[1]} if len(fields) > 1 and fields[1] else {"input": fields[0]})
+    for entry in entries:
+        for field in ("input", "output"):
+            if entry.get(field):
+                entry[field] = os.path.join(base_dir, os.path.expanduser(entry[field]))
+    return entries
+
+def expand_inputs(patterns: List[str]) -> List[str]:
+    """
+    Expands glob patterns and directories in command line order, without duplicates. A directory yields its
+    *.safetensors files, except that shards listed in a *.safetensors.index.json there are replaced by the index.
+    """
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            indexes = sorted(glob.glob(os.path.join(pattern, "*.safetensors.index.json")))
+            sharded = set()
+            for index_file in indexes:
+                with open(index_file, "r", encoding="utf-8") as fh:
+                    sharded.update(os.path.join(pattern, name) for name in json.load(fh)["weight_map"].values())
+            matches = indexes + [path for path in sorted(glob.glob(os.path.join(pattern, "*.safetensors"))) if path not in sharded]
+        elif glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern))
+        else:
+            matches = [pattern]
+        paths.extend(path for path in matches if path not in paths)
+    return paths
+
+def peak_memory_from_header(header: Dict[str, dict], streaming: bool, t5xxl: bool, keep_distillation: bool, tile_size: Optional[int] = None) -> int:
+    """
+    Rough peak host memory of one conversion in bytes: the float32 working set of the largest quantized
+    weight, plus the weights loaded as tensors (and their biases) unless streaming. Everything else is copied
+    from file to file and the output goes straight to disk. Weights tiled with tile_size count with one tile.
+    """
+    largest = 0
+    loaded = 0
+    for key, info in header.items():
+        if not key.endswith('.weight'):
+            continue
+        action = weight_action(key, tuple(info["shape"]), t5xxl, keep_distillation)
+        if action == "quantize" and is_tiled(info["shape"], tile_size):
+            largest = max(largest, tile_size // 4)
+            continue
+        if action == "quantize":
+            largest = max(largest, math.prod(info["shape"]))
+        if action in ("quantize", "cast"):
+            loaded += tensor_nbytes(info["dtype"], info["shape"])
+            bias_info = header.get(f"{key[:-len('.weight')]}.bias")
+            if bias_info is not None:
+                loaded += tensor_nbytes(bias_info["dtype"], bias_info["shape"])
+    working_set = largest * 4 * WORKING_SET_COPIES
+    return working_set if streaming else loaded + working_set
+
+def estimate_peak_memory(input_file: str, streaming: bool, t5xxl: bool, keep_distillation: bool, tile_size: Optional[int] = None) -> int:
+    """peak_memory_from_header for a file; for a shard index, the largest single-shard estimate."""
+    if is_shard_index(input_file):
+        return max(estimate_peak_memory(shard["input"], streaming, t5xxl, keep_distillation, tile_size) for shard in plan_shards(input_file, t5xxl, keep_distillation)[1])
+    return peak_memory_from_header(read_safetensors_header(input_file)[0], streaming, t5xxl, keep_distillation, tile_size)
+
+class MemoryGovernor:
+    """
+    Keeps one conversion within a memory budget (bytes, for the whole process).
+    plan() predicts the peak from the header (see peak_memory_from_header) and gives up the most memory-hungry
+    settings until it fits: less pipeline memory, tiling of the weights whose working set is too large,
+    streaming instead of loading the model, then fewer workers and smaller batches.
+    fits() checks a weight against the measured RSS right before it is converted; convert_to_fp8_scaled
+    converts a weight that does not fit in tiles of runtime_tile_size() instead.
+    Tiles never go below MIN_TILE_SIZE; plan() raises MemoryBudgetError if the budget cannot hold those.
+    """
+    def __init__(self, budget: int, baseline: Optional[int] = None):
+        self.budget = budget
+        # Memory the process uses before converting anything (PyTorch, the converter, open files)
+        self.baseline = baseline if baseline is not None else (current_rss() or 0)
+        self.predicted = None
+        self.notes: List[str] = []
+        self.runtime_tiled = 0
+
+    def plan(self, header: Dict[str, dict], t5xxl: bool, keep_distillation: bool, streaming: bool, batch_size: int, workers: int, tile_size: Optional[int], pipeline_memory: int, workspace_memory: int = 0) -> dict:
+        """Returns the settings (same names as the arguments) to run with."""
+        available = self.budget - self.baseline
+        if pipeline_memory > max(available // 8, 0):
+            pipeline_memory = max(available // 8, 0)
+            self.notes.append(f"I/O pipeline limited to {pipeline_memory / 1024**2:.0f} MiB")
+        available -= pipeline_memory
+        working_set = peak_memory_from_header(header, True, t5xxl, keep_distillation, tile_size)
+        if working_set > available:
+            tile_size = available // WORKING_SET_COPIES
+            if tile_size < MIN_TILE_SIZE and pipeline_memory: # Serial I/O before tiles too small to make progress
+                available += pipeline_memory
+                pipeline_memory = 0
+                self.notes.append("I/O pipeline off")
+                tile_size = available // WORKING_SET_COPIES
+            if tile_size < MIN_TILE_SIZE:
+                minimum = self.baseline + MIN_TILE_SIZE * WORKING_SET_COPIES
+                raise MemoryBudgetError(f"A memory budget of {self.budget / 1024**3:.2f} GiB is too small: the process already uses {self.baseline / 1024**3:.2f} GiB "
+                                        f"and needs {MIN_TILE_SIZE * WORKING_SET_COPIES / 1024**2:.0f} MiB for the smallest tiles. Use --max_memory {math.ceil(minimum / 1024**3 * 100) / 100:.2f} or more.")
+            working_set = peak_memory_from_header(header, True, t5xxl, keep_distillation, tile_size)
+            self.notes.append(f"weights larger than {tile_size / 1024**2:.1f} MiB in float32 are tiled (up to {tiled_read_passes()} reads each)")
+        if not streaming and peak_memory_from_header(header, False, t5xxl, keep_distillation, tile_size) > available:
+            streaming = True
+            self.notes.append("streaming, the model does not fit in memory next to the working set")
+        peak = peak_memory_from_header(header, streaming, t5xxl, keep_distillation, tile_size)
+        requested_workers, requested_batch = workers, batch_size
+        while workers > 1 and peak + (workers - 1) * (working_set + self.baseline) > available:
+            workers -= 1
+        while batch_size > 1 and peak + (batch_size - 1) * working_set > available:
+            batch_size -= 1
+        if workers != requested_workers:
+            self.notes.append(f"{workers} workers instead of {requested_workers}")
+        if batch_size != requested_batch:
+            self.notes.append(f"batch size {batch_size} instead of {requested_batch}")
+        self.predicted = self.baseline + pipeline_memory + peak + max((workers - 1) * (working_set + self.baseline), (batch_size - 1) * working_set, 0)
+        if self.predicted > self.budget:
+            self.notes.append(f"predicted peak {self.predicted / 1024**3:.2f} GiB is still over budget, weights are checked against the measured memory")
+        if workspace_memory > max(self.budget - self.predicted, 0): # Buffers kept for other shapes come on top of the working set
+            workspace_memory = max(self.budget - self.predicted, 0)
+            self.notes.append(f"work buffers of other shapes limited to {workspace_memory / 1024**2:.0f} MiB")
+        return {"streaming": streaming, "batch_size": batch_size, "workers": workers, "tile_size": tile_size, "pipeline_memory": pipeline_memory, "workspace_memory": workspace_memory}
+
+    def fits(self, numel: int) -> bool:
+        rss = current_rss()
+        return rss is None or rss + numel * 4 * WORKING_SET_COPIES <= self.budget
+
+    def runtime_tile_size(self) -> int:
+        self.runtime_tiled += 1
+        return max((self.budget - (current_rss() or 0)) // WORKING_SET_COPIES, MIN_TILE_SIZE)
+
+    def report(self) -> str:
+        parts = [f"budget {self.budget / 1024**3:.2f} GiB", f"predicted peak {self.predicted / 1024**3:.2f} GiB"]
+        parts += self.notes
+        if self.runtime_tiled:
+            parts.append(f"{self.runtime_tiled} weights tiled at runtime")
+        return ", ".join(parts)
+
+class CostModel:
+    """
+    Per-tensor time model fitted on earlier runs: seconds = a + b * x by least squares for each kind of work.
+    Kinds are 'optimize:<solver>:<principal>:<device>' with x = elements * num_iter for the dense solver
+    and elements for closed_form (whose loop is O(1) per iteration) and grid (a few passes), and 'copy' with x = bytes.
+    The fit is kept as running sums in a small JSON file, updated after every single-process run.
+    Kinds without samples fall back to rough CPU defaults.
+    """
+    DEFAULTS = {"dense": (0.05, 4e-9), "closed_form": (0.05, 2e-7), "grid": (0.05, 1e-6), "copy": (0.0, 1e-9)}
+
+    def __init__(self, path: Optional[str] = DEFAULT_COST_MODEL):
+        self.path = path
+        self.sums: Dict[str, List[float]] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as fh:
+                    self.sums = json.load(fh).get("sums", {})
+            except (OSError, ValueError):
+                self.sums = {}
+
+    @staticmethod
+    def optimize_kind(solver: str, principal: str, device: str) -> str:
+        return f"optimize:{solver}:{principal}:{device}"
+
+    @staticmethod
+    def optimize_x(solver: str, numel: int, num_iter: int) -> float:
+        return float(numel) * (num_iter if solver == "dense" else 1)
+
+    def add(self, kind: str, x: float, seconds: float):
+        n, sx, sy, sxx, sxy = self.sums.get(kind, [0, 0.0, 0.0, 0.0, 0.0])
+        self.sums[kind] = [n + 1, sx + x, sy + seconds, sxx + x * x, sxy + x * seconds]
+
+    def samples(self, kind: str) -> int:
+        return int(self.sums.get(kind, [0])[0])
+
+    def coefficients(self, kind: str) -> Tuple[float, float]:
+        n, sx, sy, sxx, sxy = self.sums.get(kind, [0, 0.0, 0.0, 0.0, 0.0])
+        if n == 0 or sx <= 0:
+            return self.DEFAULTS["copy" if kind == "copy" else kind.split(":")[1]]
+        denominator = n * sxx - sx * sx
+        if n >= 2 and denominator > 0:
+            b = (n * sxy - sx * sy) / denominator
+            a = (sy - b * sx) / n
+            if a >= 0 and b >= 0:
+                return a, b
+        return 0.0, sy / sx # Too few or degenerate samples: plain rate
+
+    def predict(self, kind: str, x: float) -> float:
+        a, b = self.coefficients(kind)
+        return a + b * x
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump({"sums": self.sums}, fh)
+        os.replace(tmp_path, self.path)
+
+PLAN_ACTIONS = {"remove": "drop", "keep": "passthrough", "keep_scaled": "passthrough_scaled", "cast": "cast", "quantize": "optimize"}
+
+def plan_conversion(input_file: str, t5xxl: bool, keep_distillation: bool, streaming: bool = False, num_iter: int = 500, solver: str = "dense", principal: str = "pca", cost_model: Optional[str] = DEFAULT_COST_MODEL, tile_size: Optional[int] = None) -> dict:
+    """
+    Dry run from the safetensors header(s) alone: what happens to every tensor (drop, passthrough,
+    passthrough_scaled, cast, optimize, bias_correction), the output size, the peak memory estimate
+    and the estimated seconds per tensor from the CostModel. Shard indexes are planned shard by shard.
+    Weights large enough to be tiled with tile_size are planned as "optimize_tiled" (closed-form solver).
+    """
+    model = CostModel(cost_model)
+    device = 'cuda' if torch.cuda.is_available() else 'cpu'
+    kind = CostModel.optimize_kind(solver, principal, device)
+    if is_shard_index(input_file):
+        parts = []
+        for shard in plan_shards(input_file, t5xxl, keep_distillation)[1]:
+            header = {key: info for key, info in read_safetensors_header(shard["input"])[0].items() if key not in shard["drop_keys"]}
+            for key, path in shard["extra_inputs"].items():
+                header[key] = read_safetensors_header(path)[0][key]
+            parts.append((shard["shard"], header, shard["marker"]))
+    else:
+        parts = [(None, read_safetensors_header(input_file)[0], True)]
+
+    tensors = []
+    output_bytes = 0
+    peak_memory = 0
+    for shard, header, marker in parts:
+        specs = plan_output_specs(header, t5xxl, keep_distillation, marker)
+        output_bytes += sum(tensor_nbytes(dtype_name, shape) for dtype_name, shape in specs.values())
+        peak_memory = max(peak_memory, peak_memory_from_header(header, streaming, t5xxl, keep_distillation, tile_size))
+        corrected = {f"{key[:-len('.weight')]}.bias" for key, info in header.items()
+                     if key.endswith('.weight') and weight_action(key, tuple(info["shape"]), t5xxl, keep_distillation) == "quantize"}
+        for key in sorted(header):
+            info = header[key]
+            shape = tuple(info["shape"])
+            bytes_in = tensor_nbytes(info["dtype"], shape)
+            if key.endswith('.weight'):
+                action = PLAN_ACTIONS[weight_action(key, shape, t5xxl, keep_distillation)]
+            elif t5xxl and any(avoid_name in key for avoid_name in T5XXL_REMOVE_KEY_NAMES):
+                action = "drop"
+            else:
+                action = "bias_correction" if key in corrected else "passthrough"
+            read_passes = 1
+            if action == "optimize" and is_tiled(shape, tile_size):
+                action = "optimize_tiled"
+                read_passes = tiled_read_passes() # Tiles are read from disk again on every pass
+                seconds = model.predict(CostModel.optimize_kind("closed_form", "power", device), CostModel.optimize_x("closed_form", math.prod(shape), num_iter))
+                seconds += model.predict("copy", read_passes * bytes_in)
+            elif action == "optimize":
+                seconds = model.predict(kind, CostModel.optimize_x(solver, math.prod(shape), num_iter))
+            elif action in ("passthrough", "passthrough_scaled", "cast"):
+                seconds = model.predict("copy", bytes_in)
+            else: # Dropped, or part of its weight's time
+                seconds = 0.0
+            entry = {"key": key, "action": action, "dtype": info["dtype"], "shape": list(shape), "bytes_in": bytes_in,
+                     "bytes_out": tensor_nbytes(*specs[key]) if key in specs else 0, "seconds": seconds, "read_passes": read_passes}
+            if shard is not None:
+                entry["shard"] = shard
+            tensors.append(entry)
+
+    counts = defaultdict(int)
+    for entry in tensors:
+        counts[entry["action"]] += 1
+    return {
+        "input": input_file,
+        "settings": {"t5xxl": t5xxl, "keep_distillation": keep_distillation, "streaming": streaming, "num_iter": num_iter, "solver": solver, "principal": principal, "tile_size": tile_size},
+        "tensors": tensors,
+        "totals": {
+            "actions": dict(counts),
+            "input_bytes": sum(entry["bytes_in"] for entry in tensors),
+            "read_bytes": sum(entry["bytes_in"] * entry["read_passes"] for entry in tensors if entry["action"] != "drop"),
+            "output_bytes": output_bytes,
+            "peak_memory_bytes": peak_memory,
+            "seconds": sum(entry["seconds"] for entry in tensors),
+        },
+        "cost_model": {"path": cost_model, "kind": kind, "samples": model.samples(kind), "calibrated": model.samples(kind) > 0},
+    }
+
+def print_plan(plan: dict):
+    print(f"Plan for {plan['input']}:")
+    print(f"{'Action':<18} {'Shape':<20} {'Out MiB':>9} {'Est. s':>8}  Tensor")
+    for entry in plan["tensors"]:
+        shape = "x".join(str(dim) for dim in entry["shape"]) or "scalar"
+        print(f"{entry['action']:<18} {shape:<20} {entry['bytes_out'] / 1024**2:>9.2f} {entry['seconds']:>8.2f}  {entry.get('shard', '') and entry['shard'] + ':'}{entry['key']}")
+    totals = plan["totals"]
+    print("-" * 40)
+    print("  - " + ", ".join(f"{count} {action}" for action, count in sorted(totals["actions"].items())))
+    print(f"  - Input size            : {totals['input_bytes'] / 1024**3:.2f} GiB")
+    if totals["read_bytes"] > totals["input_bytes"]:
+        print(f"  - Reads (worst case)    : {totals['read_bytes'] / 1024**3:.2f} GiB, tiled weights take up to {tiled_read_passes()} passes")
+    print(f"  - Output size           : {totals['output_bytes'] / 1024**3:.2f} GiB")
+    print(f"  - Peak memory (est.)    : {totals['peak_memory_bytes'] / 1024**3:.2f} GiB")
+    calibration = f"from {plan['cost_model']['samples']} measured tensors" if plan["cost_model"]["calibrated"] else "uncalibrated defaults, run a conversion to calibrate"
+    print(f"  - Time (est.)           : {totals['seconds'] / 60:.1f} min ({calibration})")
+    print("-" * 40)
+
+REPORT_CHUNK = 64 * 1024**2
+QUALITY_REPORT_FIELDS = ["key", "shape", "rel_error", "snr_db", "tpec_loss", "rtn_rel_error", "rtn_snr_db", "rtn_tpec_loss"]
+
+def quality_report(input_file: str, output_file: str, chunk_bytes: int = REPORT_CHUNK, principal_tol: float = 1e-6) -> dict:
+    """
+    Per-layer error of a converted file against its source, read from memory maps of both files.
+    Every FP8 weight with a scale_weight is dequantized with the stored scale and compared with the original
+    in row blocks of about chunk_bytes (float32), so only a few blocks are in memory at a time whatever the
+    model size. Metrics: relative Frobenius error, SNR in dB and the TPEC objective (u^T E v)^2 for the top
+    singular pair of the original (power iteration over the same blocks). The same metrics for round-to-nearest
+    at the same scale are the baseline the learned rounding should beat on tpec_loss.
+    """
+    start_time = time.perf_counter()
+    device = 'cuda' if torch.cuda.is_available() else 'cpu'
+    header_in, data_in = read_safetensors_header(input_file)
+    header_out, data_out = read_safetensors_header(output_file)
+    fp8_names = (TORCH_TO_SAFETENSORS_DTYPE[TARGET_FP8_DTYPE],)
+    keys = []
+    for key in sorted(header_out):
+        info = header_out[key]
+        scale_key = f"{key[:-len('.weight')]}.scale_weight"
+        if (key.endswith('.weight') and info["dtype"] in fp8_names and len(info["shape"]) == 2 and math.prod(info["shape"]) > 0
+                and scale_key in header_out and key in header_in and header_in[key]["shape"] == info["shape"]):
+            keys.append(key)
+
+    # Power iteration on the original only, no cache: every weight is visited once
+    engine = PrincipalVectorEngine("power", tol=principal_tol, cache_size=0)
+    layers = []
+    with open(input_file, "rb") as fh_in, open(output_file, "rb") as fh_out:
+        map_in = mmap.mmap(fh_in.fileno(), 0, access=mmap.ACCESS_COPY) # Private mappings, so torch.frombuffer gets writable buffers
+        map_out = mmap.mmap(fh_out.fileno(), 0, access=mmap.ACCESS_COPY)
+    try:
+        for key in tqdm(keys, desc="Measuring quantization error", leave=False, disable=not SHOW_PROGRESS):
+            rows, cols = shape = tuple(header_in[key]["shape"])
+            read_orig = mapped_row_reader(map_in, data_in + header_in[key]["data_offsets"][0], header_in[key]["dtype"], shape)
+            read_quant = mapped_row_reader(map_out, data_out + header_out[key]["data_offsets"][0], header_out[key]["dtype"], shape)
+            scale_info = header_out[f"{key[:-len('.weight')]}.scale_weight"]
+            scale_offset = data_out + scale_info["data_offsets"][0]
+            dequant_scale = torch.frombuffer(map_out, dtype=SAFETENSORS_TO_TORCH_DTYPE[scale_info["dtype"]], count=1, offset=scale_offset).item()
+            rows_per_block = max(1, chunk_bytes // (cols * 4))
+            whole = None
+            if rows <= rows_per_block: # Fits in one block: read it once for all passes
+                whole = read_orig(0, rows).to(device)
+                def blocks(with_start: bool = False):
+                    yield (0, whole) if with_start else whole
+            else:
+                def blocks(with_start: bool = False):
+                    for start in range(0, rows, rows_per_block):
+                        block = read_orig(start, min(start + rows_per_block, rows)).to(device)
+                        yield (start, block) if with_start else block
+
+            U_k, Vh_k = engine.top_vectors_tiled(blocks, shape, device)
+            signal = error = rtn_error = 0.0
+            projected = rtn_projected = 0.0
+            for start, block in blocks(with_start=True):
+                end = start + block.shape[0]
+                E = read_quant(start, end).to(device).mul_(dequant_scale).sub_(block)
+                E_rtn = (block / dequant_scale).to(TARGET_FP8_DTYPE).to(COMPUTE_DTYPE).mul_(dequant_scale).sub_(block)
+                signal += block.square().sum().item()
+                error += E.square().sum().item()
+                rtn_error += E_rtn.square().sum().item()
+                projected += (U_k[start:end].T @ E @ Vh_k.T).item()
+                rtn_projected += (U_k[start:end].T @ E_rtn @ Vh_k.T).item()
+                del E, E_rtn
+            layers.append({
+                "key": key,
+                "shape": list(shape),
+                "rel_error": math.sqrt(error / signal) if signal > 0 else 0.0,
+                "snr_db": 10 * math.log10(signal / error) if error > 0 and signal > 0 else float("inf"),
+                "tpec_loss": projected * projected,
+                "rtn_rel_error": math.sqrt(rtn_error / signal) if signal > 0 else 0.0,
+                "rtn_snr_db": 10 * math.log10(signal / rtn_error) if rtn_error > 0 and signal > 0 else float("inf"),
+                "rtn_tpec_loss": rtn_projected * rtn_projected,
+            })
+            del blocks, whole, U_k, Vh_k
+    finally:
+        map_in.close()
+        map_out.close()
+
+    finite = [layer for layer in layers if math.isfinite(layer["snr_db"]) and math.isfinite(layer["rtn_snr_db"])]
+    return {
+        "input": input_file,
+        "output": output_file,
+        "layers": layers,
+        "summary": {
+            "weights": len(layers),
+            "mean_rel_error": sum(layer["rel_error"] for layer in layers) / len(layers) if layers else 0.0,
+            "mean_snr_db": sum(layer["snr_db"] for layer in finite) / len(finite) if finite else None,
+            "mean_rtn_snr_db": sum(layer["rtn_snr_db"] for layer in finite) / len(finite) if finite else None,
+            "tpec_better_than_rtn": sum(layer["tpec_loss"] < layer["rtn_tpec_loss"] for layer in layers),
+            "tpec_worse_than_rtn": sum(layer["tpec_loss"] > layer["rtn_tpec_loss"] for layer in layers),
+            "seconds": time.perf_counter() - start_time,
+        },
+    }
+
+def write_quality_report(report: dict, path: str):
+    """Writes the per-layer rows of a quality_report as CSV (for a .csv path) or the whole report as JSON."""
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="") as fh:
+        if path.lower().endswith(".csv"):
+            writer = csv.DictWriter(fh, fieldnames=QUALITY_REPORT_FIELDS)
+            writer.writeheader()
+            for layer in report["layers"]:
+                writer.writerow(dict(layer, shape="x".join(str(dim) for dim in layer["shape"])))
+        else:
+            json.dump(report, fh, indent=2)
+
+def print_quality_report(report: dict, worst: int = 10):
+    summary = report["summary"]
+    layers = sorted(report["layers"], key=lambda layer: layer["snr_db"])[:worst]
+    print(f"Quality of {report['output']} against {report['input']}:")
+    if layers:
+        print("Lowest SNR layers:")
+        print(f"{'SNR dB':>8} {'RtN dB':>8} {'Rel err':>10} {'TPEC loss':>11} {'RtN TPEC':>11}  Tensor")
+        for layer in layers:
+            print(f"{layer['snr_db']:>8.2f} {layer['rtn_snr_db']:>8.2f} {layer['rel_error']:>10.3e} {layer['tpec_loss']:>11.3e} {layer['rtn_tpec_loss']:>11.3e}  {layer['key']}")
+    print("-" * 40)
+    print(f"  - Weights measured      : {summary['weights']}")
+    if summary["mean_snr_db"] is not None:
+        print(f"  - Mean SNR              : {summary['mean_snr_db']:.2f} dB (round-to-nearest: {summary['mean_rtn_snr_db']:.2f} dB)")
+    print(f"  - Mean relative error   : {summary['mean_rel_error']:.3e}")
+    print(f"  - TPEC loss vs RtN      : {summary['tpec_better_than_rtn']} lower, {summary['tpec_worse_than_rtn']} higher")
+    print(f"  - Time                  : {summary['seconds']:.1f}s")
+    print("-" * 40)
+
+class ThreadOutputRouter:
+    """
+    Stands in for sys.stdout/sys.stderr while batch jobs run concurrently: writes from a thread that
+    registered a target go to that target (the job's log file), everything else to the original stream.
+    """
+    def __init__(self, fallback):
+        self.fallback = fallback
+        self.targets = {}
+
+    def route(self, target):
+        self.targets[threading.get_ident()] = target
+
+    def unroute(self):
+        self.targets.pop(threading.get_ident(), None)
+
+    def write(self, text: str) -> int:
+        return self.targets.get(threading.get_ident(), self.fallback).write(text)
+
+    def flush(self):
+        self.targets.get(threading.get_ident(), self.fallback).flush()
+
+def format_batch_table(jobs: List[dict]) -> str:
+    lines = [f"{'#':>3}  {'Status':<9} {'Time':>8}  {'Weights':>7}  {'Output':>10}  Input"]
+    for i, job in enumerate(jobs):
+        summary = job.get("summary") or {}
+        seconds = f"{job['seconds']:.1f}s" if job.get("seconds") is not None else "-"
+        processed = str(summary.get("processed", "-"))
+        size = f"{summary['bytes_out'] / 1024**3:.2f} GiB" if "bytes_out" in summary else "-"
+        lines.append(f"{i + 1:>3}  {job['status']:<9} {seconds:>8}  {processed:>7}  {size:>10}  {job['input']}")
+        if job.get("error"):
+            lines.append(f"{'':>15}{job['error']}")
+    return "\n".join(lines)
+
+def run_batch(jobs: List[dict], max_jobs: int = 1, max_memory: Optional[int] = None, report: Optional[str] = None, streaming: bool = False, caches: Optional[ConversionCaches] = None, label: str = "batch", **convert_kwargs) -> List[dict]:
+    """
+    Converts several checkpoints in one process. jobs are dicts with 'input', 'output', 't5xxl' and
+    'keep_distillation' (and optionally per-job convert_to_fp8_scaled arguments in 'options'); the remaining
+    arguments are shared by all of them. Shard index inputs are converted with convert_sharded.
+    Jobs start in order, up to max_jobs at a time and, with max_memory (bytes), only while the sum of
+    their estimate_peak_memory stays within it (a job larger than the budget runs alone).
+    Concurrent jobs log to <output>.log. All jobs share caches (a new ConversionCaches by default).
+    Returns the jobs with their status ('done', 'failed' or 'cancelled'), time and summary; with report,
+    also writes them to that JSON file.
+    """
+    global SHOW_PROGRESS
+    show_progress = SHOW_PROGRESS
+    caches = caches if caches is not None else ConversionCaches()
+    for job in jobs:
+        job.update(status="queued", seconds=None, summary=None, error=None)
+        try:
+            job["estimate_bytes"] = estimate_peak_memory(job["input"], streaming, job["t5xxl"], job["keep_distillation"], convert_kwargs.get("tile_size"))
+        except Exception as e:
+            job.update(status="failed", error=f"Cannot read header: {e}")
+
+    concurrent = max_jobs > 1 and len(jobs) > 1
+    router_out = router_err = None
+    if max_memory and not concurrent:
+        convert_kwargs.setdefault("memory_budget", max_memory) # One job at a time, it may use the whole budget
+    if concurrent:
+        convert_kwargs.pop("memory_budget", None) # The budget is shared out by the job estimates instead
+        convert_kwargs["cost_model"] = None # Timings of jobs sharing the machine would skew the cost model
+        SHOW_PROGRESS = False # Progress bars of concurrent jobs would interleave
+        router_out, router_err = ThreadOutputRouter(sys.stdout), ThreadOutputRouter(sys.stderr)
+        sys.stdout, sys.stderr = router_out, router_err
+
+    slots = threading.Condition()
+    running = {"jobs": 0, "bytes": 0}
+    batch_start = time.perf_counter()
+
+    def fits(job: dict) -> bool:
+        if running["jobs"] == 0:
+            return True
+        if running["jobs"] >= max_jobs:
+            return False
+        return max_memory is None or running["bytes"] + job["estimate_bytes"] <= max_memory
+
+    def run_job(index: int, job: dict):
+        log_file = None
+        if concurrent:
+            try:
+                if os.path.dirname(job["output"]):
+                    os.makedirs(os.path.dirname(job["output"]), exist_ok=True)
+                log_file = open(f"{job['output']}.log", "w", encoding="utf-8")
+                router_out.route(log_file)
+                router_err.route(log_file)
+            except OSError:
+                pass
+        start = time.perf_counter()
+        try:
+            convert = convert_sharded if is_shard_index(job["input"]) else convert_to_fp8_scaled
+            job["summary"] = convert(job["input"], job["output"], job["t5xxl"], job["keep_distillation"],
+                                     streaming=streaming, caches=caches, **convert_kwargs, **job.get("options", {}))
+            job["status"] = "done" if job["summary"] is not None else "failed"
+            if job["summary"] is None:
+                job["error"] = f"Conversion failed, see {job['output']}.log" if log_file is not None else "Conversion failed, see above"
+        except ConversionCancelled:
+            job["status"] = "cancelled"
+        except Exception as e:
+            job.update(status="failed", error=f"{type(e).__name__}: {e}")
+        finally:
+            job["seconds"] = time.perf_counter() - start
+            if log_file is not None:
+                router_out.unroute()
+                router_err.unroute()
+                log_file.close()
+            with slots:
+                running["jobs"] -= 1
+                running["bytes"] -= job["estimate_bytes"]
+                print(f"[{label}] Job {index + 1}/{len(jobs)} {job['status']} in {job['seconds']:.1f}s: {job['input']}")
+                slots.notify_all()
+
+    threads = []
+    try:
+        for index, job in enumerate(jobs):
+            if job["status"] != "queued":
+                print(f"[{label}] Job {index + 1}/{len(jobs)} {job['status']}: {job['error']}")
+                continue
+            with slots:
+                slots.wait_for(lambda: fits(job))
+                running["jobs"] += 1
+                running["bytes"] += job["estimate_bytes"]
+            job["status"] = "running"
+            print(f"[{label}] Job {index + 1}/{len(jobs)} started (~{job['estimate_bytes'] / 1024**3:.2f} GiB): {job['input']} -> {job['output']}")
+            if concurrent:
+                thread = threading.Thread(target=run_job, args=(index, job), daemon=True)
+                thread.start()
+                threads.append(thread)
+            else:
+                run_job(index, job)
+        for thread in threads:
+            thread.join()
+    finally:
+        if concurrent:
+            sys.stdout, sys.stderr = router_out.fallback, router_err.fallback
+            SHOW_PROGRESS = show_progress
+
+    print("=" * 40)
+    print(f"{label.capitalize()} summary ({len(jobs)} jobs, {time.perf_counter() - batch_start:.1f}s):")
+    print(format_batch_table(jobs))
+    cache_hits = sum(job["summary"]["principal"]["cache_hits"] for job in jobs if job["summary"])
+    print(f"Principal vectors: {caches.cached_vectors()} cached, {cache_hits} cache hits")
+    print("=" * 40)
+    if report:
+        result = {"seconds": time.perf_counter() - batch_start, "max_jobs": max_jobs, "max_memory_bytes": max_memory, "jobs": jobs}
+        with open(report, "w", encoding="utf-8") as fh:
+            json.dump(EventStream._clean(result), fh, indent=2)
+        print(f"Batch report written to {report}")
+    return jobs
 
 def main():
     parser = argparse.ArgumentParser(
@@ -310,18 +2966,67 @@ def main():
         formatter_class=argparse.ArgumentDefaultsHelpFormatter
     )
     # Original arguments
-    parser.add_argument("--input", type=str, required=True, help="Input safetensors file path.")
-    parser.add_argument("--output", type=str, help="Output safetensors file path. If not provided, generated based on input name.")
+    parser.add_argument("--input", type=str, nargs="+", default=[], help="Input safetensors file path, or the index.json of a sharded checkpoint. Several paths, glob patterns or directories run a batch (see --manifest).")
+    parser.add_argument("--output", type=str, help="Output safetensors file path (output directory for a sharded input). If not provided, generated based on input name. In batch mode, the output directory (default: next to each input).")
     parser.add_argument("--keep_distillation", action='store_true', help="Exclude distillation layers from quantization. \n(Likely not helpful because ComfyUI may use Round-to-Nearest in place of this, which SUXASS.)")
     parser.add_argument("--t5xxl", action='store_true', help="Exclude certain layers for T5XXL model compatibility.")
 
-    parser.add_argument("--calib_samples", type=int, default=3072, help="Number of random samples for calibration.") # Random calibration samples for bias correction
+    parser.add_argument("--calib_samples", type=int, default=3072, help="Number of random calibration samples the bias correction averages over.") # Only their mean is needed, see CalibrationStats
     parser.add_argument("--num_iter", type=int, default=500, help="Number of optimization iterations per tensor.")
+    parser.add_argument("--solver", type=str, default="dense", choices=["dense", "closed_form", "grid"], help="Optimization loop: 'dense' updates the full tensor each iteration, 'closed_form' tracks the same rank-1 loop as scalars and builds the tensor once (much faster), 'grid' chooses each element's FP8 value between its two grid neighbours in a few sort-based passes (at most min(--num_iter, 8)).")
+    parser.add_argument("--principal", type=str, default="pca", choices=["pca", "power"], help="Top singular vector engine: 'pca' (pca_lowrank, niter=500) or 'power' (power iteration to --principal_tol, warm-started and cached).")
+    parser.add_argument("--principal_tol", type=float, default=1e-6, help="Convergence tolerance (1 - |cos| between iterates) for --principal power.")
+    parser.add_argument("--profile_principal", action='store_true', help="Also time the pca_lowrank reference on every tensor and report both timings in the summary.")
+    parser.add_argument("--patience", type=int, default=40, help="Worse iterations in a row before a tensor's optimization stops and keeps its best result.")
+    parser.add_argument("--time_budget", "--time-budget", type=float, default=None, help="Best-effort wall-clock budget for optimization in seconds, counted from the start of the run. Only the refine loops are cut short; loading, principal vectors and saving are not bounded. Each tensor's optimization gets a share weighted by its size and RtN loss gap; --num_iter stays the per-tensor cap.")
+    parser.add_argument("--deterministic", action='store_true', help="Repeatable output: deterministic PyTorch kernels and seeded calibration and PCA draws (--seed, default 0). Not combinable with --time_budget or --max_memory, which adapt to measured time and memory.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for the calibration and PCA draws. Each weight's draw is derived from the seed and the weight's bytes, so it does not depend on processing order. Use --deterministic for bit-identical output.")
+    parser.add_argument("--batch_size", type=int, default=1, help="Optimize up to this many same-shape weights together as one stacked batch (1 = one at a time).")
+    parser.add_argument("--workers", type=int, default=1, help="Optimize weights in this many worker processes (CPU conversion). Threads per worker are capped to cores / workers.")
+    parser.add_argument("--journal", action='store_true', help="Record every finished tensor in <output>.journal so an interrupted run can resume where it stopped (same input and settings).")
+    parser.add_argument("--reuse_from", "--reuse-from", type=str, default=None, help="Already converted FP8 file of a base model. Weights unchanged from --base_source are copied from it instead of re-optimized.")
+    parser.add_argument("--base_source", "--base-source", type=str, default=None, help="Original (unconverted) base model that --reuse_from was converted from.")
+    parser.add_argument("--events", type=str, default=None, help="Write one JSON record per tensor plus a run summary to this path ('fd:N' for an inherited file descriptor, '-' for stdout).")
+    parser.add_argument("--streaming", action='store_true', help="Read one tensor at a time instead of loading the whole model into RAM. Output is byte-identical.")
+    parser.add_argument("--tile_size", type=float, default=None, help="Convert weights whose float32 copy is larger than this many MiB in row tiles of about this size, read from the memory-mapped input (bounds peak memory for huge embeddings and projections; tiled weights use the closed-form solver).")
+    parser.add_argument("--pipeline_memory", type=float, default=PIPELINE_MEMORY / 1024**2, help="MiB for the I/O pipeline queues: writes run in a write-behind thread and, with --streaming, the next tensors are prefetched during compute (0 = serial I/O).")
+    parser.add_argument("--workspace_memory", type=float, default=WORKSPACE_MEMORY / 1024**2, help="MiB of float32 work buffers kept for reuse for shapes other than the current one (buffers of the current shape are always reused).")
+    parser.add_argument("--writer", type=str, default="mmap", choices=["mmap", "file"], help="Output backend: 'mmap' maps the preallocated output file and copies each tensor into its slot, 'file' writes each slot with seek + write.")
+    parser.add_argument("--plan", action='store_true', help="Dry run: read only the header(s) and print what happens to every tensor, the output size, peak memory and estimated time, then exit.")
+    parser.add_argument("--plan_json", type=str, default=None, help="With --plan, also write the plan to this JSON file.")
+    parser.add_argument("--cost_model", type=str, default=DEFAULT_COST_MODEL, help="Cost model file updated after every run and used by --plan for time estimates ('' to disable).")
+    parser.add_argument("--report", type=str, default=None, help="After the conversion, measure every FP8 weight against the input (relative error, SNR, TPEC loss and the round-to-nearest baseline) from memory maps of both files and write the per-layer results to this file (.csv, otherwise JSON).")
+    parser.add_argument("--report_only", action='store_true', help="Only write --report for an existing --output, without converting.")
+    parser.add_argument("--manifest", type=str, default=None, help="Batch manifest: a text file with one input per line ('input<TAB>output' to name the output) or a JSON list of inputs or {input, output, t5xxl, keep_distillation} objects.")
+    parser.add_argument("--shard_jobs", type=int, default=1, help="Sharded input (--input model.safetensors.index.json): convert up to this many shards at the same time.")
+    parser.add_argument("--jobs", type=int, default=1, help="Batch mode: convert up to this many checkpoints at the same time (each logs to <output>.log).")
+    parser.add_argument("--max_memory", "--max-memory", type=float, default=None, help="Memory budget in GiB. A conversion picks streaming, --batch_size, --workers, --tile_size and --pipeline_memory to fit it and tiles weights that would not fit at the measured memory. Batch mode and sharded input only start another job or shard while the estimated peak memory of all running ones fits.")
+    parser.add_argument("--batch_report", type=str, default=None, help="Batch mode: write the per-job status, timings and summaries to this JSON file.")
 
     args = parser.parse_args()
 
-    if not os.path.exists(args.input):
-        print(f"Error: Input file not found: {args.input}")
+    inputs = expand_inputs(args.input)
+    batch_entries = read_manifest(args.manifest) if args.manifest else []
+    if not inputs and not batch_entries:
+        print("Error: No input files given (use --input and/or --manifest).")
+        return
+    for path in inputs + [entry["input"] for entry in batch_entries]:
+        if not os.path.exists(path):
+            print(f"Error: Input file not found: {path}")
+            return
+
+    tile_size = int(args.tile_size * 1024**2) if args.tile_size else None
+    if args.plan:
+        plans = []
+        for entry in [{"input": path} for path in inputs] + batch_entries:
+            plan = plan_conversion(entry["input"], entry.get("t5xxl", args.t5xxl), entry.get("keep_distillation", args.keep_distillation), streaming=args.streaming, num_iter=args.num_iter,
+                                   solver=args.solver, principal=args.principal, cost_model=args.cost_model or None, tile_size=tile_size)
+            print_plan(plan)
+            plans.append(plan)
+        if args.plan_json:
+            with open(args.plan_json, "w", encoding="utf-8") as fh:
+                json.dump(plans[0] if len(plans) == 1 else plans, fh, indent=2)
+            print(f"Plan written to {args.plan_json}")
         return
 
     # Check for FP8 support
@@ -331,31 +3036,155 @@ def main():
         print("Error: This version of PyTorch or this hardware does not support torch.float8_e4m3fn.")
         return
 
-    fp8_type_str = TARGET_FP8_DTYPE.__str__().split('.')[-1]
-    distill_str = "_nodistill" if args.keep_distillation else ""
-    if not args.output:
-        base_name = os.path.splitext(args.input)[0]
-        output_file = f"{base_name}_{fp8_type_str}_scaled_learned{distill_str}_svd.safetensors"
-    else:
-        output_file = args.output
+    batch_mode = len(inputs) + len(batch_entries) > 1 or bool(args.manifest)
+    jobs = []
+    for entry in [{"input": path} for path in inputs] + batch_entries:
+        job = {"input": entry["input"], "t5xxl": entry.get("t5xxl", args.t5xxl), "keep_distillation": entry.get("keep_distillation", args.keep_distillation)}
+        if entry.get("output"):
+            job["output"] = entry["output"]
+        elif args.output and not batch_mode:
+            job["output"] = args.output
+        else:
+            job["output"] = default_output_path(job["input"], job["keep_distillation"], args.output if batch_mode else None)
+        if is_shard_index(job["input"]):
+            job["options"] = {"shard_jobs": args.shard_jobs}
+        jobs.append(job)
 
-    if os.path.abspath(args.input) == os.path.abspath(output_file):
-        print("Error: Output file cannot be the same as the input file.")
+    if args.report or args.report_only:
+        if not args.report:
+            print("Error: --report_only needs --report.")
+            return
+        if batch_mode or is_shard_index(jobs[0]["input"]):
+            print("Error: --report is only supported for a single, unsharded input.")
+            return
+        if args.report_only and not os.path.exists(jobs[0]["output"]):
+            print(f"Error: Output file not found: {jobs[0]['output']}")
+            return
+    report_chunk = tile_size or REPORT_CHUNK
+    if args.report_only:
+        report = quality_report(jobs[0]["input"], jobs[0]["output"], chunk_bytes=report_chunk, principal_tol=args.principal_tol)
+        print_quality_report(report)
+        write_quality_report(report, args.report)
+        print(f"Quality report written to {args.report}")
         return
 
+    outputs = set()
+    for job in jobs:
+        if os.path.abspath(job["input"]) == os.path.abspath(job["output"]):
+            print(f"Error: Output file cannot be the same as the input file: {job['input']}")
+            return
+        if os.path.abspath(job["output"]) in outputs:
+            print(f"Error: Several inputs would be written to the same output file: {job['output']}")
+            return
+        outputs.add(os.path.abspath(job["output"]))
+
+    if bool(args.reuse_from) != bool(args.base_source):
+        print("Error: --reuse_from and --base_source must be given together.")
+        return
+    for path in (args.reuse_from, args.base_source):
+        if path and not os.path.exists(path):
+            print(f"Error: Base model file not found: {path}")
+            return
+    if args.reuse_from and any(is_shard_index(job["input"]) for job in jobs):
+        print("Error: --reuse_from is not supported for sharded checkpoints.")
+        return
+
+    seed = args.seed
+    if args.deterministic:
+        if args.time_budget or args.max_memory:
+            print("Error: --deterministic cannot be combined with --time_budget or --max_memory.")
+            return
+        enable_determinism(torch.get_num_threads())
+        seed = seed if seed is not None else 0
+
     # Pass learned rounding hyperparameters to the conversion function
     converter_kwargs = {
         'num_iter': args.num_iter,
+        'solver': args.solver,
+        'principal': args.principal,
+        'principal_tol': args.principal_tol,
+        'profile_principal': args.profile_principal,
+        'patience': args.patience,
     }
+    if seed is not None:
+        converter_kwargs['seed'] = seed
+
+    max_memory = int(args.max_memory * 1024**3) if args.max_memory else None
+    if batch_mode:
+        run_batch(
+            jobs,
+            max_jobs=args.jobs,
+            max_memory=max_memory,
+            report=args.batch_report,
+            calib_samples=args.calib_samples,
+            streaming=args.streaming,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            journal=args.journal,
+            reuse_from=args.reuse_from,
+            base_source=args.base_source,
+            events=args.events,
+            writer_backend=args.writer,
+            time_budget=args.time_budget,
+            cost_model=args.cost_model or None,
+            tile_size=tile_size,
+            pipeline_memory=int(args.pipeline_memory * 1024**2),
+            workspace_memory=int(args.workspace_memory * 1024**2),
+            **converter_kwargs
+        )
+        return
+
+    if is_shard_index(jobs[0]["input"]):
+        convert_sharded(
+            jobs[0]["input"],
+            jobs[0]["output"],
+            args.t5xxl,
+            args.keep_distillation,
+            args.calib_samples,
+            shard_jobs=args.shard_jobs,
+            max_memory=max_memory,
+            streaming=args.streaming,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            journal=args.journal,
+            events=args.events,
+            writer_backend=args.writer,
+            time_budget=args.time_budget,
+            cost_model=args.cost_model or None,
+            tile_size=tile_size,
+            pipeline_memory=int(args.pipeline_memory * 1024**2),
+            workspace_memory=int(args.workspace_memory * 1024**2),
+            **converter_kwargs
+        )
+        return
 
-    convert_to_fp8_scaled(
-        args.input,
-        output_file,
+    summary = convert_to_fp8_scaled(
+        jobs[0]["input"],
+        jobs[0]["output"],
         args.t5xxl,
         args.keep_distillation,
         args.calib_samples,
+        streaming=args.streaming,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        journal=args.journal,
+        reuse_from=args.reuse_from,
+        base_source=args.base_source,
+        events=args.events,
+        writer_backend=args.writer,
+        time_budget=args.time_budget,
+        cost_model=args.cost_model or None,
+        tile_size=tile_size,
+        pipeline_memory=int(args.pipeline_memory * 1024**2),
+        workspace_memory=int(args.workspace_memory * 1024**2),
+        memory_budget=max_memory,
         **converter_kwargs
     )
+    if summary is not None and args.report:
+        report = quality_report(jobs[0]["input"], jobs[0]["output"], chunk_bytes=report_chunk, principal_tol=args.principal_tol)
+        print_quality_report(report)
+        write_quality_report(report, args.report)
+        print(f"Quality report written to {args.report}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,147 @@
+import argparse
+import json
+import mmap
+import sys
+
+import torch
+
+from convert_fp8_scaled_learned_svd_fast import SAFETENSORS_DTYPE_SIZES, SAFETENSORS_TO_TORCH_DTYPE, read_safetensors_header, tensor_nbytes
+
+# Compares two converted safetensors files tensor by tensor, e.g. the output of a baseline commit and of a
+# change that should not alter it. Both files are memory-mapped and compared in chunks, never loaded whole.
+# FP8 payloads must match bit for bit; scales, biases and other tensors may differ by up to --atol.
+# Exits with 0 when the files match, 1 when they don't.
+
+FP8_DTYPES = ("F8_E4M3", "F8_E5M2")
+# Integer views used to count elements whose bits differ
+BITS_DTYPES = {1: torch.uint8, 2: torch.int16, 4: torch.int32, 8: torch.int64}
+
+def tensor_kind(key: str, dtype_name: str) -> str:
+    if dtype_name in FP8_DTYPES:
+        return "fp8"
+    if key.endswith((".scale_weight", ".scale_input")):
+        return "scale"
+    if key.endswith(".bias"):
+        return "bias"
+    return "other"
+
+def open_map(path: str):
+    header, data_start = read_safetensors_header(path)
+    with open(path, "rb") as fh:
+        mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_COPY) # Private mapping, so torch.frombuffer gets a writable buffer
+    return header, data_start, mapped
+
+def compare_tensor(map_a, start_a: int, map_b, start_b: int, dtype_name: str, shape, chunk_bytes: int) -> dict:
+    """Bitwise and numeric comparison of one tensor present in both files with the same dtype and shape."""
+    nbytes = tensor_nbytes(dtype_name, shape)
+    element = SAFETENSORS_DTYPE_SIZES[dtype_name]
+    step = max(chunk_bytes // element, 1) * element
+    result = {"mismatched": 0, "max_abs_diff": 0.0, "max_rel_diff": 0.0}
+    view_a = memoryview(map_a)[start_a:start_a + nbytes]
+    view_b = memoryview(map_b)[start_b:start_b + nbytes]
+    try:
+        for offset in range(0, nbytes, step):
+            chunk_a, chunk_b = view_a[offset:offset + step], view_b[offset:offset + step]
+            if chunk_a == chunk_b:
+                continue
+            bits_a = torch.frombuffer(chunk_a, dtype=BITS_DTYPES[element])
+            bits_b = torch.frombuffer(chunk_b, dtype=BITS_DTYPES[element])
+            differs = bits_a != bits_b
+            result["mismatched"] += int(differs.sum())
+            torch_dtype = SAFETENSORS_TO_TORCH_DTYPE.get(dtype_name)
+            if torch_dtype is not None and torch_dtype.is_floating_point:
+                values_a = torch.frombuffer(chunk_a, dtype=torch_dtype)[differs].to(torch.float64)
+                values_b = torch.frombuffer(chunk_b, dtype=torch_dtype)[differs].to(torch.float64)
+                diff = (values_a - values_b).abs().nan_to_num(nan=float("inf")) # A NaN on one side only counts as infinitely far
+                rel = diff / values_a.abs().clamp(min=1e-30)
+                result["max_abs_diff"] = max(result["max_abs_diff"], diff.max().item())
+                result["max_rel_diff"] = max(result["max_rel_diff"], rel.max().item())
+                del values_a, values_b, diff, rel
+            del bits_a, bits_b, differs
+            chunk_a.release()
+            chunk_b.release()
+    finally:
+        view_a.release()
+        view_b.release()
+    return result
+
+def diff_files(path_a: str, path_b: str, atol: float = 0.0, chunk_bytes: int = 64 * 1024**2) -> dict:
+    """Returns a per-tensor report and a summary; 'match' is True when the files agree within the rules above."""
+    header_a, data_a, map_a = open_map(path_a)
+    header_b, data_b, map_b = open_map(path_b)
+    tensors = []
+    try:
+        for key in sorted(set(header_a) | set(header_b)):
+            info_a, info_b = header_a.get(key), header_b.get(key)
+            entry = {"key": key}
+            if info_a is None or info_b is None:
+                entry.update(status="only_in_b" if info_a is None else "only_in_a", kind=tensor_kind(key, (info_a or info_b)["dtype"]))
+                tensors.append(entry)
+                continue
+            entry.update(kind=tensor_kind(key, info_a["dtype"]), dtype=info_a["dtype"], shape=info_a["shape"])
+            if info_a["dtype"] != info_b["dtype"] or info_a["shape"] != info_b["shape"]:
+                entry.update(status="layout_differs", dtype_b=info_b["dtype"], shape_b=info_b["shape"])
+                tensors.append(entry)
+                continue
+            entry.update(compare_tensor(map_a, data_a + info_a["data_offsets"][0], map_b, data_b + info_b["data_offsets"][0],
+                                        info_a["dtype"], info_a["shape"], chunk_bytes))
+            if entry["mismatched"] == 0:
+                entry["status"] = "identical"
+            elif entry["kind"] != "fp8" and entry["max_abs_diff"] <= atol:
+                entry["status"] = "within_tolerance"
+            else:
+                entry["status"] = "differs"
+            tensors.append(entry)
+    finally:
+        map_a.close()
+        map_b.close()
+
+    counts = {}
+    for entry in tensors:
+        counts.setdefault(entry["kind"], {}).setdefault(entry["status"], 0)
+        counts[entry["kind"]][entry["status"]] += 1
+    return {
+        "a": path_a,
+        "b": path_b,
+        "atol": atol,
+        "match": all(entry["status"] in ("identical", "within_tolerance") for entry in tensors),
+        "counts": counts,
+        "tensors": tensors,
+    }
+
+def print_report(report: dict, verbose: bool):
+    print(f"A: {report['a']}")
+    print(f"B: {report['b']}")
+    print(f"{'Status':<17} {'Kind':<6} {'Mismatched':>10} {'Max |diff|':>12} {'Max rel':>10}  Tensor")
+    for entry in report["tensors"]:
+        if entry["status"] == "identical" and not verbose:
+            continue
+        print(f"{entry['status']:<17} {entry['kind']:<6} {entry.get('mismatched', ''):>10} {entry.get('max_abs_diff', 0.0):>12.3e} {entry.get('max_rel_diff', 0.0):>10.3e}  {entry['key']}")
+    print("-" * 40)
+    for kind, statuses in sorted(report["counts"].items()):
+        print(f"  - {kind:<6}: " + ", ".join(f"{count} {status}" for status, count in sorted(statuses.items())))
+    print("Outputs match." if report["match"] else "Outputs differ.")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Diff two FP8 safetensors outputs tensor by tensor without loading them: FP8 payloads must be bit-exact, scales/biases/other tensors may differ by --atol.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("a", type=str, help="First (reference) safetensors file.")
+    parser.add_argument("b", type=str, help="Second safetensors file.")
+    parser.add_argument("--atol", type=float, default=0.0, help="Largest absolute difference allowed for non-FP8 tensors (scales, biases, copied tensors).")
+    parser.add_argument("--chunk_mb", type=float, default=64, help="Bytes compared per step, in MiB.")
+    parser.add_argument("--json", type=str, default=None, help="Also write the full report to this JSON file.")
+    parser.add_argument("--verbose", action='store_true', help="List identical tensors too.")
+    args = parser.parse_args()
+
+    report = diff_files(args.a, args.b, atol=args.atol, chunk_bytes=int(args.chunk_mb * 1024**2))
+    print_report(report, args.verbose)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"Report written to {args.json}")
+    sys.exit(0 if report["match"] else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import contextlib
+import json
+import os
+import queue
+import sys
+import threading
+import traceback
+
+# Long-lived conversion worker for the GUI.
+# Imports torch and the converter once, then runs jobs sent as JSON lines on stdin and answers with JSON lines:
+#   in : {"type": "convert", "id": ..., "args": {...convert_to_fp8_scaled keyword arguments...}}
+#        {"type": "cancel", "id": ...}    cooperative, the worker stays alive
+#        {"type": "plan", "id": ..., "args": {...plan_conversion keyword arguments...}}    answered right away
+#        {"type": "shutdown"}             (EOF on stdin does the same)
+#   out: {"type": "ready"}
+#        {"type": "started" | "log" | "progress" | "event" | "done" | "cancelled" | "error" | "plan", "id": ..., ...}
+# The protocol goes to a private copy of stdout; fd 1 itself is pointed at stderr, so stray output
+# (C libraries, pool workers) cannot corrupt it.
+
+class ProtocolWriter:
+    def __init__(self, stream):
+        self.stream = stream
+        self.lock = threading.Lock()
+
+    def send(self, message_type: str, **fields):
+        line = json.dumps({"type": message_type, **fields}) + "\n"
+        with self.lock:
+            self.stream.write(line)
+            self.stream.flush()
+
+class JobOutput:
+    """File-like object that forwards a job's stdout/stderr as 'log' lines and tqdm refreshes as 'progress'."""
+    def __init__(self, protocol: ProtocolWriter, job_id):
+        self.protocol = protocol
+        self.job_id = job_id
+        self.pending = ""
+
+    def write(self, text: str) -> int:
+        self.pending += text
+        while True:
+            cut = min((i for i in (self.pending.find("\n"), self.pending.find("\r")) if i >= 0), default=-1)
+            if cut < 0:
+                break
+            segment, end = self.pending[:cut], self.pending[cut]
+            self.pending = self.pending[cut + 1:]
+            if end == "\n":
+                self.protocol.send("log", id=self.job_id, text=segment)
+            elif segment.strip():
+                self.protocol.send("progress", id=self.job_id, text=segment)
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self) -> bool:
+        return False
+
+class JobEvents:
+    """File-like target for the converter's EventStream; each JSON line becomes an 'event' message."""
+    def __init__(self, protocol: ProtocolWriter, job_id):
+        self.protocol = protocol
+        self.job_id = job_id
+
+    def write(self, line: str) -> int:
+        if line.strip():
+            self.protocol.send("event", id=self.job_id, record=json.loads(line))
+        return len(line)
+
+    def flush(self):
+        pass
+
+def run_jobs(protocol: ProtocolWriter, jobs: "queue.Queue", cancel_events: dict):
+    import convert_fp8_scaled_learned_svd_fast as converter_module
+
+    # Calibration statistics and principal vectors carry over between the jobs of a session
+    caches = converter_module.ConversionCaches()
+
+    while True:
+        job = jobs.get()
+        if job is None:
+            return
+        job_id = job.get("id")
+        cancel_event = cancel_events.setdefault(job_id, threading.Event())
+        if cancel_event.is_set(): # Cancelled while still queued
+            cancel_events.pop(job_id, None)
+            protocol.send("cancelled", id=job_id)
+            continue
+        output = JobOutput(protocol, job_id)
+        protocol.send("started", id=job_id)
+        try:
+            with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+                args = {"cost_model": converter_module.DEFAULT_COST_MODEL, **job["args"]} # GUI runs refine the planner's estimates
+                summary = converter_module.convert_to_fp8_scaled(events=JobEvents(protocol, job_id), cancel_event=cancel_event, caches=caches, **args)
+            if summary is None:
+                protocol.send("error", id=job_id, message="Conversion failed, see the log for details.")
+            else:
+                protocol.send("done", id=job_id, summary=summary)
+        except converter_module.ConversionCancelled:
+            protocol.send("cancelled", id=job_id)
+        except Exception as e:
+            protocol.send("error", id=job_id, message=f"{e}", traceback=traceback.format_exc())
+        finally:
+            cancel_events.pop(job_id, None)
+
+def main():
+    protocol = ProtocolWriter(os.fdopen(os.dup(sys.stdout.fileno()), "w", encoding="utf-8"))
+    sys.stdout.flush()
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    # Import torch and the converter before announcing readiness, so the first job starts instantly.
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import convert_fp8_scaled_learned_svd_fast as converter_module
+
+    jobs = queue.Queue()
+    cancel_events = {}
+    runner = threading.Thread(target=run_jobs, args=(protocol, jobs, cancel_events), daemon=True)
+    runner.start()
+    protocol.send("ready", pid=os.getpid())
+
+    for line in sys.stdin:
+        try:
+            message = json.loads(line)
+        except ValueError:
+            continue
+        if message.get("type") == "convert":
+            cancel_events.setdefault(message.get("id"), threading.Event())
+            jobs.put(message)
+        elif message.get("type") == "cancel":
+            event = cancel_events.get(message.get("id"))
+            if event is not None:
+                event.set()
+        elif message.get("type") == "plan": # Header-only, fast enough to answer between jobs
+            try:
+                protocol.send("plan", id=message.get("id"), plan=converter_module.plan_conversion(**message["args"]))
+            except Exception as e:
+                protocol.send("error", id=message.get("id"), message=f"Cannot plan: {e}")
+        elif message.get("type") == "shutdown":
+            break
+    for event in list(cancel_events.values()):
+        event.set()
+    jobs.put(None)
+    runner.join()
+
+if __name__ == "__main__":
+    main()
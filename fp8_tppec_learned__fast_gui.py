@@ -1,32 +1,57 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 import threading
+import json
 import subprocess
 import sys
 import os
+import re
 from pathlib import Path
 import queue
 import time
 
+# The log widget keeps only the newest lines; the complete log goes to <output>.log
+LOG_MAX_LINES = 2000
+# Time the UI thread may spend draining the output queue per tick
+QUEUE_DRAIN_BUDGET = 0.02
+QUEUE_POLL_MS = 50
+# Child output line endings; a bare \r is a tqdm refresh of the current line
+LINE_END = re.compile(rb"\r\n|\r|\n")
+
 class FP8ConverterGUI:
     def __init__(self, root):
         self.root = root
         self.root.title("FP8 Model Converter")
-        self.root.geometry("800x700")
+        self.root.geometry("800x820")
         self.root.resizable(True, True)
         
         # Queue for thread communication
         self.output_queue = queue.Queue()
-        self.process = None
+        # Persistent conversion worker, see fp8_conversion_worker.py
+        self.worker = None
+        self.job_id = 0
+        # Job queue: every job the queue panel shows, and the submitted ones the worker hasn't finished, by id
+        self.queued_jobs = []
+        self.active_jobs = {}
+        self.failed_jobs = 0
+        self.submitted_jobs = 0
+        # Id of the last plan request (plans share the worker's id space with jobs)
+        self.plan_id = None
         self.is_running = False
+        self.log_file = None
+        # The latest tqdm refresh is shown as a single line below the log, replaced in place
+        self.progress_line_shown = False
         
         # Variables
         self.input_path = tk.StringVar()
         self.output_path = tk.StringVar()
         self.t5xxl_var = tk.BooleanVar()
         self.keep_distillation_var = tk.BooleanVar()
+        self.journal_var = tk.BooleanVar(value=False)
         self.calib_samples_var = tk.IntVar(value=3072)
         self.num_iter_var = tk.IntVar(value=500)
+        self.solver_var = tk.StringVar(value="dense")
+        self.time_budget_var = tk.DoubleVar(value=0) # Minutes, 0 = no budget
         
         self.setup_ui()
         self.check_output_queue()
@@ -76,9 +101,31 @@ class FP8ConverterGUI:
         ttk.Checkbutton(options_frame, text="Keep Distillation Layers", 
                        variable=self.keep_distillation_var).grid(row=1, column=0, sticky=tk.W, pady=(0, 5))
         
+        ttk.Checkbutton(options_frame, text="Resumable (journal finished tensors, resume after Stop)", 
+                       variable=self.journal_var).grid(row=2, column=0, sticky=tk.W, pady=(0, 5))
+        
+        # Job queue section
+        queue_frame = ttk.LabelFrame(main_frame, text="Job Queue (optional, runs in order)", padding="10")
+        queue_frame.grid(row=3, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(0, 10))
+        queue_frame.columnconfigure(0, weight=1)
+        
+        self.queue_tree = ttk.Treeview(queue_frame, columns=("status", "input", "output"), show="headings", height=4)
+        self.queue_tree.heading("status", text="Status")
+        self.queue_tree.heading("input", text="Input")
+        self.queue_tree.heading("output", text="Output")
+        self.queue_tree.column("status", width=80, stretch=False)
+        self.queue_tree.grid(row=0, column=0, sticky=(tk.W, tk.E))
+        
+        queue_buttons = ttk.Frame(queue_frame)
+        queue_buttons.grid(row=0, column=1, sticky=tk.N, padx=(10, 0))
+        ttk.Button(queue_buttons, text="Add Current", command=self.add_current_job).pack(fill=tk.X)
+        ttk.Button(queue_buttons, text="Add Files...", command=self.add_job_files).pack(fill=tk.X, pady=(5, 0))
+        ttk.Button(queue_buttons, text="Remove", command=self.remove_jobs).pack(fill=tk.X, pady=(5, 0))
+        ttk.Button(queue_buttons, text="Clear Finished", command=self.clear_finished_jobs).pack(fill=tk.X, pady=(5, 0))
+        
         # Parameters section
         params_frame = ttk.LabelFrame(main_frame, text="Advanced Parameters", padding="10")
-        params_frame.grid(row=3, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(0, 10))
+        params_frame.grid(row=4, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(0, 10))
         params_frame.columnconfigure(1, weight=1)
         
         # Calibration samples
@@ -99,9 +146,19 @@ class FP8ConverterGUI:
         self.iter_label = ttk.Label(iter_frame, text=str(self.num_iter_var.get()))
         self.iter_label.pack(side=tk.LEFT, padx=(10, 0))
         
+        # Optimization solver
+        ttk.Label(params_frame, text="Solver:").grid(row=2, column=0, sticky=tk.W, pady=(0, 5))
+        ttk.Combobox(params_frame, textvariable=self.solver_var, values=["dense", "closed_form", "grid"],
+                    state="readonly", width=15).grid(row=2, column=1, sticky=tk.W, padx=(10, 0), pady=(0, 5))
+        
+        # Best-effort time budget for optimization, spread over the tensors by the converter's scheduler
+        ttk.Label(params_frame, text="Time Budget (min, 0 = off):").grid(row=3, column=0, sticky=tk.W, pady=(0, 5))
+        ttk.Spinbox(params_frame, textvariable=self.time_budget_var, from_=0, to=1440, increment=5,
+                   width=8).grid(row=3, column=1, sticky=tk.W, padx=(10, 0), pady=(0, 5))
+        
         # Control buttons
         button_frame = ttk.Frame(main_frame)
-        button_frame.grid(row=4, column=0, columnspan=3, pady=(10, 0))
+        button_frame.grid(row=5, column=0, columnspan=3, pady=(10, 0))
         
         self.convert_button = ttk.Button(button_frame, text="Start Conversion", 
                                        command=self.start_conversion, style="Accent.TButton")
@@ -111,6 +168,10 @@ class FP8ConverterGUI:
                                     command=self.stop_conversion, state="disabled")
         self.stop_button.pack(side=tk.LEFT, padx=(0, 10))
         
+        self.plan_button = ttk.Button(button_frame, text="Plan", 
+                                    command=self.request_plan)
+        self.plan_button.pack(side=tk.LEFT, padx=(0, 10))
+        
         self.clear_button = ttk.Button(button_frame, text="Clear Log", 
                                      command=self.clear_log)
         self.clear_button.pack(side=tk.LEFT)
@@ -118,18 +179,18 @@ class FP8ConverterGUI:
         # Progress bar
         self.progress_var = tk.StringVar(value="Ready")
         self.progress = ttk.Progressbar(main_frame, mode='indeterminate')
-        self.progress.grid(row=5, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(10, 5))
+        self.progress.grid(row=6, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(10, 5))
         
         # Status label
         self.status_label = ttk.Label(main_frame, textvariable=self.progress_var)
-        self.status_label.grid(row=6, column=0, columnspan=3)
+        self.status_label.grid(row=7, column=0, columnspan=3)
         
         # Output log
         log_frame = ttk.LabelFrame(main_frame, text="Conversion Log", padding="10")
-        log_frame.grid(row=7, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(10, 0))
+        log_frame.grid(row=8, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(10, 0))
         log_frame.columnconfigure(0, weight=1)
         log_frame.rowconfigure(0, weight=1)
-        main_frame.rowconfigure(7, weight=1)
+        main_frame.rowconfigure(8, weight=1)
         
         self.log_text = scrolledtext.ScrolledText(log_frame, height=15, width=80, 
                                                 state=tk.DISABLED, wrap=tk.WORD)
@@ -177,16 +238,32 @@ class FP8ConverterGUI:
         self.output_path.set(output_file)
     
     def log_message(self, message):
+        self.append_log([message])
+    
+    def append_log(self, lines, progress_line=None):
+        """Appends lines in one widget update, replaces the progress line and trims the log to LOG_MAX_LINES."""
         self.log_text.config(state=tk.NORMAL)
-        self.log_text.insert(tk.END, message + "\n")
+        if self.progress_line_shown:
+            self.log_text.delete("progress_start", tk.END)
+            self.progress_line_shown = False
+        if lines:
+            self.log_text.insert(tk.END, "\n".join(lines) + "\n")
+        if progress_line is not None:
+            self.log_text.mark_set("progress_start", "end-1c")
+            self.log_text.mark_gravity("progress_start", tk.LEFT)
+            self.log_text.insert(tk.END, progress_line)
+            self.progress_line_shown = True
+        line_count = int(self.log_text.index("end-1c").split(".")[0])
+        if line_count > LOG_MAX_LINES:
+            self.log_text.delete("1.0", f"{line_count - LOG_MAX_LINES + 1}.0")
         self.log_text.see(tk.END)
         self.log_text.config(state=tk.DISABLED)
-        self.root.update_idletasks()
     
     def clear_log(self):
         self.log_text.config(state=tk.NORMAL)
         self.log_text.delete(1.0, tk.END)
         self.log_text.config(state=tk.DISABLED)
+        self.progress_line_shown = False
     
     def validate_inputs(self):
         if not self.input_path.get():
@@ -208,100 +285,321 @@ class FP8ConverterGUI:
         
         return True
     
+    def job_args(self, input_file, output_file):
+        """Same options as the command line, passed straight to convert_to_fp8_scaled."""
+        return {
+            "input_file": input_file,
+            "output_file": output_file,
+            "t5xxl": self.t5xxl_var.get(),
+            "keep_distillation": self.keep_distillation_var.get(),
+            "calib_samples": self.calib_samples_var.get(),
+            "journal": self.journal_var.get(),
+            "num_iter": self.num_iter_var.get(),
+            "solver": self.solver_var.get(),
+            "time_budget": self.time_budget_var.get() * 60 or None,
+        }
+    
+    def add_job(self, input_file, output_file):
+        """Queues a job with a snapshot of the current options."""
+        item = self.queue_tree.insert("", tk.END, values=("queued", input_file, output_file))
+        self.queued_jobs.append({"item": item, "args": self.job_args(input_file, output_file), "status": "queued"})
+    
+    def add_current_job(self):
+        if self.validate_inputs():
+            self.add_job(self.input_path.get(), self.output_path.get())
+    
+    def add_job_files(self):
+        filenames = filedialog.askopenfilenames(
+            title="Select input safetensors files",
+            filetypes=[("Safetensors files", "*.safetensors"), ("All files", "*.*")]
+        )
+        distill_str = "_nodistill" if self.keep_distillation_var.get() else ""
+        for filename in filenames:
+            self.add_job(filename, f"{os.path.splitext(filename)[0]}_float8_e4m3fn_scaled_learned{distill_str}_svd.safetensors")
+    
+    def remove_jobs(self):
+        selected = set(self.queue_tree.selection())
+        for job in [job for job in self.queued_jobs if job["item"] in selected and job["status"] not in ("submitted", "running")]:
+            self.queue_tree.delete(job["item"])
+            self.queued_jobs.remove(job)
+    
+    def clear_finished_jobs(self):
+        for job in [job for job in self.queued_jobs if job["status"] in ("done", "failed", "cancelled")]:
+            self.queue_tree.delete(job["item"])
+            self.queued_jobs.remove(job)
+    
+    def set_job_status(self, job, status):
+        job["status"] = status
+        self.queue_tree.set(job["item"], "status", status)
+    
     def start_conversion(self):
-        if not self.validate_inputs():
-            return
-        
         if self.is_running:
             messagebox.showwarning("Warning", "Conversion is already running!")
             return
         
+        # Without queued jobs, convert the file selected above
+        if not any(job["status"] == "queued" for job in self.queued_jobs):
+            if not self.validate_inputs():
+                return
+            self.add_job(self.input_path.get(), self.output_path.get())
+        pending = [job for job in self.queued_jobs if job["status"] == "queued"]
+        # Ids are only allocated here on the Tk thread, so plans and jobs never share one
+        for job in pending:
+            self.set_job_status(job, "submitted")
+            self.job_id += 1
+            job["id"] = self.job_id
+            self.active_jobs[job["id"]] = job
+        
         # Clear log and start
         self.clear_log()
         self.is_running = True
+        self.failed_jobs = 0
+        self.submitted_jobs = len(pending)
         self.convert_button.config(state="disabled")
         self.stop_button.config(state="normal")
         self.progress.start()
         self.progress_var.set("Converting...")
         
-        # Start conversion in separate thread
-        self.conversion_thread = threading.Thread(target=self.run_conversion, daemon=True)
+        # The worker is only ever started here and in request_plan, both on the Tk thread, so there is one at a time
+        if not self.ensure_worker():
+            self.fail_active_jobs()
+            return
+        
+        # Submit the jobs from a separate thread
+        self.conversion_thread = threading.Thread(target=self.run_conversion, args=(pending,), daemon=True)
         self.conversion_thread.start()
     
-    def run_conversion(self):
+    def request_plan(self):
+        """Asks the worker for a header-only plan of the selected input with the current options."""
+        if not self.input_path.get() or not os.path.exists(self.input_path.get()):
+            messagebox.showerror("Error", "Please select an existing input file.")
+            return
+        if not self.ensure_worker():
+            return
+        self.job_id += 1
+        self.plan_id = self.job_id
+        args = {
+            "input_file": self.input_path.get(),
+            "t5xxl": self.t5xxl_var.get(),
+            "keep_distillation": self.keep_distillation_var.get(),
+            "num_iter": self.num_iter_var.get(),
+            "solver": self.solver_var.get(),
+        }
+        self.progress_var.set("Planning...")
+        if not self.send_to_worker("plan", id=self.plan_id, args=args):
+            messagebox.showerror("Plan Error", "Conversion worker is not running.")
+    
+    def show_plan(self, plan):
+        if not self.is_running:
+            self.progress_var.set("Ready")
+        totals = plan["totals"]
+        window = tk.Toplevel(self.root)
+        window.title(f"Conversion Plan - {os.path.basename(plan['input'])}")
+        window.geometry("760x480")
+        window.columnconfigure(0, weight=1)
+        window.rowconfigure(1, weight=1)
+        
+        actions = ", ".join(f"{count} {action}" for action, count in sorted(totals["actions"].items()))
+        calibration = f"from {plan['cost_model']['samples']} measured tensors" if plan["cost_model"]["calibrated"] else "uncalibrated, improves after a conversion"
+        summary = (f"{actions}\n"
+                   f"Output size: {totals['output_bytes'] / 1024**3:.2f} GiB    Peak memory (est.): {totals['peak_memory_bytes'] / 1024**3:.2f} GiB\n"
+                   f"Estimated time: {totals['seconds'] / 60:.1f} min ({calibration})")
+        if totals["read_bytes"] > totals["input_bytes"]:
+            summary += f"\nTiled weights are read several times: up to {totals['read_bytes'] / 1024**3:.2f} GiB read from disk"
+        ttk.Label(window, text=summary, padding="10", justify=tk.LEFT).grid(row=0, column=0, sticky=tk.W)
+        
+        tree = ttk.Treeview(window, columns=("action", "shape", "size", "seconds", "key"), show="headings")
+        for column, text, width in (("action", "Action", 120), ("shape", "Shape", 110), ("size", "Out MiB", 70), ("seconds", "Est. s", 60), ("key", "Tensor", 380)):
+            tree.heading(column, text=text)
+            tree.column(column, width=width, stretch=column == "key")
+        for entry in plan["tensors"]:
+            shape = "x".join(str(dim) for dim in entry["shape"])
+            tree.insert("", tk.END, values=(entry["action"], shape, f"{entry['bytes_out'] / 1024**2:.2f}", f"{entry['seconds']:.2f}", entry["key"]))
+        scrollbar = ttk.Scrollbar(window, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), padx=(10, 0), pady=(0, 10))
+        scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S), padx=(0, 10), pady=(0, 10))
+    
+    def ensure_worker(self):
+        """
+        Starts the conversion worker on first use; it stays alive (torch already imported) for later runs.
+        Only call it on the Tk thread.
+        """
+        if self.worker is not None and self.worker.poll() is None:
+            return True
+        worker_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fp8_conversion_worker.py")
+        if not os.path.exists(worker_path):
+            self.output_queue.put(("ERROR", f"Cannot find script: {worker_path}"))
+            return False
+        self.worker = subprocess.Popen(
+            [sys.executable, worker_path],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=0,
+            cwd=os.path.dirname(worker_path),
+            env={**os.environ, "PYTHONUNBUFFERED": "1"}
+        )
+        threading.Thread(target=self.read_worker_messages, args=(self.worker,), daemon=True).start()
+        threading.Thread(target=self.read_process_output, args=(self.worker.stderr,), daemon=True).start()
+        return True
+    
+    def send_to_worker(self, message_type, **fields):
+        if self.worker is None or self.worker.poll() is not None:
+            return False
         try:
-            # Find the original script
-            script_path = "convert_fp8_scaled_learned_svd_fast.py"
-            if not os.path.exists(script_path):
-                self.output_queue.put(("ERROR", f"Cannot find script: {script_path}"))
-                return
-            
-            # Build command
-            cmd = [
-                sys.executable, script_path,
-                "--input", self.input_path.get(),
-                "--output", self.output_path.get(),
-                "--calib_samples", str(self.calib_samples_var.get()),
-                "--num_iter", str(self.num_iter_var.get())
-            ]
-            
-            if self.t5xxl_var.get():
-                cmd.append("--t5xxl")
-            
-            if self.keep_distillation_var.get():
-                cmd.append("--keep_distillation")
-            
-            self.output_queue.put(("LOG", f"Running command: {' '.join(cmd)}"))
-            
-            # Run the process
-            self.process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
-                universal_newlines=True
-            )
-            
-            # Read output line by line
-            while True:
-                if self.process.poll() is not None:
-                    break
-                
-                line = self.process.stdout.readline()
-                if line:
-                    self.output_queue.put(("LOG", line.rstrip()))
-            
-            # Get any remaining output
-            remaining_output = self.process.stdout.read()
-            if remaining_output:
-                for line in remaining_output.splitlines():
-                    if line.strip():
-                        self.output_queue.put(("LOG", line))
-            
-            # Check return code
-            return_code = self.process.returncode
-            if return_code == 0:
-                self.output_queue.put(("SUCCESS", "Conversion completed successfully!"))
-            else:
-                self.output_queue.put(("ERROR", f"Conversion failed with return code: {return_code}"))
+            self.worker.stdin.write((json.dumps({"type": message_type, **fields}) + "\n").encode("utf-8"))
+            self.worker.stdin.flush()
+            return True
+        except OSError:
+            return False
+    
+    def shutdown_worker(self):
+        if self.worker is None:
+            return
+        self.send_to_worker("shutdown")
+        try:
+            self.worker.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.worker.kill()
+        self.worker = None
+    
+    def run_conversion(self, pending):
+        try:
+            # The worker runs the jobs one after another, sharing calibration statistics and principal vectors
+            for job in pending:
+                self.output_queue.put(("LOG", f"Submitting job {job['id']}: {job['args']['input_file']} -> {job['args']['output_file']}"))
+                if not self.send_to_worker("convert", id=job["id"], args=job["args"]):
+                    self.output_queue.put(("ERROR", "Conversion worker is not running."))
+                    self.fail_active_jobs()
+                    return
                 
         except Exception as e:
             self.output_queue.put(("ERROR", f"Error during conversion: {str(e)}"))
-        finally:
+            self.fail_active_jobs()
+    
+    def finish_job(self, job, status):
+        if job.get("log_file") is not None:
+            self.log_file = None
+            job["log_file"].close()
+            job["log_file"] = None
+        if status == "failed":
+            self.failed_jobs += 1
+        self.output_queue.put(("JOB", (job, status)))
+        self.active_jobs.pop(job.get("id"), None)
+        if not self.active_jobs:
+            total = self.submitted_jobs
+            if self.failed_jobs:
+                self.output_queue.put(("ERROR", f"{self.failed_jobs} of {total} conversions failed, see the log for details."))
+            elif status == "done":
+                self.output_queue.put(("SUCCESS", "Conversion completed successfully!" if total <= 1 else f"All {total} conversions completed successfully!"))
             self.output_queue.put(("DONE", ""))
     
-    def stop_conversion(self):
-        if self.process and self.process.poll() is None:
+    def fail_active_jobs(self):
+        jobs = list(self.active_jobs.values())
+        for job in jobs:
+            self.finish_job(job, "failed")
+        if not jobs:
+            self.output_queue.put(("DONE", ""))
+    
+    def write_log_file(self, text):
+        if self.log_file is not None:
+            self.log_file.write(text + "\n")
+    
+    def read_worker_messages(self, worker):
+        """Maps the worker's JSON-line protocol onto the UI queue until the worker exits."""
+        for line in worker.stdout:
             try:
-                self.process.terminate()
-                self.log_message("Conversion stopped by user.")
-            except:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            msg_type = message.get("type")
+            if msg_type == "ready":
+                self.output_queue.put(("LOG", f"Conversion worker ready (pid {message.get('pid')})."))
+                continue
+            if message.get("id") == self.plan_id:
+                if msg_type == "plan":
+                    self.output_queue.put(("PLAN", message["plan"]))
+                elif msg_type == "error":
+                    self.output_queue.put(("PLAN_ERROR", message.get("message", "Cannot plan.")))
+                continue
+            job = self.active_jobs.get(message.get("id"))
+            if job is None:
+                continue # Late output from a job the UI no longer tracks
+            if msg_type == "started":
+                log_path = f"{job['args']['output_file']}.log"
                 try:
-                    self.process.kill()
-                    self.log_message("Conversion forcefully stopped.")
-                except:
-                    pass
+                    job["log_file"] = self.log_file = open(log_path, "w", encoding="utf-8")
+                    self.output_queue.put(("LOG", f"Full log: {log_path}"))
+                except OSError:
+                    job["log_file"] = self.log_file = None
+                self.output_queue.put(("JOB", (job, "running")))
+            elif msg_type == "log":
+                self.output_queue.put(("LOG", message["text"]))
+                self.write_log_file(message["text"])
+            elif msg_type == "progress":
+                self.output_queue.put(("PROGRESS", message["text"]))
+            elif msg_type == "event":
+                record = message.get("record", {})
+                if record.get("event") == "tensor":
+                    self.output_queue.put(("STATUS", f"Converting {record.get('index')}/{record.get('total')}: {record.get('key')}"))
+            elif msg_type == "done":
+                seconds = message.get("summary", {}).get("seconds", 0)
+                self.output_queue.put(("LOG", f"Job {job['id']} finished in {seconds:.1f}s: {job['args']['output_file']}"))
+                self.finish_job(job, "done")
+            elif msg_type == "cancelled":
+                self.output_queue.put(("LOG", f"Job {job['id']} stopped by user."))
+                self.write_log_file("Conversion stopped by user.")
+                self.finish_job(job, "cancelled")
+            elif msg_type == "error":
+                if message.get("traceback"):
+                    self.write_log_file(message["traceback"])
+                self.output_queue.put(("LOG", f"ERROR: job {job['id']}: {message.get('message', 'Conversion failed.')}"))
+                self.finish_job(job, "failed")
+        
+        # Worker exited (crash or shutdown); a fresh one is started for the next run
+        if self.active_jobs and worker is self.worker:
+            self.output_queue.put(("LOG", f"ERROR: Conversion worker exited unexpectedly (code {worker.wait()})."))
+            self.fail_active_jobs()
+    
+    def read_process_output(self, stream):
+        """
+        Blocks on the worker's stderr (output not routed through the protocol) until EOF. Complete lines are queued as LOG (and written to the log file),
+        segments ended by a bare carriage return are tqdm refreshes and are queued as PROGRESS, which the UI shows in place.
+        """
+        pending = b""
+        while True:
+            chunk = stream.read(65536)
+            if not chunk:
+                break
+            pending += chunk
+            start = 0
+            for match in LINE_END.finditer(pending):
+                if match.group() == b"\r" and match.end() == len(pending):
+                    break # May be the first half of a \r\n split across reads
+                text = pending[start:match.start()].decode("utf-8", errors="replace")
+                start = match.end()
+                if match.group() == b"\r":
+                    if text.strip():
+                        self.output_queue.put(("PROGRESS", text))
+                else:
+                    self.output_queue.put(("LOG", text))
+                    if self.log_file is not None:
+                        self.log_file.write(text + "\n")
+            pending = pending[start:]
+        if pending.strip():
+            text = pending.decode("utf-8", errors="replace").rstrip("\r")
+            self.output_queue.put(("LOG", text))
+            if self.log_file is not None:
+                self.log_file.write(text + "\n")
+    
+    def stop_conversion(self):
+        # Cooperative: the worker stops at the next tensor or iteration (queued jobs are dropped) and stays alive for the next run
+        cancelled = [self.send_to_worker("cancel", id=job_id) for job_id in list(self.active_jobs)]
+        if self.is_running and cancelled and all(cancelled):
+            self.stop_button.config(state="disabled")
+            self.progress_var.set("Stopping...")
+            return
         
         self.is_running = False
         self.convert_button.config(state="normal")
@@ -310,30 +608,54 @@ class FP8ConverterGUI:
         self.progress_var.set("Stopped")
     
     def check_output_queue(self):
+        # Drain in batches: collect lines for one widget update, keep only the newest progress refresh,
+        # and stop after QUEUE_DRAIN_BUDGET so a flood of output can't starve the UI.
+        lines = []
+        progress_line = None
+        deadline = time.monotonic() + QUEUE_DRAIN_BUDGET
         try:
-            while True:
+            while time.monotonic() < deadline:
                 msg_type, message = self.output_queue.get_nowait()
                 
                 if msg_type == "LOG":
-                    self.log_message(message)
-                elif msg_type == "ERROR":
-                    self.log_message(f"ERROR: {message}")
-                    messagebox.showerror("Conversion Error", message)
-                elif msg_type == "SUCCESS":
-                    self.log_message(message)
-                    messagebox.showinfo("Success", message)
-                elif msg_type == "DONE":
-                    self.is_running = False
-                    self.convert_button.config(state="normal")
-                    self.stop_button.config(state="disabled")
-                    self.progress.stop()
-                    self.progress_var.set("Ready")
+                    lines.append(message)
+                    progress_line = None
+                elif msg_type == "PROGRESS":
+                    progress_line = message
+                elif msg_type == "PLAN":
+                    self.show_plan(message)
+                elif msg_type == "PLAN_ERROR":
+                    messagebox.showerror("Plan Error", message)
+                elif msg_type == "JOB":
+                    self.set_job_status(*message)
+                elif msg_type == "STATUS":
+                    if self.progress_var.get() != "Stopping...":
+                        self.progress_var.set(message)
+                else:
+                    self.append_log(lines)
+                    lines = []
+                    progress_line = None
+                    if msg_type == "ERROR":
+                        self.log_message(f"ERROR: {message}")
+                        messagebox.showerror("Conversion Error", message)
+                    elif msg_type == "SUCCESS":
+                        self.log_message(message)
+                        messagebox.showinfo("Success", message)
+                    elif msg_type == "DONE":
+                        self.is_running = False
+                        self.convert_button.config(state="normal")
+                        self.stop_button.config(state="disabled")
+                        self.progress.stop()
+                        self.progress_var.set("Ready")
                     
         except queue.Empty:
             pass
         
+        if lines or progress_line is not None:
+            self.append_log(lines, progress_line)
+        
         # Schedule next check
-        self.root.after(100, self.check_output_queue)
+        self.root.after(QUEUE_POLL_MS, self.check_output_queue)
 
 def main():
     # Try to set a modern theme
@@ -360,8 +682,10 @@ def main():
         if app.is_running:
             if messagebox.askokcancel("Quit", "Conversion is running. Do you want to stop it and quit?"):
                 app.stop_conversion()
+                app.shutdown_worker()
                 root.destroy()
         else:
+            app.shutdown_worker()
             root.destroy()
     
     root.protocol("WM_DELETE_WINDOW", on_closing)
@@ -0,0 +1,14 @@
+import os
+import sys
+
+import pytest
+
+# The scripts live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def no_progress_bars(monkeypatch):
+    """Conversions under test run without tqdm bars; the module global is restored after every test."""
+    import convert_fp8_scaled_learned_svd_fast as converter_module
+    monkeypatch.setattr(converter_module, "SHOW_PROGRESS", False)
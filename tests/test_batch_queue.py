@@ -0,0 +1,47 @@
+import json
+import os
+
+import torch
+from safetensors.torch import save_file
+
+import convert_fp8_scaled_learned_svd_fast as converter_module
+
+
+def _save_model(path, seed):
+    generator = torch.Generator().manual_seed(seed)
+    save_file({"fc.weight": torch.randn(32, 16, generator=generator), "fc.bias": torch.randn(32, generator=generator)}, path)
+
+
+def test_expand_inputs_prefers_shard_indexes(tmp_path):
+    for name in ("a.safetensors", "b.safetensors", "model-00001-of-00001.safetensors"):
+        (tmp_path / name).write_bytes(b"")
+    index = tmp_path / "model.safetensors.index.json"
+    index.write_text(json.dumps({"weight_map": {"fc.weight": "model-00001-of-00001.safetensors"}}))
+    paths = converter_module.expand_inputs([str(tmp_path), str(tmp_path / "a.*")])
+    assert paths == [str(index), str(tmp_path / "a.safetensors"), str(tmp_path / "b.safetensors")]
+
+
+def test_concurrent_batch_converts_every_job(tmp_path):
+    jobs = []
+    for i in range(3):
+        source = str(tmp_path / f"model_{i}.safetensors")
+        _save_model(source, i)
+        jobs.append({"input": source, "output": str(tmp_path / "out" / f"model_{i}_fp8.safetensors"), "t5xxl": False, "keep_distillation": False})
+    jobs.append({"input": str(tmp_path / "missing.safetensors"), "output": str(tmp_path / "out" / "missing_fp8.safetensors"), "t5xxl": False, "keep_distillation": False})
+    report = str(tmp_path / "report.json")
+    result = converter_module.run_batch(jobs, max_jobs=2, report=report, calib_samples=64, num_iter=5, principal="power")
+    assert [job["status"] for job in result] == ["done", "done", "done", "failed"]
+    for job in result[:3]:
+        assert os.path.exists(job["output"]) and os.path.exists(job["output"] + ".log")
+        assert job["summary"]["principal"]["cache_hits"] == 0
+    with open(report, "r", encoding="utf-8") as fh:
+        assert [job["status"] for job in json.load(fh)["jobs"]] == ["done", "done", "done", "failed"]
+    assert converter_module.SHOW_PROGRESS is False # Restored after the concurrent jobs
+
+
+def test_jobs_share_principal_vectors(tmp_path):
+    source = str(tmp_path / "model.safetensors")
+    _save_model(source, 0)
+    jobs = [{"input": source, "output": str(tmp_path / f"out_{i}.safetensors"), "t5xxl": False, "keep_distillation": False} for i in range(2)]
+    result = converter_module.run_batch(jobs, calib_samples=64, num_iter=5, principal="power")
+    assert [job["summary"]["principal"]["cache_hits"] for job in result] == [0, 1]
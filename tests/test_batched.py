@@ -0,0 +1,26 @@
+import torch
+
+import convert_fp8_scaled_learned_svd_fast as converter_module
+
+
+def test_batch_matches_one_at_a_time():
+    generator = torch.Generator().manual_seed(0)
+    weights = [torch.randn(64, 32, generator=generator) for _ in range(3)] + [torch.zeros(64, 32)]
+    single = converter_module.LearnedRoundingConverter(num_iter=100, principal="power")
+    expected, expected_stats = [], []
+    for W in weights:
+        expected.append(single.convert(W))
+        expected_stats.append(single.last_stats)
+    batched = converter_module.LearnedRoundingConverter(num_iter=100, principal="power")
+    results = batched.convert_batch(weights)
+
+    assert len(results) == len(weights)
+    for (W_f8, scale, W_dq), (ref_f8, ref_scale, _), stats, ref_stats in zip(results, expected, batched.last_stats, expected_stats):
+        assert W_f8.dtype == converter_module.TARGET_FP8_DTYPE
+        assert torch.equal(scale, ref_scale)
+        assert torch.equal(W_dq, W_f8.to(converter_module.COMPUTE_DTYPE) * scale)
+        assert stats["iterations"] == ref_stats["iterations"]
+        # Power iteration warm starts differ between the two orders, so a few codes may round the other way
+        assert (W_f8.view(torch.uint8) != ref_f8.view(torch.uint8)).float().mean().item() < 0.01
+        assert stats["final_loss"] <= stats["initial_loss"] * 1e-2
+    assert batched.last_stats[-1]["iterations"] == 0 # The all-zero tensor is not optimized
@@ -0,0 +1,22 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_benchmark_writes_per_phase_results(tmp_path):
+    output = str(tmp_path / "results.json")
+    env = {**os.environ, "HOME": str(tmp_path)} # The converter's cost model would live under ~/.cache
+    subprocess.run([sys.executable, os.path.join(ROOT, "benchmark_fp8_conversion.py"), "--blocks", "1", "--hidden", "32",
+                    "--num_iter", "5", "--calib_samples", "64", "--solver", "dense", "closed_form", "--principal", "power",
+                    "--workdir", str(tmp_path / "work"), "--output", output], check=True, env=env, cwd=ROOT, capture_output=True)
+    with open(output, "r", encoding="utf-8") as fh:
+        result = json.load(fh)
+    assert result["model"]["tensors"] > 0
+    assert [(run["solver"], run["principal"]) for run in result["runs"]] == [("dense", "power"), ("closed_form", "power")]
+    for run in result["runs"]:
+        assert run["wall_seconds"] > 0 and run["output_bytes"] > 0
+        assert "refine" in run["phases"] and "save" in run["phases"]
+    assert not os.path.exists(tmp_path / ".cache")
@@ -0,0 +1,26 @@
+import pytest
+import torch
+
+import convert_fp8_scaled_learned_svd_fast as converter_module
+
+
+def test_mean_input_gives_the_calibration_matrix_correction():
+    generator = torch.Generator().manual_seed(0)
+    X = torch.randn(512, 32, generator=generator)
+    W = torch.randn(16, 32, generator=generator)
+    W_dq = W + torch.randn(16, 32, generator=generator) * 1e-2
+    bias = torch.randn(16, generator=generator)
+    stats = converter_module.CalibrationStats.from_samples(X)
+    new_bias = converter_module.correct_bias("fc.bias", bias, W, W_dq, stats)
+    # The original correction: mean over the samples of X_n @ (W - W_dq).T
+    expected = bias - (X @ (W - W_dq).T).mean(dim=0)
+    assert torch.allclose(new_bias, expected, atol=1e-6)
+    assert new_bias.dtype == bias.dtype
+
+
+def test_random_statistics_are_seeded_per_dimension():
+    first = converter_module.CalibrationStats.random(64, 256, seed=0)
+    assert torch.equal(first.mean, converter_module.CalibrationStats.random(64, 256, seed=0).mean)
+    assert not torch.equal(first.mean, converter_module.CalibrationStats.random(64, 256, seed=1).mean)
+    # The mean of 256 standard normal samples has a standard deviation of 1/16
+    assert first.mean.std().item() == pytest.approx(1 / 16, rel=0.5)
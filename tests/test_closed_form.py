@@ -0,0 +1,31 @@
+import pytest
+import torch
+
+import convert_fp8_scaled_learned_svd_fast as converter_module
+
+
+def _projected_loss(W, W_dq, U_k, Vh_k):
+    return (U_k.T @ (W_dq - W) @ Vh_k.T).item() ** 2
+
+
+def test_closed_form_lowers_projected_loss_below_rtn():
+    W = torch.randn(256, 128, generator=torch.Generator().manual_seed(0))
+    converter = converter_module.LearnedRoundingConverter(num_iter=100, solver="closed_form", principal="power")
+    W_f8, dequant_scale, W_dq = converter.convert(W)
+    assert W_f8.dtype == converter_module.TARGET_FP8_DTYPE
+    assert torch.equal(W_dq, W_f8.to(converter_module.COMPUTE_DTYPE) * dequant_scale)
+    U_k, Vh_k = converter.principal.top_vectors(W)
+    W_rtn = (W / dequant_scale).to(converter_module.TARGET_FP8_DTYPE).to(converter_module.COMPUTE_DTYPE) * dequant_scale
+    assert _projected_loss(W, W_dq, U_k, Vh_k) < _projected_loss(W, W_rtn, U_k, Vh_k)
+
+
+def test_closed_form_matches_dense_loop():
+    W = torch.randn(128, 64, generator=torch.Generator().manual_seed(1))
+    dense = converter_module.LearnedRoundingConverter(num_iter=200, solver="dense", principal="power")
+    closed_form = converter_module.LearnedRoundingConverter(num_iter=200, solver="closed_form", principal="power")
+    dense.convert(W)
+    closed_form.convert(W)
+    assert closed_form.last_stats["initial_loss"] == pytest.approx(dense.last_stats["initial_loss"], rel=1e-5)
+    # Both leave a tiny fraction of the RtN loss; the rounding of the last step decides which one is lower
+    assert closed_form.last_stats["final_loss"] < closed_form.last_stats["initial_loss"] * 1e-2
+    assert closed_form.last_stats["final_loss"] <= dense.last_stats["final_loss"] * 2
@@ -0,0 +1,23 @@
+import torch
+from safetensors.torch import save_file
+
+import convert_fp8_scaled_learned_svd_fast as converter_module
+
+
+def test_library_calls_leave_the_cost_model_alone(tmp_path, monkeypatch):
+    saved = []
+    monkeypatch.setattr(converter_module.CostModel, "save", lambda self: saved.append(self.path))
+    source = str(tmp_path / "model.safetensors")
+    save_file({"fc.weight": torch.randn(16, 8)}, source)
+    summary = converter_module.convert_to_fp8_scaled(source, str(tmp_path / "out.safetensors"), False, False, 64, num_iter=5)
+    assert summary is not None
+    assert saved == []
+
+
+def test_cost_model_is_updated_when_given(tmp_path):
+    source = str(tmp_path / "model.safetensors")
+    save_file({"fc.weight": torch.randn(16, 8)}, source)
+    path = str(tmp_path / "cost_model.json")
+    converter_module.convert_to_fp8_scaled(source, str(tmp_path / "out.safetensors"), False, False, 64, num_iter=5, cost_model=path)
+    model = converter_module.CostModel(path)
+    assert model.samples(converter_module.CostModel.optimize_kind("dense", "pca", "cpu")) == 1
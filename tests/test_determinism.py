@@ -0,0 +1,54 @@
+import pytest
+import torch
+from safetensors.torch import load_file, save_file
+
+import convert_fp8_scaled_learned_svd_fast as converter_module
+
+
+@pytest.fixture
+def deterministic():
+    previous = torch.are_deterministic_algorithms_enabled()
+    converter_module.enable_determinism(torch.get_num_threads())
+    yield
+    torch.use_deterministic_algorithms(previous)
+
+
+@pytest.fixture
+def model(tmp_path):
+    generator = torch.Generator().manual_seed(0)
+    tensors = {}
+    for i in range(3): # Same shapes, so --batch_size groups them
+        tensors[f"blocks.{i}.fc.weight"] = torch.randn(96, 64, generator=generator).to(torch.bfloat16)
+        tensors[f"blocks.{i}.fc.bias"] = torch.randn(96, generator=generator).to(torch.bfloat16)
+    tensors["head.weight"] = torch.randn(32, 96, generator=generator).to(torch.bfloat16)
+    path = str(tmp_path / "model.safetensors")
+    save_file(tensors, path)
+    return path
+
+
+def _convert(model, output, **kwargs):
+    summary = converter_module.convert_to_fp8_scaled(model, output, False, False, 256, num_iter=60, seed=0, cost_model=None, **kwargs)
+    assert summary is not None
+    with open(output, "rb") as fh:
+        return fh.read()
+
+
+def test_seeded_output_independent_of_grouping(tmp_path, model, deterministic):
+    reference = _convert(model, str(tmp_path / "reference.safetensors"))
+    assert _convert(model, str(tmp_path / "rerun.safetensors")) == reference
+    assert _convert(model, str(tmp_path / "batched.safetensors"), batch_size=3) == reference
+    assert _convert(model, str(tmp_path / "streaming.safetensors"), streaming=True) == reference
+    assert _convert(model, str(tmp_path / "workers.safetensors"), workers=2) == reference
+
+
+def test_derive_seed_is_stable_and_distinct():
+    assert converter_module.derive_seed(0, "a") == converter_module.derive_seed(0, "a")
+    assert converter_module.derive_seed(0, "a") != converter_module.derive_seed(1, "a")
+    assert converter_module.derive_seed(0, "a") != converter_module.derive_seed(0, "b")
+
+
+def test_marker_has_defined_contents(tmp_path, model):
+    output = str(tmp_path / "out.safetensors")
+    _convert(model, output)
+    marker = load_file(output)["scaled_fp8"]
+    assert marker.view(torch.uint8).tolist() == [0, 0]
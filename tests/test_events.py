@@ -0,0 +1,36 @@
+import json
+import math
+
+import torch
+from safetensors.torch import save_file
+
+import convert_fp8_scaled_learned_svd_fast as converter_module
+
+
+def test_event_stream_records_every_tensor(tmp_path):
+    source = str(tmp_path / "model.safetensors")
+    save_file({"a.weight": torch.randn(16, 8), "a.bias": torch.randn(16), "b.weight": torch.randn(8, 16), "norm.weight": torch.randn(8)}, source)
+    events = str(tmp_path / "events.jsonl")
+    summary = converter_module.convert_to_fp8_scaled(source, str(tmp_path / "out.safetensors"), False, False, 64, num_iter=5, events=events)
+    with open(events, "r", encoding="utf-8") as fh:
+        records = [json.loads(line) for line in fh]
+    assert [record["event"] for record in records] == ["start", "tensor", "tensor", "tensor", "summary"]
+    assert all("time" in record for record in records)
+    assert records[0]["weights"] == 3 and records[0]["to_optimize"] == 2
+    tensors = {record["key"]: record for record in records[1:-1]}
+    assert tensors["norm.weight"]["action"] == "cast"
+    assert tensors["a.weight"]["action"] == "quantize"
+    assert [tensors[key]["index"] for key in sorted(tensors)] == [1, 2, 3]
+    assert tensors["a.weight"]["final_loss"] <= tensors["a.weight"]["initial_loss"]
+    assert "refine" in tensors["a.weight"]["phases"]
+    assert records[-1]["final_tensors"] == summary["final_tensors"]
+
+
+def test_non_finite_floats_are_written_as_null(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    stream = converter_module.EventStream(path)
+    stream.emit("tensor", loss=math.nan, values=[1.0, math.inf])
+    stream.close()
+    with open(path, "r", encoding="utf-8") as fh:
+        record = json.loads(fh.readline())
+    assert record["loss"] is None and record["values"] == [1.0, None]
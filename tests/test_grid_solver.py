@@ -0,0 +1,24 @@
+import torch
+
+import convert_fp8_scaled_learned_svd_fast as converter_module
+
+
+def test_other_neighbour_brackets_value_on_grid():
+    torch.manual_seed(0)
+    W_scaled = torch.randn(64, 32) * 100
+    W_scaled[0, :4] = torch.tensor([0.0, 1e-4, -1e-4, 448.0])
+    W_rounded = W_scaled.to(converter_module.TARGET_FP8_DTYPE).float()
+    alt = converter_module.fp8_other_neighbour(W_rounded, W_scaled)
+    low, high = torch.minimum(alt, W_rounded), torch.maximum(alt, W_rounded)
+    assert bool(((low <= W_scaled) & (W_scaled <= high)).all())
+    assert torch.equal(alt.to(converter_module.TARGET_FP8_DTYPE).float(), alt)
+
+
+def test_grid_solver_lowers_projected_loss_below_rtn():
+    torch.manual_seed(0)
+    W = torch.randn(256, 128)
+    converter = converter_module.LearnedRoundingConverter(num_iter=100, solver="grid")
+    _, _, W_dq = converter.convert(W)
+    assert converter.last_stats["final_loss"] < converter.last_stats["initial_loss"]
+    U_k, Vh_k = converter.principal.top_vectors(W)
+    assert (U_k.T @ (W_dq - W) @ Vh_k.T).item() ** 2 <= converter.last_stats["final_loss"] * 1.01 + 1e-9
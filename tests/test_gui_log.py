@@ -0,0 +1,33 @@
+import queue
+
+import pytest
+
+gui = pytest.importorskip("fp8_tppec_learned__fast_gui") # Needs tkinter, not a display
+
+
+class ChunkedStream:
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+
+    def read(self, size):
+        return self.chunks.pop(0) if self.chunks else b""
+
+
+def _read(chunks):
+    app = gui.FP8ConverterGUI.__new__(gui.FP8ConverterGUI) # Only the reader's state, no widgets
+    app.output_queue = queue.Queue()
+    app.log_file = None
+    app.read_process_output(ChunkedStream(chunks))
+    items = []
+    while not app.output_queue.empty():
+        items.append(app.output_queue.get())
+    return items
+
+
+def test_lines_and_progress_refreshes_are_told_apart():
+    items = _read([b"first line\nstep 1/3\rstep 2/3\r", b"\nsecond line\r", b"\nlast"])
+    assert items == [("LOG", "first line"), ("PROGRESS", "step 1/3"), ("LOG", "step 2/3"), ("LOG", "second line"), ("LOG", "last")]
+
+
+def test_crlf_split_across_reads_is_one_line_end():
+    assert _read([b"windows line\r", b"\nnext\r\n"]) == [("LOG", "windows line"), ("LOG", "next")]
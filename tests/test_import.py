@@ -0,0 +1,11 @@
+import importlib
+
+
+def test_converter_imports():
+    module = importlib.import_module("convert_fp8_scaled_learned_svd_fast")
+    assert module.DEFAULT_COST_MODEL.endswith("cost_model.json")
+
+
+def test_tools_import():
+    for name in ("fp8_conversion_worker", "diff_fp8_outputs", "benchmark_fp8_conversion"):
+        importlib.import_module(name)
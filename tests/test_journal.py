@@ -0,0 +1,62 @@
+import os
+import threading
+
+import pytest
+import torch
+from safetensors.torch import save_file
+
+import convert_fp8_scaled_learned_svd_fast as converter_module
+
+
+@pytest.fixture
+def model(tmp_path):
+    generator = torch.Generator().manual_seed(0)
+    tensors = {}
+    for i in range(4):
+        tensors[f"blocks.{i}.fc.weight"] = torch.randn(48, 32, generator=generator).to(torch.bfloat16)
+        tensors[f"blocks.{i}.fc.bias"] = torch.randn(48, generator=generator).to(torch.bfloat16)
+    path = str(tmp_path / "model.safetensors")
+    save_file(tensors, path)
+    return path
+
+
+def _convert(model, output, **kwargs):
+    return converter_module.convert_to_fp8_scaled(model, output, False, False, 128, num_iter=20, seed=0, journal=True, **kwargs)
+
+
+def test_resume_after_cancel_matches_uninterrupted_run(tmp_path, model, monkeypatch, capsys):
+    reference = str(tmp_path / "reference.safetensors")
+    assert _convert(model, reference) is not None
+    assert not os.path.exists(reference + ".journal") # Removed once the output is complete
+
+    # Cancel once two weights are finished
+    cancel_event = threading.Event()
+    correct_bias = converter_module.correct_bias
+    corrected = []
+    def correct_then_cancel(*args, **kwargs):
+        corrected.append(args[0])
+        if len(corrected) == 2:
+            cancel_event.set()
+        return correct_bias(*args, **kwargs)
+    monkeypatch.setattr(converter_module, "correct_bias", correct_then_cancel)
+    output = str(tmp_path / "resumed.safetensors")
+    with pytest.raises(converter_module.ConversionCancelled):
+        _convert(model, output, cancel_event=cancel_event)
+    assert not os.path.exists(output)
+    assert os.path.isdir(output + ".journal")
+
+    capsys.readouterr()
+    assert _convert(model, output) is not None
+    assert capsys.readouterr().out.count("Restored from journal") == 2
+    with open(output, "rb") as a, open(reference, "rb") as b:
+        assert a.read() == b.read()
+
+
+def test_journal_with_other_settings_is_discarded(tmp_path, model, monkeypatch, capsys):
+    output = str(tmp_path / "out.safetensors")
+    journal = converter_module.ConversionJournal(output, {"num_iter": 1})
+    journal.record("blocks.0.fc.weight", "stale", {"blocks.0.fc.weight": torch.zeros(48, 32)})
+    assert _convert(model, output) is not None
+    out = capsys.readouterr().out
+    assert "Discarding journal" in out
+    assert "Restored from journal" not in out
@@ -0,0 +1,42 @@
+import pytest
+
+import convert_fp8_scaled_learned_svd_fast as converter_module
+
+MiB = 1024**2
+GiB = 1024**3
+
+
+def _header(rows, cols, count=2):
+    header = {}
+    offset = 0
+    for i in range(count):
+        nbytes = rows * cols * 2
+        header[f"blocks.{i}.fc.weight"] = {"dtype": "BF16", "shape": [rows, cols], "data_offsets": [offset, offset + nbytes]}
+        offset += nbytes
+    return header
+
+
+def _plan(governor, header, **overrides):
+    settings = dict(streaming=False, batch_size=1, workers=1, tile_size=None, pipeline_memory=512 * MiB)
+    settings.update(overrides)
+    return governor.plan(header, False, False, settings["streaming"], settings["batch_size"], settings["workers"], settings["tile_size"], settings["pipeline_memory"])
+
+
+def test_plan_rejects_budget_below_smallest_tiles():
+    governor = converter_module.MemoryGovernor(1 * GiB, baseline=1 * GiB)
+    with pytest.raises(converter_module.MemoryBudgetError, match="--max_memory"):
+        _plan(governor, _header(16384, 16384))
+
+
+def test_plan_never_tiles_below_minimum():
+    baseline = 512 * MiB
+    budget = baseline + converter_module.MIN_TILE_SIZE * converter_module.WORKING_SET_COPIES + 64 * MiB
+    governor = converter_module.MemoryGovernor(budget, baseline=baseline)
+    settings = _plan(governor, _header(16384, 16384))
+    assert settings["tile_size"] >= converter_module.MIN_TILE_SIZE
+
+
+def test_plan_keeps_settings_that_fit():
+    governor = converter_module.MemoryGovernor(64 * GiB, baseline=1 * GiB)
+    settings = _plan(governor, _header(256, 256))
+    assert settings["tile_size"] is None and not settings["streaming"] and settings["pipeline_memory"] == 512 * MiB
@@ -0,0 +1,25 @@
+import torch
+from safetensors.torch import save_file
+
+import convert_fp8_scaled_learned_svd_fast as converter_module
+
+
+def test_pipeline_does_not_change_the_output(tmp_path):
+    generator = torch.Generator().manual_seed(0)
+    tensors = {}
+    for i in range(4):
+        tensors[f"blocks.{i}.fc.weight"] = torch.randn(48, 32, generator=generator).to(torch.bfloat16)
+        tensors[f"blocks.{i}.fc.bias"] = torch.randn(48, generator=generator).to(torch.bfloat16)
+    tensors["blocks.0.norm.weight"] = torch.randn(32, generator=generator).to(torch.bfloat16)
+    source = str(tmp_path / "model.safetensors")
+    save_file(tensors, source)
+    outputs = []
+    for pipeline_memory in (0, 64 * 1024**2):
+        output = str(tmp_path / f"out_{pipeline_memory}.safetensors")
+        summary = converter_module.convert_to_fp8_scaled(source, output, False, False, 128, streaming=True, num_iter=20, seed=0,
+                                                         pipeline_memory=pipeline_memory)
+        assert ("pipeline" in summary) == bool(pipeline_memory)
+        with open(output, "rb") as fh:
+            outputs.append(fh.read())
+    assert outputs[0] == outputs[1]
+    assert summary["pipeline"]["writes"] > 0
@@ -0,0 +1,34 @@
+import os
+
+import torch
+from safetensors.torch import save_file
+
+import convert_fp8_scaled_learned_svd_fast as converter_module
+
+
+def test_plan_matches_the_conversion(tmp_path):
+    source = str(tmp_path / "model.safetensors")
+    save_file({"fc.weight": torch.randn(32, 16), "fc.bias": torch.randn(32), "norm.weight": torch.randn(16),
+               "pos_embed": torch.randn(4, 16).to(torch.bfloat16)}, source)
+    plan = converter_module.plan_conversion(source, False, False, num_iter=5, cost_model=None)
+    actions = {entry["key"]: entry["action"] for entry in plan["tensors"]}
+    assert actions == {"fc.weight": "optimize", "fc.bias": "bias_correction", "norm.weight": "cast", "pos_embed": "passthrough"}
+    assert plan["totals"]["seconds"] > 0
+    assert not plan["cost_model"]["calibrated"]
+
+    output = str(tmp_path / "out.safetensors")
+    summary = converter_module.convert_to_fp8_scaled(source, output, False, False, 64, num_iter=5)
+    assert summary is not None
+    _, data_start = converter_module.read_safetensors_header(output)
+    assert os.path.getsize(output) - data_start == plan["totals"]["output_bytes"] # Tensor data, without the header
+
+
+def test_cost_model_fit_recovers_a_linear_rate(tmp_path):
+    model = converter_module.CostModel(str(tmp_path / "cost_model.json"))
+    for x in (1e6, 2e6, 4e6):
+        model.add("copy", x, 0.5 + 2e-9 * x)
+    model.save()
+    reloaded = converter_module.CostModel(str(tmp_path / "cost_model.json"))
+    a, b = reloaded.coefficients("copy")
+    assert abs(a - 0.5) < 1e-6 and abs(b - 2e-9) < 1e-12
+    assert reloaded.samples("copy") == 3
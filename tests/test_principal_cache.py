@@ -0,0 +1,27 @@
+import torch
+
+import convert_fp8_scaled_learned_svd_fast as converter_module
+
+
+def test_cache_off_by_default():
+    engine = converter_module.PrincipalVectorEngine("power")
+    engine.top_vectors(torch.randn(32, 16))
+    assert engine.cache_size == 0
+    assert not engine.cache
+
+
+def test_jobs_share_results_but_not_engine_state():
+    caches = converter_module.ConversionCaches()
+    first = caches.engine_for(converter_module.PrincipalVectorEngine("power"))
+    second = caches.engine_for(converter_module.PrincipalVectorEngine("power"))
+    assert first is not second
+    assert first.cache is second.cache and first.lock is second.lock
+    W = torch.randn(32, 16)
+    first.top_vectors(W)
+    second.top_vectors(W.clone())
+    assert (first.cache_hits, second.cache_hits) == (0, 1)
+    assert (first.calls["power"], second.calls["power"]) == (1, 0)
+    assert second.warm_start == {}
+    assert caches.cached_vectors() == 1
+    other = caches.engine_for(converter_module.PrincipalVectorEngine("power", tol=1e-3))
+    assert other.cache is not first.cache
@@ -0,0 +1,37 @@
+import threading
+
+import torch
+from safetensors.torch import save_file
+
+import convert_fp8_scaled_learned_svd_fast as converter_module
+
+
+def test_attached_thread_records_into_shared_times():
+    profiler = converter_module.PhaseProfiler()
+    profiler.reset()
+    def work():
+        profiler.attach(state)
+        with profiler.phase("save"):
+            pass
+    state = profiler.state
+    thread = threading.Thread(target=work)
+    thread.start()
+    thread.join()
+    assert profiler.as_dict()["save"]["calls"] == 1
+
+
+def test_pipeline_io_reaches_run_profile(tmp_path):
+    source = str(tmp_path / "model.safetensors")
+    tensors = {}
+    for i in range(4):
+        tensors[f"blocks.{i}.fc.weight"] = torch.randn(32, 16)
+        tensors[f"blocks.{i}.fc.bias"] = torch.randn(32)
+    save_file(tensors, source)
+    summary = converter_module.convert_to_fp8_scaled(source, str(tmp_path / "out.safetensors"), False, False, 64, streaming=True,
+                                                     num_iter=5, cost_model=None, pipeline_memory=64 * 1024**2)
+    phases = summary["phases"]
+    assert summary["pipeline"]["writes"] > 0
+    # Every tensor is written by the write-behind thread, plus the final close on the main thread
+    assert phases["save"]["calls"] == summary["pipeline"]["writes"] + 1
+    # Streaming reads of all weights and biases, most of them by the prefetch thread
+    assert phases["load"]["calls"] >= 1 + len(tensors)
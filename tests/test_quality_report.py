@@ -0,0 +1,45 @@
+import csv
+import json
+
+import pytest
+import torch
+from safetensors.torch import load_file, save_file
+
+import convert_fp8_scaled_learned_svd_fast as converter_module
+
+
+@pytest.fixture
+def converted(tmp_path):
+    generator = torch.Generator().manual_seed(0)
+    source = str(tmp_path / "model.safetensors")
+    save_file({f"blocks.{i}.fc.weight": torch.randn(64, 32, generator=generator).to(torch.bfloat16) for i in range(2)}, source)
+    output = str(tmp_path / "out.safetensors")
+    assert converter_module.convert_to_fp8_scaled(source, output, False, False, 64, num_iter=100, seed=0) is not None
+    return source, output
+
+
+def test_report_matches_dense_metrics_in_any_block_size(converted):
+    source, output = converted
+    report = converter_module.quality_report(source, output)
+    small_blocks = converter_module.quality_report(source, output, chunk_bytes=16 * 32 * 4)
+    assert report["summary"]["weights"] == 2
+    original, fp8 = load_file(source), load_file(output)
+    for layer, small in zip(report["layers"], small_blocks["layers"]):
+        W = original[layer["key"]].float()
+        W_dq = fp8[layer["key"]].float() * fp8[layer["key"][:-len(".weight")] + ".scale_weight"].float()
+        assert layer["rel_error"] == pytest.approx(((W_dq - W).norm() / W.norm()).item(), rel=1e-4)
+        assert small["rel_error"] == pytest.approx(layer["rel_error"], rel=1e-5)
+        assert layer["tpec_loss"] < layer["rtn_tpec_loss"]
+    assert report["summary"]["tpec_better_than_rtn"] == 2
+
+
+def test_report_is_written_as_csv_or_json(tmp_path, converted):
+    report = converter_module.quality_report(*converted)
+    converter_module.write_quality_report(report, str(tmp_path / "report.csv"))
+    converter_module.write_quality_report(report, str(tmp_path / "report.json"))
+    with open(tmp_path / "report.csv", "r", encoding="utf-8", newline="") as fh:
+        rows = list(csv.DictReader(fh))
+    assert [row["key"] for row in rows] == [layer["key"] for layer in report["layers"]]
+    assert rows[0]["shape"] == "64x32"
+    with open(tmp_path / "report.json", "r", encoding="utf-8") as fh:
+        assert json.load(fh)["summary"]["weights"] == 2
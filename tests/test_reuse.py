@@ -0,0 +1,44 @@
+import torch
+from safetensors.torch import save_file
+
+import convert_fp8_scaled_learned_svd_fast as converter_module
+
+
+def _convert(source, output, **kwargs):
+    summary = converter_module.convert_to_fp8_scaled(source, output, False, False, 128, num_iter=20, seed=0, **kwargs)
+    assert summary is not None
+    with open(output, "rb") as fh:
+        return fh.read()
+
+
+def test_reused_weights_match_a_fresh_conversion(tmp_path, capsys):
+    generator = torch.Generator().manual_seed(0)
+    base = {}
+    for i in range(4):
+        base[f"blocks.{i}.fc.weight"] = torch.randn(48, 32, generator=generator).to(torch.bfloat16)
+        base[f"blocks.{i}.fc.bias"] = torch.randn(48, generator=generator).to(torch.bfloat16)
+    finetune = dict(base)
+    finetune["blocks.1.fc.weight"] = (base["blocks.1.fc.weight"].float() * 1.01).to(torch.bfloat16)
+    finetune["blocks.2.fc.bias"] = (base["blocks.2.fc.bias"].float() + 0.5).to(torch.bfloat16)
+    base_path, finetune_path = str(tmp_path / "base.safetensors"), str(tmp_path / "finetune.safetensors")
+    save_file(base, base_path)
+    save_file(finetune, finetune_path)
+
+    base_fp8 = str(tmp_path / "base_fp8.safetensors")
+    _convert(base_path, base_fp8)
+    fresh = _convert(finetune_path, str(tmp_path / "fresh.safetensors"))
+    capsys.readouterr()
+    reused = _convert(finetune_path, str(tmp_path / "reused.safetensors"), reuse_from=base_fp8, base_source=base_path)
+    assert "Reusing 2/4 unchanged weights" in capsys.readouterr().out
+    assert reused == fresh
+
+
+def test_changed_bias_is_not_reusable(tmp_path):
+    weight, bias = torch.randn(16, 8), torch.randn(16)
+    base_path, finetune_path = str(tmp_path / "base.safetensors"), str(tmp_path / "finetune.safetensors")
+    save_file({"fc.weight": weight, "fc.bias": bias}, base_path)
+    save_file({"fc.weight": weight, "fc.bias": bias + 1}, finetune_path)
+    base_fp8 = str(tmp_path / "base_fp8.safetensors")
+    _convert(base_path, base_fp8)
+    assert converter_module.find_reusable_weights(base_path, ["fc.weight"], base_path, base_fp8, False) == ["fc.weight"]
+    assert converter_module.find_reusable_weights(finetune_path, ["fc.weight"], base_path, base_fp8, False) == []
@@ -0,0 +1,57 @@
+import json
+import os
+
+import torch
+from safetensors import safe_open
+from safetensors.torch import load_file, save_file
+
+import convert_fp8_scaled_learned_svd_fast as converter_module
+
+
+def test_sharded_conversion_matches_single_file(tmp_path):
+    generator = torch.Generator().manual_seed(0)
+    tensors = {
+        "blocks.0.fc.weight": torch.randn(48, 32, generator=generator).to(torch.bfloat16),
+        "blocks.0.fc.bias": torch.randn(48, generator=generator).to(torch.bfloat16),
+        "blocks.1.fc.weight": torch.randn(32, 48, generator=generator).to(torch.bfloat16),
+        "blocks.1.fc.bias": torch.randn(32, generator=generator).to(torch.bfloat16),
+        "pos_embed": torch.randn(4, 32, generator=generator).to(torch.bfloat16),
+    }
+    # The first layer's bias sits in the other shard, as it may in real checkpoints
+    layout = {"model-00001-of-00002.safetensors": ["blocks.0.fc.weight", "pos_embed"],
+              "model-00002-of-00002.safetensors": ["blocks.0.fc.bias", "blocks.1.fc.weight", "blocks.1.fc.bias"]}
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    for name, keys in layout.items():
+        save_file({key: tensors[key] for key in keys}, str(source_dir / name))
+    index_file = str(source_dir / "model.safetensors.index.json")
+    with open(index_file, "w", encoding="utf-8") as fh:
+        json.dump({"metadata": {}, "weight_map": {key: name for name, keys in layout.items() for key in keys}}, fh)
+    single = str(tmp_path / "single.safetensors")
+    save_file(tensors, single)
+
+    output_dir = str(tmp_path / "out")
+    assert converter_module.convert_sharded(index_file, output_dir, False, False, 128, num_iter=20, seed=0) is not None
+    assert converter_module.convert_to_fp8_scaled(single, str(tmp_path / "single_fp8.safetensors"), False, False, 128, num_iter=20, seed=0) is not None
+    reference = load_file(str(tmp_path / "single_fp8.safetensors"))
+
+    with open(os.path.join(output_dir, "model.safetensors.index.json"), "r", encoding="utf-8") as fh:
+        index = json.load(fh)
+    weight_map = index["weight_map"]
+    assert set(weight_map) == set(reference)
+    assert weight_map["blocks.0.fc.bias"] == weight_map["blocks.0.fc.weight"] == "model-00001-of-00002.safetensors"
+    assert weight_map["blocks.0.fc.scale_weight"] == "model-00001-of-00002.safetensors"
+    assert weight_map["scaled_fp8"] == "model-00001-of-00002.safetensors"
+
+    total_size = 0
+    for name in layout:
+        path = os.path.join(output_dir, name)
+        with safe_open(path, framework="pt", device="cpu") as f:
+            keys = set(f.keys())
+        assert keys == {key for key, shard in weight_map.items() if shard == name}
+        converted = load_file(path)
+        for key, tensor in converted.items():
+            assert tensor.dtype == reference[key].dtype
+            assert torch.equal(tensor.view(torch.uint8), reference[key].view(torch.uint8)), key
+            total_size += tensor.numel() * tensor.element_size()
+    assert index["metadata"]["total_size"] == total_size
@@ -0,0 +1,33 @@
+import torch
+from safetensors.torch import load_file, save_file
+
+import convert_fp8_scaled_learned_svd_fast as converter_module
+
+
+def _model(path):
+    generator = torch.Generator().manual_seed(0)
+    tensors = {
+        "blocks.0.fc.weight": torch.randn(48, 32, generator=generator).to(torch.bfloat16),
+        "blocks.0.fc.bias": torch.randn(48, generator=generator).to(torch.bfloat16),
+        "pos_embed": torch.randn(4, 32, generator=generator).to(torch.bfloat16),
+        "blocks.1.fc.weight": torch.randn(16, 48, generator=generator).to(torch.bfloat16),
+    }
+    save_file(tensors, path)
+    return tensors
+
+
+def test_streaming_matches_loading_the_whole_model(tmp_path):
+    source = str(tmp_path / "model.safetensors")
+    tensors = _model(source)
+    outputs = []
+    for streaming in (False, True):
+        output = str(tmp_path / f"out_{streaming}.safetensors")
+        summary = converter_module.convert_to_fp8_scaled(source, output, False, False, 128, streaming=streaming, num_iter=20, seed=0)
+        assert summary is not None
+        with open(output, "rb") as fh:
+            outputs.append(fh.read())
+    assert outputs[0] == outputs[1]
+    converted = load_file(str(tmp_path / "out_True.safetensors"))
+    assert converted["blocks.0.fc.weight"].dtype == converter_module.TARGET_FP8_DTYPE
+    assert "blocks.0.fc.scale_weight" in converted
+    assert torch.equal(converted["pos_embed"], tensors["pos_embed"])
@@ -0,0 +1,50 @@
+import torch
+from safetensors.torch import load_file, save_file
+
+import convert_fp8_scaled_learned_svd_fast as converter_module
+
+
+def test_tiled_power_iteration_is_capped():
+    W = torch.randn(32, 32, generator=torch.Generator().manual_seed(0))
+    passes = []
+    def blocks():
+        passes.append(1)
+        for start in range(0, W.shape[0], 8):
+            yield W[start:start + 8]
+    engine = converter_module.PrincipalVectorEngine("power", tol=-1.0, max_iter=500) # A tolerance no iteration reaches
+    engine.top_vectors_tiled(blocks, W.shape, "cpu")
+    assert engine.iterations == converter_module.PrincipalVectorEngine.TILED_MAX_ITER
+    assert len(passes) == engine.iterations + 2 # Start vector and U_k
+    assert engine.tiled_capped == 1
+    assert "stopped at" in engine.report()
+
+
+def test_plan_counts_tiled_read_passes(tmp_path):
+    source = str(tmp_path / "model.safetensors")
+    save_file({"embed.weight": torch.randn(256, 64).to(torch.bfloat16), "fc.weight": torch.randn(16, 8).to(torch.bfloat16)}, source)
+    plan = converter_module.plan_conversion(source, False, False, solver="closed_form", cost_model=None, tile_size=16 * 1024)
+    entries = {entry["key"]: entry for entry in plan["tensors"]}
+    assert entries["embed.weight"]["action"] == "optimize_tiled"
+    assert entries["embed.weight"]["read_passes"] == converter_module.tiled_read_passes()
+    assert entries["fc.weight"]["read_passes"] == 1
+    untiled = converter_module.plan_conversion(source, False, False, solver="closed_form", cost_model=None)
+    assert plan["totals"]["seconds"] > untiled["totals"]["seconds"]
+    assert plan["totals"]["read_bytes"] == plan["totals"]["input_bytes"] + (converter_module.tiled_read_passes() - 1) * entries["embed.weight"]["bytes_in"]
+
+
+def test_tiled_conversion_matches_whole_weight(tmp_path):
+    generator = torch.Generator().manual_seed(0)
+    source = str(tmp_path / "model.safetensors")
+    save_file({"fc.weight": torch.randn(128, 64, generator=generator).to(torch.bfloat16), "fc.bias": torch.randn(128, generator=generator)}, source)
+    outputs = {}
+    for name, tile_size in (("whole", None), ("tiled", 8 * 1024)):
+        output = str(tmp_path / f"{name}.safetensors")
+        summary = converter_module.convert_to_fp8_scaled(source, output, False, False, 64, num_iter=50, solver="closed_form",
+                                                         principal="power", seed=0, tile_size=tile_size)
+        assert summary is not None
+        outputs[name] = load_file(output)
+    assert summary["tiled"] == 1
+    whole, tiled = outputs["whole"], outputs["tiled"]
+    assert torch.equal(whole["fc.scale_weight"], tiled["fc.scale_weight"])
+    assert (whole["fc.weight"].view(torch.uint8) != tiled["fc.weight"].view(torch.uint8)).float().mean().item() < 0.01
+    assert torch.allclose(whole["fc.bias"], tiled["fc.bias"], atol=1e-3) # Differs only through the codes above
@@ -0,0 +1,27 @@
+import time
+
+import pytest
+import torch
+from safetensors.torch import save_file
+
+import convert_fp8_scaled_learned_svd_fast as converter_module
+
+
+def test_shares_follow_size_and_loss_gap():
+    scheduler = converter_module.TimeBudgetScheduler(100.0, total_numel=300, start=time.perf_counter())
+    deadline = scheduler.allocate(100, initial_loss=1.0)
+    assert scheduler.last_share == pytest.approx(100.0 * 100 / 300, rel=0.01)
+    assert deadline == pytest.approx(time.perf_counter() + scheduler.last_share, abs=0.5)
+    scheduler.finish(100, stopped=False)
+    # A gap four times the average so far is capped at four, and gets a larger share of what is left
+    scheduler.allocate(100, initial_loss=7.0)
+    assert scheduler.last_share > 100.0 * 100 / 300
+
+
+def test_tiny_budget_stops_refine_loops(tmp_path):
+    source = str(tmp_path / "model.safetensors")
+    save_file({f"blocks.{i}.fc.weight": torch.randn(64, 32) for i in range(3)}, source)
+    summary = converter_module.convert_to_fp8_scaled(source, str(tmp_path / "out.safetensors"), False, False, 64,
+                                                     num_iter=100000, time_budget=1e-3)
+    assert summary is not None
+    assert summary["time_budget"]["budget_stops"] == 3
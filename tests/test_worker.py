@@ -0,0 +1,47 @@
+import json
+import os
+import subprocess
+import sys
+
+import torch
+from safetensors.torch import save_file
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_worker_runs_jobs_and_plans_in_one_process(tmp_path):
+    source = str(tmp_path / "model.safetensors")
+    save_file({"fc.weight": torch.randn(16, 8), "fc.bias": torch.randn(16)}, source)
+    args = {"t5xxl": False, "keep_distillation": False, "calib_samples": 64, "num_iter": 5}
+    messages = [
+        {"type": "convert", "id": 1, "args": {"input_file": source, "output_file": str(tmp_path / "one.safetensors"), **args}},
+        {"type": "convert", "id": 2, "args": {"input_file": source, "output_file": str(tmp_path / "two.safetensors"), **args}},
+        {"type": "plan", "id": 3, "args": {"input_file": source, "t5xxl": False, "keep_distillation": False}},
+    ]
+    worker = subprocess.Popen([sys.executable, os.path.join(ROOT, "fp8_conversion_worker.py")], cwd=ROOT, stdin=subprocess.PIPE,
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, env={**os.environ, "HOME": str(tmp_path)})
+    for message in messages:
+        worker.stdin.write(json.dumps(message) + "\n")
+    worker.stdin.flush()
+    lines = []
+    while sum(json.loads(line)["type"] in ("done", "cancelled", "error") for line in lines) < 2:
+        line = worker.stdout.readline()
+        assert line, "worker exited early"
+        lines.append(line)
+    worker.stdin.write(json.dumps({"type": "shutdown"}) + "\n")
+    worker.stdin.close()
+    lines += worker.stdout.readlines()
+    assert worker.wait(timeout=60) == 0
+    replies = [json.loads(line) for line in lines]
+    assert replies[0]["type"] == "ready"
+    by_type = {}
+    for reply in replies[1:]:
+        by_type.setdefault(reply["type"], []).append(reply.get("id"))
+    assert by_type["started"] == [1, 2]
+    assert by_type["done"] == [1, 2]
+    assert by_type["plan"] == [3]
+    assert "error" not in by_type
+    assert any(reply["type"] == "log" and reply["id"] == 1 for reply in replies)
+    assert os.path.exists(tmp_path / "one.safetensors") and os.path.exists(tmp_path / "two.safetensors")
+    # GUI jobs refine the planner's cost model
+    assert os.path.exists(tmp_path / ".cache" / "fp8_learned_rounding" / "cost_model.json")
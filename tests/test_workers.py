@@ -0,0 +1,37 @@
+import torch
+from safetensors.torch import load_file, save_file
+
+import convert_fp8_scaled_learned_svd_fast as converter_module
+
+
+def test_parent_does_not_load_pooled_weights(tmp_path, monkeypatch):
+    generator = torch.Generator().manual_seed(0)
+    tensors = {}
+    for i in range(2):
+        tensors[f"blocks.{i}.fc.weight"] = torch.randn(64, 32, generator=generator).to(torch.bfloat16)
+        tensors[f"blocks.{i}.fc.bias"] = torch.randn(64, generator=generator).to(torch.bfloat16)
+    model = str(tmp_path / "model.safetensors")
+    save_file(tensors, model)
+
+    loaded = []
+    safe_open = converter_module.safe_open
+    class RecordingHandle:
+        def __init__(self, *args, **kwargs):
+            self.handle = safe_open(*args, **kwargs)
+        def __enter__(self):
+            self.handle.__enter__()
+            return self
+        def __exit__(self, *exc):
+            return self.handle.__exit__(*exc)
+        def get_tensor(self, key):
+            loaded.append(key)
+            return self.handle.get_tensor(key)
+    monkeypatch.setattr(converter_module, "safe_open", RecordingHandle)
+
+    output = str(tmp_path / "out.safetensors")
+    summary = converter_module.convert_to_fp8_scaled(model, output, False, False, 256, num_iter=10, workers=2, cost_model=None)
+    assert summary is not None
+    assert loaded == []
+    converted = load_file(output)
+    assert converted["blocks.0.fc.weight"].dtype == converter_module.TARGET_FP8_DTYPE
+    assert not torch.equal(converted["blocks.0.fc.bias"], tensors["blocks.0.fc.bias"])
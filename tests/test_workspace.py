@@ -0,0 +1,20 @@
+import convert_fp8_scaled_learned_svd_fast as converter_module
+
+
+def test_buffers_are_reused_per_shape():
+    pool = converter_module.WorkspacePool()
+    W = pool.get("W", (4, 8), "cpu")
+    assert pool.get("W", (4, 8), "cpu") is W
+    assert pool.get("rounded", (4, 8), "cpu") is not W
+    assert (pool.allocations, pool.reuses) == (2, 1)
+
+
+def test_other_shapes_are_dropped_beyond_the_limit():
+    pool = converter_module.WorkspacePool(memory_limit=4 * 8 * 4) # One float32 (4, 8) buffer
+    first = pool.get("W", (4, 8), "cpu")
+    pool.get("W", (2, 8), "cpu")
+    assert pool.get("W", (4, 8), "cpu") is first # Still within the limit
+    pool.get("W", (8, 8), "cpu") # Over the limit: the least recently used other shape goes first
+    assert list(pool.groups) == [((4, 8), "cpu"), ((8, 8), "cpu")]
+    pool.get("W", (1, 8), "cpu")
+    assert list(pool.groups) == [((1, 8), "cpu")] # (8, 8) alone is over the limit once another shape is in use
@@ -0,0 +1,124 @@
+import os
+import threading
+
+import pytest
+import torch
+from safetensors.torch import load_file, save_file
+
+import convert_fp8_scaled_learned_svd_fast as converter_module
+
+
+def _specs(tensors):
+    return {key: (converter_module.TORCH_TO_SAFETENSORS_DTYPE[t.dtype], tuple(t.shape)) for key, t in tensors.items()}
+
+
+@pytest.mark.parametrize("backend", ["mmap", "file"])
+def test_close_matches_save_file(tmp_path, backend):
+    tensors = {"a.weight": torch.randn(8, 4), "b.bias": torch.randn(3).to(torch.bfloat16)}
+    path = str(tmp_path / "out.safetensors")
+    writer = converter_module.SafetensorsStreamWriter(path, _specs(tensors), backend=backend)
+    assert not os.path.exists(path)
+    for key, tensor in tensors.items():
+        writer.write(key, tensor)
+    writer.close()
+    save_file(tensors, str(tmp_path / "reference.safetensors"))
+    with open(path, "rb") as a, open(tmp_path / "reference.safetensors", "rb") as b:
+        assert a.read() == b.read()
+    assert not os.path.exists(path + ".tmp")
+
+
+@pytest.mark.parametrize("backend", ["mmap", "file"])
+def test_abort_leaves_no_file(tmp_path, backend):
+    tensors = {"a.weight": torch.randn(8, 4), "b.weight": torch.randn(2, 2)}
+    path = str(tmp_path / "out.safetensors")
+    writer = converter_module.SafetensorsStreamWriter(path, _specs(tensors), backend=backend)
+    writer.write("a.weight", tensors["a.weight"])
+    writer.abort()
+    writer.abort()
+    assert os.listdir(tmp_path) == []
+
+
+def test_close_with_missing_tensor_leaves_no_file(tmp_path):
+    tensors = {"a.weight": torch.randn(8, 4), "b.weight": torch.randn(2, 2)}
+    path = str(tmp_path / "out.safetensors")
+    writer = converter_module.SafetensorsStreamWriter(path, _specs(tensors))
+    writer.write("a.weight", tensors["a.weight"])
+    with pytest.raises(RuntimeError):
+        writer.close()
+    assert os.listdir(tmp_path) == []
+
+
+def test_cancelled_conversion_leaves_no_output(tmp_path):
+    source = str(tmp_path / "model.safetensors")
+    save_file({"fc.weight": torch.randn(16, 8), "fc.bias": torch.randn(16)}, source)
+    output = str(tmp_path / "model_fp8.safetensors")
+    cancel_event = threading.Event()
+    cancel_event.set()
+    with pytest.raises(converter_module.ConversionCancelled):
+        converter_module.convert_to_fp8_scaled(source, output, False, False, 64, num_iter=5, cost_model=None, cancel_event=cancel_event)
+    assert sorted(os.listdir(tmp_path)) == ["model.safetensors"]
+
+
+def test_failed_conversion_leaves_no_output(tmp_path, monkeypatch):
+    source = str(tmp_path / "model.safetensors")
+    save_file({"fc.weight": torch.randn(16, 8), "fc.bias": torch.randn(16)}, source)
+    output = str(tmp_path / "model_fp8.safetensors")
+    correct_bias = converter_module.correct_bias
+    def fail(*args, **kwargs):
+        raise MemoryError("out of memory")
+    monkeypatch.setattr(converter_module, "correct_bias", fail)
+    with pytest.raises(MemoryError):
+        converter_module.convert_to_fp8_scaled(source, output, False, False, 64, num_iter=5, cost_model=None)
+    assert sorted(os.listdir(tmp_path)) == ["model.safetensors"]
+    converted = str(tmp_path / "ok.safetensors")
+    monkeypatch.setattr(converter_module, "correct_bias", correct_bias) # undo() would also bring back the progress bars
+    assert converter_module.convert_to_fp8_scaled(source, converted, False, False, 64, num_iter=5, cost_model=None) is not None
+    assert load_file(converted)["fc.weight"].dtype == converter_module.TARGET_FP8_DTYPE
+
+
+def _copy_file_range_partial(src, dst, count, offset_src, offset_dst):
+    """Copies a few bytes, then fails as copy_file_range does across some file systems."""
+    if count > 3:
+        os.pwrite(dst, os.pread(src, 3, offset_src), offset_dst)
+        return 3
+    raise OSError(18, "Invalid cross-device link")
+
+
+@pytest.mark.parametrize("backend", ["mmap", "file"])
+@pytest.mark.parametrize("copy_file_range", ["native", "partial", "missing"])
+def test_copy_raw_matches_save_file(tmp_path, monkeypatch, backend, copy_file_range):
+    if copy_file_range == "missing":
+        monkeypatch.delattr(os, "copy_file_range", raising=False)
+    elif copy_file_range == "partial":
+        monkeypatch.setattr(os, "copy_file_range", _copy_file_range_partial, raising=False)
+    elif not hasattr(os, "copy_file_range"):
+        pytest.skip("copy_file_range is not available on this platform")
+    source_tensors = {"raw.a": torch.randn(33, 7).to(torch.bfloat16), "raw.b": torch.arange(10, dtype=torch.int64), "raw.empty": torch.zeros(0, 4)}
+    source = str(tmp_path / "source.safetensors")
+    save_file(source_tensors, source)
+    header, data_start = converter_module.read_safetensors_header(source)
+    tensors = {"fc.weight": torch.randn(8, 4).to(converter_module.TARGET_FP8_DTYPE), **source_tensors, "fc.scale_weight": torch.ones(1)}
+    path = str(tmp_path / "out.safetensors")
+    writer = converter_module.SafetensorsStreamWriter(path, _specs(tensors), backend=backend)
+    with open(source, "rb") as src:
+        for key, tensor in tensors.items():
+            if key in source_tensors:
+                writer.copy_raw(key, src, data_start + header[key]["data_offsets"][0], (header[key]["dtype"], header[key]["shape"]))
+            else:
+                writer.write(key, tensor)
+    writer.close()
+    save_file(tensors, str(tmp_path / "reference.safetensors"))
+    with open(path, "rb") as a, open(tmp_path / "reference.safetensors", "rb") as b:
+        assert a.read() == b.read()
+
+
+def test_writer_backends_give_identical_conversions(tmp_path):
+    source = str(tmp_path / "model.safetensors")
+    save_file({"fc.weight": torch.randn(16, 8), "fc.bias": torch.randn(16), "pos_embed": torch.randn(3, 8).to(torch.bfloat16)}, source)
+    outputs = []
+    for backend in ("mmap", "file"):
+        output = str(tmp_path / f"{backend}.safetensors")
+        assert converter_module.convert_to_fp8_scaled(source, output, False, False, 64, num_iter=5, seed=0, writer_backend=backend) is not None
+        with open(output, "rb") as fh:
+            outputs.append(fh.read())
+    assert outputs[0] == outputs[1]